@@ -1,90 +1,262 @@
+import os
 import pandas as pd
-import math
+import numpy as np
+from schema import apply_schema
+from storage import CsvJournalBackend, SQLiteBackend
+from indexes import name_index, notify_insert, notify_delete, notify_update, dataset_version
+from risk_scoring import RISK_COLUMN, default_scorer
+from query import Query
+from page_cache import page_cache
 
 CSV_FILE = 'dataset\\cleaned_and_predicted_data.csv'
 
-def read_csv_data():
+# Nơi lưu trữ dữ liệu đang dùng (mặc định: file CSV kèm nhật ký thay đổi)
+_backend = None
+
+def get_backend():
+    """
+    Trả về nơi lưu trữ đang dùng, tạo CsvJournalBackend cho CSV_FILE nếu chưa được thiết lập.
+    """
+    global _backend
+    if _backend is None:
+        _backend = CsvJournalBackend(CSV_FILE)
+    return _backend
+
+def set_backend(backend):
+    """
+    Thay đổi nơi lưu trữ (ví dụ storage.SQLiteBackend) cho các hàm CRUD.
+    """
+    global _backend
+    _backend = backend
+
+def use_sqlite(db_path, csv_path=CSV_FILE, rebuild=False):
     """
-    Đọc dữ liệu từ file CSV và trả về DataFrame.
+    Dùng cơ sở dữ liệu SQLite db_path làm nơi lưu trữ cho các hàm CRUD.
+    :param csv_path: File CSV dùng để tạo cơ sở dữ liệu nếu chưa có
+    :param rebuild: Tạo lại cơ sở dữ liệu từ csv_path kể cả khi đã có (ví dụ sau khi làm sạch dữ liệu)
+    """
+    if rebuild or not os.path.exists(db_path):
+        backend = SQLiteBackend.from_csv(csv_path, db_path)
+    else:
+        backend = SQLiteBackend(db_path)
+    set_backend(backend)
+    return backend
+
+def read_csv_data(report=False):
+    """
+    Đọc dữ liệu từ nơi lưu trữ (mặc định file CSV kèm nhật ký thay đổi) và trả về DataFrame.
+    Chỉ số (index) của DataFrame là mã dòng ổn định, dùng cho các thao tác cập nhật và xóa.
     """
     try:
-        return pd.read_csv(CSV_FILE)
+        return get_backend().load(report=report)
     except FileNotFoundError:
         return pd.DataFrame()
 
-def paginate_data(data: pd.DataFrame, page_size: int, current_page: int):
+def read_preview(rows):
+    """
+    Đọc nhanh rows bản ghi đầu tiên từ nơi lưu trữ để hiển thị ngay trong lúc read_csv_data chạy ở nền.
+    """
+    try:
+        return get_backend().preview(rows)
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+def paginate_data(data, page_size: int, current_page: int):
     """
     Phân trang dữ liệu.
-    :param data: DataFrame hiện tại
+    :param data: DataFrame hiện tại hoặc truy vấn lười (query.Query) trên DataFrame
     :param page_size: Số dòng mỗi trang
     :param current_page: Trang hiện tại
     :return: DataFrame của trang hiện tại và tổng số trang
     """
-    # Tính tổng số trang
-    total_pages = math.ceil(len(data) / page_size)
-    
-    # Kiểm tra trang hợp lệ
-    if current_page < 1 or current_page > total_pages:
-        raise ValueError("Trang không hợp lệ.")
-    
-    # Tính chỉ số bắt đầu và kết thúc của trang hiện tại
-    start_idx = (current_page - 1) * page_size
-    end_idx = start_idx + page_size
-    
-    # Trả về dữ liệu trang hiện tại và tổng số trang
-    return data.iloc[start_idx:end_idx], total_pages
+    query = data if isinstance(data, Query) else Query(data)
+    version = dataset_version(query.data)
+
+    def key(page):
+        return ('query', query.cache_key(), version, page_size, page)
 
+    page_data, total_pages = page_cache.get(key(current_page), lambda: query.page(page_size, current_page), owner=query.data)
+    # Nạp trước trang trước và trang sau ở luồng nền
+    for page in (current_page - 1, current_page + 1):
+        if 1 <= page <= total_pages:
+            page_cache.prefetch(key(page), lambda page=page: query.page(page_size, page), owner=query.data,
+                                still_valid=lambda: dataset_version(query.data) == version)
+    return page_data, total_pages
 
 def create_data(data, new_entry):
     """
-    Thêm một bản ghi mới vào DataFrame và lưu vào CSV.
+    Thêm một bản ghi mới vào DataFrame và lưu vào nơi lưu trữ.
     :param data: DataFrame hiện tại
     :param new_entry: Dữ liệu mới dạng dictionary
     :return: DataFrame đã cập nhật
     """
-    # Tạo DataFrame từ bản ghi mới
-    new_data = pd.DataFrame([new_entry])
+    # Tạo DataFrame từ bản ghi mới với mã dòng mới
+    row_id = get_backend().next_row_id(data)
+    new_data = apply_schema(pd.DataFrame([new_entry], index=[row_id]))
 
-    # Thêm bản ghi mới vào file CSV (append mode)
-    header = not data.empty
-    new_data.to_csv(CSV_FILE, mode='a', index=False, header=False)
+    # Tính nguy cơ trầm cảm cho bản ghi mới bằng cùng bảng luật với predict_depression_risk
+    if default_scorer.columns.issubset(new_data.columns):
+        risk = default_scorer.score_batch(new_data)[1]
+        new_data[RISK_COLUMN] = risk
+        new_entry = {**new_entry, RISK_COLUMN: risk.iloc[0]}
 
-    # Cập nhật DataFrame hiện tại
-    updated_data = pd.concat([data, new_data], ignore_index=True)
+    # Lưu bản ghi mới (với file CSV: ghi nối vào nhật ký)
+    get_backend().insert(row_id, new_entry)
+
+    # Cập nhật DataFrame hiện tại (cùng kiểu dữ liệu theo schema để giữ các cột Categorical)
+    updated_data = pd.concat([data, new_data])
+    notify_insert(data, updated_data, [row_id])
     return updated_data
 
 def delete_records(data, indices):
     """
-    Xóa các bản ghi từ DataFrame dựa trên danh sách chỉ số.
+    Xóa các bản ghi từ DataFrame dựa trên danh sách mã dòng.
     """
     try:
         # Xóa các bản ghi khỏi DataFrame
-        data = data.drop(indices).reset_index(drop=True)
-        # Ghi lại vào file CSV
-        data.to_csv(CSV_FILE, index=False)
-        return data
+        updated_data = data.drop(indices)
+        # Lưu thao tác xóa (với file CSV: ghi nối vào nhật ký)
+        get_backend().delete(indices)
+        notify_delete(data, updated_data, indices)
+        return updated_data
     except Exception as e:
         raise ValueError(f"Đã xảy ra lỗi khi xóa dữ liệu: {e}")
 
-def update_data(data, target_name, updated_entry):
+def insert_records(data, rows, positions=None):
+    """
+    Thêm lại các bản ghi với mã dòng có sẵn (ví dụ khi hoàn tác thao tác xóa) và lưu vào nơi lưu trữ.
+    :param data: DataFrame hiện tại
+    :param rows: DataFrame các bản ghi cần thêm, index là mã dòng
+    :param positions: Vị trí của từng bản ghi trong DataFrame kết quả (mặc định: cuối DataFrame)
+    :return: DataFrame đã cập nhật
+    """
+    get_backend().insert_many(list(zip(rows.index, rows.to_dict('records'))), positions)
+
+    updated_data = pd.concat([data, rows])
+    if positions is not None:
+        # Đưa các bản ghi về đúng vị trí cũ bằng một hoán vị (không sắp xếp lại DataFrame)
+        order = np.empty(len(updated_data), dtype=np.intp)
+        inserted = np.zeros(len(updated_data), dtype=bool)
+        inserted[positions] = True
+        order[positions] = np.arange(len(data), len(updated_data))
+        order[~inserted] = np.arange(len(data))
+        updated_data = updated_data.take(order)
+    notify_insert(data, updated_data, list(rows.index))
+    return updated_data
+
+def set_values(data, record_index, values):
+    """
+    Ghi đúng các giá trị cho bản ghi có mã dòng record_index (không tính lại nguy cơ trầm cảm),
+    ví dụ khi hoàn tác một lần cập nhật, và lưu vào nơi lưu trữ.
+    :param data: DataFrame hiện tại (được cập nhật trực tiếp)
+    """
+    old_values = {col: data.at[record_index, col] for col in values}
+    for col, value in values.items():
+        data.at[record_index, col] = value
+    get_backend().update(record_index, values)
+    notify_update(data, record_index, old_values, dict(values))
+
+def _apply_update(data, record_index, updated_entry):
+    """
+    Ghi các giá trị mới vào DataFrame, tính lại nguy cơ trầm cảm của riêng dòng này nếu các cột
+    đầu vào của bảng luật thay đổi, và cập nhật các chỉ mục liên quan.
+    :return: Các thay đổi thực tế (kèm Depression Risk đã tính lại)
+    """
+    changes = dict(updated_entry)
+    old_values = {col: data.at[record_index, col] for col in changes}
+    for col, value in changes.items():
+        data.at[record_index, col] = value  # Cập nhật giá trị mới cho từng cột
+
+    if RISK_COLUMN in data.columns and default_scorer.columns.intersection(changes):
+        risk = default_scorer.score_batch(data.loc[[record_index]])[1].iloc[0]
+        old_values.setdefault(RISK_COLUMN, data.at[record_index, RISK_COLUMN])
+        data.at[record_index, RISK_COLUMN] = risk
+        changes[RISK_COLUMN] = risk
+
+    notify_update(data, record_index, old_values, changes)
+    return changes
+
+def update_record(data, record_index, updated_entry):
+    """
+    Cập nhật các giá trị của bản ghi có mã dòng record_index và lưu vào nơi lưu trữ.
+    :param data: DataFrame hiện tại (được cập nhật trực tiếp)
+    :param record_index: Mã dòng của bản ghi
+    :param updated_entry: Dữ liệu cập nhật dưới dạng dictionary
+    :return: Các thay đổi đã lưu (kèm Depression Risk nếu được tính lại)
+    """
+    changes = _apply_update(data, record_index, updated_entry)
+    get_backend().update(record_index, changes)
+    return changes
+
+def find_records(data, target_name, duplicates='first'):
+    """
+    Tìm mã dòng của các bản ghi có Name bằng target_name bằng chỉ mục băm (O(1)).
+    :param duplicates: Cách xử lý khi nhiều bản ghi trùng tên:
+        'first' - chỉ lấy bản ghi đứng đầu, 'all' - lấy tất cả, 'error' - báo lỗi ValueError
+    :return: Danh sách mã dòng (rỗng nếu không tìm thấy)
+    """
+    row_ids = name_index(data).lookup(target_name)
+    if len(row_ids) > 1:
+        if duplicates == 'error':
+            raise ValueError(f"Có {len(row_ids)} bản ghi cùng tên '{target_name}'.")
+        if duplicates == 'first':
+            return [min(row_ids, key=data.index.get_loc)]
+    return list(row_ids)
+
+def update_data(data, target_name, updated_entry, duplicates='first'):
     """
     Cập nhật dữ liệu của một bản ghi cụ thể dựa trên tên.
     :param data: DataFrame hiện tại
     :param target_name: Giá trị Name của bản ghi cần cập nhật
     :param updated_entry: Dữ liệu cập nhật dưới dạng dictionary
+    :param duplicates: Cách xử lý khi nhiều bản ghi trùng tên ('first', 'all' hoặc 'error')
     :return: True nếu cập nhật thành công, False nếu không tìm thấy bản ghi
     """
-    # Tìm chỉ số của bản ghi cần cập nhật
-    record_index = data.index[data["Name"] == target_name]
+    # Tìm mã dòng của bản ghi cần cập nhật
+    record_ids = find_records(data, target_name, duplicates)
 
-    # Nếu tìm thấy bản ghi
-    if not record_index.empty:
-        for col, value in updated_entry.items():
-            data.at[record_index[0], col] = value  # Cập nhật giá trị mới cho từng cột
+    # Nếu không tìm thấy bản ghi
+    if not record_ids:
+        return False
 
-        # Lưu dữ liệu đã cập nhật vào file CSV
-        data.to_csv(CSV_FILE, index=False)
-        return True
+    changes = [(record_index, _apply_update(data, record_index, updated_entry)) for record_index in record_ids]
+    get_backend().update_many(changes)
+    return True
 
-    # Nếu không tìm thấy bản ghi
-    return False
+def update_many(data, updates, duplicates='first'):
+    """
+    Cập nhật hàng loạt bản ghi theo tên, mỗi bản ghi tra cứu qua chỉ mục băm (O(1)),
+    các thay đổi được lưu trong một lần ghi.
+    :param data: DataFrame hiện tại (được cập nhật trực tiếp)
+    :param updates: Dictionary {Name: dữ liệu cập nhật} hoặc danh sách (Name, dữ liệu cập nhật)
+    :param duplicates: Cách xử lý khi nhiều bản ghi trùng tên ('first', 'all' hoặc 'error')
+    :return: Danh sách các tên không tìm thấy
+    """
+    if isinstance(updates, dict):
+        updates = updates.items()
+
+    changes = []
+    not_found = []
+    for target_name, updated_entry in updates:
+        record_ids = find_records(data, target_name, duplicates)
+        if not record_ids:
+            not_found.append(target_name)
+        for record_index in record_ids:
+            changes.append((record_index, _apply_update(data, record_index, updated_entry)))
+
+    if changes:
+        get_backend().update_many(changes)
+    return not_found
+
+def compaction_due():
+    """
+    Nơi lưu trữ có nhiều thay đổi chưa được gộp (nên chạy compact_data ở nền).
+    """
+    return get_backend().needs_compaction()
+
+def compact_data():
+    """
+    Gộp các thay đổi vào nơi lưu trữ chính (với file CSV: gộp nhật ký vào file gốc).
+    Dữ liệu không thay đổi nên có thể chạy ở luồng nền trong lúc vẫn thêm/sửa/xóa.
+    """
+    get_backend().compact()
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from indexes import get_index
+
+# Các cột số được đếm theo Depression Risk trong khối đếm (ngoài các cột Categorical)
+CUBE_NUMERIC_COLUMNS = ['Age']
+
+def _codes(series: pd.Series):
+    """
+    Mã số nguyên (-1: giá trị thiếu) và danh sách giá trị phân biệt của cột.
+    Cột Categorical dùng mã sẵn có; cột khác được mã hóa theo thứ tự tăng dần của giá trị.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.intp), list(series.cat.categories)
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes.astype(np.intp), list(uniques)
+
+class ContingencyCube:
+    """
+    Khối đếm: số bản ghi theo (giá trị cột, mức độ Depression Risk) cho mọi cột Categorical và cột Age.
+    - Xây dựng bằng một lần np.bincount trên mã kết hợp (mã cột * số mức độ + mã mức độ) cho mỗi cột.
+    - Được cập nhật theo phần thay đổi (delta) qua các thao tác crud; giá trị mới (ví dụ tuổi mới) thêm một hàng.
+    - Các biểu đồ chỉ đọc khối đếm nên chi phí phụ thuộc số giá trị phân biệt, không phụ thuộc số dòng.
+    Dòng có giá trị thiếu ở cột hoặc ở Depression Risk không được đếm (như groupby).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.labels = {}     # cột -> danh sách giá trị (hàng của bảng đếm)
+        self.positions = {}  # cột -> {giá trị: hàng}
+        self.counts = {}     # cột -> mảng (số giá trị, số mức độ)
+        self.categorical = set()
+        self.risk_levels = []
+        self.risk_positions = {}
+        if 'Depression Risk' not in data.columns:
+            return
+
+        risk_codes, self.risk_levels = _codes(data['Depression Risk'])
+        self.risk_positions = {level: i for i, level in enumerate(self.risk_levels)}
+        size = len(self.risk_levels)
+        for col in data.columns:
+            categorical = isinstance(data[col].dtype, pd.CategoricalDtype)
+            if col == 'Depression Risk' or not (categorical or col in CUBE_NUMERIC_COLUMNS):
+                continue
+            codes, labels = _codes(data[col])
+            keep = (codes >= 0) & (risk_codes >= 0)
+            combined = codes[keep] * size + risk_codes[keep]
+            counts = np.bincount(combined, minlength=len(labels) * size).reshape(len(labels), size)
+            self.labels[col] = labels
+            self.positions[col] = {label: i for i, label in enumerate(labels)}
+            self.counts[col] = counts.astype(np.int64)
+            if categorical:
+                self.categorical.add(col)
+
+    @property
+    def columns(self):
+        """Các cột có trong khối đếm."""
+        return list(self.counts)
+
+    def _risk_position(self, level):
+        position = self.risk_positions.get(level)
+        if position is None:
+            position = self.risk_positions[level] = len(self.risk_levels)
+            self.risk_levels.append(level)
+            for col, counts in self.counts.items():
+                self.counts[col] = np.hstack([counts, np.zeros((len(counts), 1), dtype=np.int64)])
+        return position
+
+    def _position(self, col, value):
+        position = self.positions[col].get(value)
+        if position is None:
+            position = self.positions[col][value] = len(self.labels[col])
+            self.labels[col].append(value)
+            counts = self.counts[col]
+            self.counts[col] = np.vstack([counts, np.zeros((1, counts.shape[1]), dtype=np.int64)])
+        return position
+
+    def _add(self, row, delta):
+        """Cộng delta vào các ô của một dòng {cột: giá trị}."""
+        risk = row.get('Depression Risk')
+        if pd.isna(risk):
+            return
+        risk_position = self._risk_position(risk)
+        for col in self.counts:
+            value = row.get(col)
+            if not pd.isna(value):
+                position = self._position(col, value)
+                self.counts[col][position, risk_position] += delta
+
+    def _rows(self, data, row_ids):
+        columns = self.columns + ['Depression Risk']
+        return data.loc[list(row_ids), columns].to_dict('records')
+
+    def on_insert(self, data, row_ids):
+        if self.risk_levels:
+            for row in self._rows(data, row_ids):
+                self._add(row, 1)
+
+    def on_delete(self, data, row_ids):
+        if self.risk_levels:
+            for row in self._rows(data, row_ids):
+                self._add(row, -1)
+
+    def on_update(self, data, row_id, old_values, new_values):
+        columns = self.columns + ['Depression Risk']
+        if not self.risk_levels or not any(col in new_values for col in columns):
+            return
+        new_row = {col: data.at[row_id, col] for col in columns}
+        old_row = {col: old_values[col] if col in old_values else value for col, value in new_row.items()}
+        self._add(old_row, -1)
+        self._add(new_row, 1)
+
+    def restrict(self, levels) -> 'ContingencyCube':
+        """
+        Khối đếm chỉ gồm các mức độ nguy cơ levels (ví dụ tập con nguy cơ cao), tính từ khối đếm hiện tại
+        mà không duyệt lại dữ liệu. Khối đếm kết quả không được cập nhật theo các thao tác crud.
+        """
+        cube = ContingencyCube(pd.DataFrame())
+        positions = [self.risk_positions[level] for level in levels if level in self.risk_positions]
+        cube.risk_levels = [self.risk_levels[position] for position in positions]
+        cube.risk_positions = {level: i for i, level in enumerate(cube.risk_levels)}
+        for col, counts in self.counts.items():
+            cube.labels[col] = list(self.labels[col])
+            cube.positions[col] = dict(self.positions[col])
+            cube.counts[col] = counts[:, positions].copy()
+        cube.categorical = set(self.categorical)
+        return cube
+
+    def table(self, column) -> pd.DataFrame:
+        """
+        Bảng đếm của cột: hàng là giá trị của cột (theo thứ tự category, cột số tăng dần), cột là mức độ nguy cơ.
+        """
+        if column not in self.counts:
+            raise ValueError(f"Cột '{column}' không có trong khối đếm.")
+        index = pd.Index(self.labels[column], name=column)
+        if column in self.categorical:
+            index = pd.CategoricalIndex(self.labels[column], categories=self.labels[column], name=column)
+        table = pd.DataFrame(self.counts[column], index=index,
+                             columns=pd.Index(self.risk_levels, name='Depression Risk'))
+        return table if column in self.categorical else table.sort_index()
+
+def contingency_cube(data: pd.DataFrame) -> ContingencyCube:
+    """
+    Khối đếm (cột x Depression Risk) của DataFrame, xây dựng một lần và được crud cập nhật tăng dần.
+    """
+    return get_index(data, 'cube', ContingencyCube)
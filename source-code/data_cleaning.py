@@ -1,9 +1,25 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
 import pandas as pd
 import numpy as np
+from schema import VALID_VALUES
+from risk_scoring import score_batch
 
-# Đọc file CSV
-file_path = 'dataset\\depression_data.csv'  
-data = pd.read_csv(file_path)
+# Đường dẫn mặc định của file gốc và file kết quả
+INPUT_FILE = 'dataset\\depression_data.csv'
+OUTPUT_FILE = 'dataset\\cleaned_and_predicted_data.csv'
+
+# Điều kiện hợp lệ của các cột số (mỗi điều kiện chỉ phụ thuộc vào chính cột đó)
+NUM_CONDITIONS = {
+    'Age': lambda values: (values >= 18) & (values <= 80),
+    'Income': lambda values: values >= 0,
+    'Number of Children': lambda values: values >= 0,
+}
 
 def remove_outliers(data: pd.DataFrame) -> pd.DataFrame:
     """
@@ -11,26 +27,15 @@ def remove_outliers(data: pd.DataFrame) -> pd.DataFrame:
     Điều kiện loại bỏ được định nghĩa cho cả dữ liệu số và chuỗi.
     """
     # Điều kiện lọc với dữ liệu số
-    num_conditions = {
-        'Age': (data['Age'] >= 18) & (data['Age'] <= 80), 
-        'Income': data['Income'] >= 0,
-        'Number of Children': data['Number of Children'] >= 0
-    }
+    num_conditions = {column: condition(data[column]) for column, condition in NUM_CONDITIONS.items()}
 
-    # Điều kiện lọc với dữ liệu chuỗi
-    cat_conditions = {
-        'Physical Activity Level': data['Physical Activity Level'].isin(['Sedentary', 'Moderate', 'Active']),
-        'Smoking Status': data['Smoking Status'].isin(['Non-smoker', 'Former', 'Current']),
-        'Employment Status': data['Employment Status'].isin(['Employed', 'Unemployed']),
-        'Alcohol Consumption': data['Alcohol Consumption'].isin(['Low', 'Moderate', 'High']),
-        'Dietary Habits': data['Dietary Habits'].isin(['Healthy', 'Moderate', 'Unhealthy']),
-        'Sleep Patterns': data['Sleep Patterns'].isin(['Poor', 'Good', 'Fair']),
-        'History of Mental Illness': data['History of Mental Illness'].isin(['Yes', 'No']),
-        'Family History of Depression': data['Family History of Depression'].isin(['Yes', 'No']),
-        'Chronic Medical Conditions': data['Chronic Medical Conditions'].isin(['Yes', 'No']),
-        'Marital Status': data['Marital Status'].isin(['Single', 'Married', 'Divorced', 'Widowed']),
-        'Education Level': data['Education Level'].isin(["High School", "Bachelor's Degree", "Master's Degree", "Associate Degree", "PhD"])
-    }
+    # Điều kiện lọc với dữ liệu chuỗi (miền giá trị lấy từ schema)
+    cat_columns = [
+        'Physical Activity Level', 'Smoking Status', 'Employment Status', 'Alcohol Consumption',
+        'Dietary Habits', 'Sleep Patterns', 'History of Mental Illness', 'Family History of Depression',
+        'Chronic Medical Conditions', 'Marital Status', 'Education Level'
+    ]
+    cat_conditions = {column: data[column].isin(VALID_VALUES[column]) for column in cat_columns}
 
     # Thay thế các giá trị không thỏa mãn điều kiện bằng NaN
     for column, condition in num_conditions.items():
@@ -43,10 +48,20 @@ def remove_outliers(data: pd.DataFrame) -> pd.DataFrame:
 
     return data
 
-def fill_missing_values(data: pd.DataFrame) -> pd.DataFrame:
+# Giá trị điền mặc định cho các cột chỉ có 'Yes' hoặc 'No'
+NO_FILL = {
+    'History of Mental Illness': 'No',
+    'History of Substance Abuse': 'No',
+    'Family History of Depression': 'No',
+    'Chronic Medical Conditions': 'No',
+}
+
+def compute_fill_statistics(data: pd.DataFrame) -> dict:
     """
-    Điền các giá trị thiếu trong DataFrame.
+    Tính các giá trị dùng để điền dữ liệu thiếu trên toàn bộ DataFrame.
+    :return: dictionary gồm 'num_fill' (giá trị điền cho cột số) và 'str_fill' (giá trị điền cho cột chuỗi)
     """
+    stats = {'num_fill': {}, 'str_fill': {}}
 
     # Xử lý các cột số
     num_columns = data.select_dtypes(include=['number']).columns
@@ -57,38 +72,48 @@ def fill_missing_values(data: pd.DataFrame) -> pd.DataFrame:
 
         # Điền trung vị (median) cho các cột lệch
         for col in median_cols:
-            if col in data.columns:
-                median_value = data[col].median()
-                data[col] = data[col].fillna(round(median_value)).astype(int)
+            stats['num_fill'][col] = round(data[col].median())
 
-        # Điền trung bình (mean) cho các cột không lệch 
+        # Điền trung bình (mean) cho các cột không lệch
         for col in mean_cols:
-            if col in data.columns:
-                mean_value = data[col].mean()
-                data[col] = data[col].fillna(round(mean_value)).astype(int)
+            stats['num_fill'][col] = round(data[col].mean())
 
     # Xử lý các cột chuỗi
-    no_fill = {
-        'History of Mental Illness': 'No',
-        'History of Substance Abuse': 'No',
-        'Family History of Depression': 'No',
-        'Chronic Medical Conditions': 'No',
-    }
     str_columns = data.select_dtypes(include=['object']).columns
     if not str_columns.empty:
-        # Điền 'No' với các cột chỉ có 'Yes' hoặc 'No' 
-        for col, fill_value in no_fill.items():
+        # Điền 'No' với các cột chỉ có 'Yes' hoặc 'No'
+        for col, fill_value in NO_FILL.items():
             if col in data.columns:
-                data[col] = data[col].fillna(fill_value)
+                stats['str_fill'][col] = fill_value
 
         # Điền giá trị xuất hiện nhiều lần nhất cho các cột chuỗi còn lại
-        other_cols = str_columns.difference(no_fill.keys())
+        other_cols = str_columns.difference(NO_FILL.keys())
         if not other_cols.empty:
             modes = data[other_cols].mode().iloc[0]  # Tìm giá trị xuất hiện nhiều lần nhất cho từng cột
-            data[other_cols] = data[other_cols].fillna(modes)
+            stats['str_fill'].update(modes.to_dict())
+
+    return stats
+
+def apply_fill_statistics(data: pd.DataFrame, stats: dict) -> pd.DataFrame:
+    """
+    Điền các giá trị thiếu trong DataFrame bằng các thống kê đã tính trước.
+    """
+    for col, fill_value in stats['num_fill'].items():
+        if col in data.columns:
+            data[col] = data[col].fillna(fill_value).astype(int)
+
+    for col, fill_value in stats['str_fill'].items():
+        if col in data.columns:
+            data[col] = data[col].fillna(fill_value)
 
     return data
 
+def fill_missing_values(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Điền các giá trị thiếu trong DataFrame.
+    """
+    return apply_fill_statistics(data, compute_fill_statistics(data))
+
 def predict_depression_risk(data: pd.DataFrame) -> pd.Series:
     """
     Dự đoán mức độ trầm cảm dựa trên các yếu tố liên quan trong dữ liệu.
@@ -101,41 +126,517 @@ def predict_depression_risk(data: pd.DataFrame) -> pd.Series:
     + Very Low: Điểm < 2
     """
 
-    # Tính điểm rủi ro cho các cột
-    risk_scores = np.zeros(len(data))
-
-    # Cập nhật điểm rủi ro cho các điều kiện
-    risk_scores += (data['Income'] < 20000).astype(int)
-    risk_scores += (data['Physical Activity Level'] == 'Sedentary').astype(int)
-    risk_scores += (data['Smoking Status'] == 'Current').astype(int)
-    risk_scores += (data['History of Mental Illness'] == 'Yes').astype(int)
-    risk_scores += (data['Chronic Medical Conditions'] == 'Yes').astype(int)
-    risk_scores += (data['Sleep Patterns'] == 'Poor').astype(int)
-    risk_scores += (data['Employment Status'] == 'Unemployed').astype(int)
-    risk_scores += (data['Alcohol Consumption'] == 'High').astype(int)
-    risk_scores += (data['Dietary Habits'] == 'Unhealthy').astype(int)
-    risk_scores += (data['History of Substance Abuse'] == 'Yes').astype(int)
-    risk_scores += (data['Family History of Depression'] == 'Yes').astype(int)
-
-    # Tạo cột nguy cơ trầm cảm (depression risk) dựa trên risk_scores
-    depression_risk = pd.Series(np.select(
-        [risk_scores >= 8, risk_scores >= 6, risk_scores >= 4, risk_scores >= 2], 
-        ['Very High', 'High', 'Medium', 'Low'], 
-        default='Very Low'
-    ))
+    # Tính điểm và phân loại trong một lượt bằng bộ tính điểm biên dịch từ bảng luật (risk_scoring.RULES, BANDS)
+    _, depression_risk = score_batch(data)
 
     return depression_risk
 
-# ----- Kết quả ----- 
+# ----- Chế độ xử lý theo từng khối (chunk) -----
+
+# Số dòng đọc mỗi lần khi xử lý file lớn
+CHUNK_SIZE = 100_000
+
+def _merge_moments(acc, values):
+    """
+    Gộp các moment (n, mean, M2, M3) của một khối giá trị vào bộ tích lũy (công thức song song của Pébay).
+    """
+    n_b = len(values)
+    if n_b == 0:
+        return acc
+    mean_b = values.mean()
+    centered = values - mean_b
+    m2_b = (centered ** 2).sum()
+    m3_b = (centered ** 3).sum()
+
+    n_a, mean_a, m2_a, m3_a = acc
+    if n_a == 0:
+        return (n_b, mean_b, m2_b, m3_b)
+
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    m3 = (m3_a + m3_b
+          + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+          + 3 * delta * (n_a * m2_b - n_b * m2_a) / n)
+    return (n, mean, m2, m3)
+
+def _skewness(moments):
+    """
+    Tính độ lệch (skewness) từ các moment, giống công thức của pandas.DataFrame.skew.
+    """
+    n, _, m2, m3 = moments
+    if n < 3:
+        return np.nan
+    # Loại bỏ sai số dấu phẩy động như pandas
+    m2 = 0 if abs(m2) < 1e-14 else m2
+    m3 = 0 if abs(m3) < 1e-14 else m3
+    if m2 == 0:
+        return 0.0
+    return (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+
+def _add_counts(counts, column, limit):
+    """
+    Cộng dồn số lần xuất hiện của từng giá trị trong cột vào danh sách đếm.
+    Các kết quả được gộp lại khi danh sách dài ra để bộ nhớ chỉ phụ thuộc vào số giá trị khác nhau.
+    :param limit: Số giá trị khác nhau tối đa được giữ trong bộ nhớ
+    :return: Bảng đếm đã gộp nếu số giá trị khác nhau vượt quá limit (danh sách được làm rỗng), ngược lại None
+    """
+    counts.append(column.value_counts())
+    if len(counts) >= 16 or sum(map(len, counts)) > limit:
+        counts[:] = [_merged_counts(counts)]
+        if len(counts[0]) > limit:
+            return counts.pop()
+    return None
 
-# Xử lý và làm sạch dữ liệu
-cleaned_data = remove_outliers(data)
-cleaned_data = fill_missing_values(cleaned_data)
+def _merged_counts(counts):
+    """
+    Gộp danh sách các bảng đếm thành một Series (giá trị -> số lần xuất hiện).
+    """
+    if not counts:
+        return pd.Series(dtype='int64')
+    return pd.concat(counts).groupby(level=0).sum()
+
+def _median_from_counts(counts):
+    """
+    Tính trung vị chính xác từ bảng đếm giá trị.
+    """
+    counts = counts.sort_index()
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    positions = counts.cumsum().to_numpy()
+    values = counts.index.to_numpy(dtype=float)
+    lower = values[np.searchsorted(positions, (total - 1) // 2, side='right')]
+    upper = values[np.searchsorted(positions, total // 2, side='right')]
+    return np.float64((lower + upper) / 2)
+
+def _mode_from_counts(counts):
+    """
+    Tìm giá trị xuất hiện nhiều lần nhất (nếu bằng nhau thì lấy giá trị nhỏ nhất, giống DataFrame.mode).
+    """
+    if counts.empty:
+        return np.nan
+    return sorted(counts.index[counts == counts.max()])[0]
+
+# Số bit của khóa được đếm trong mỗi lượt khi tìm trung vị bằng biểu đồ đếm (2**16 ngăn)
+MEDIAN_BUCKET_BITS = 16
+# Số file tạm (chia theo giá trị băm) khi bảng đếm giá trị phổ biến nhất được ghi ra đĩa
+MODE_PARTITIONS = 64
+
+def _sort_keys(values: np.ndarray) -> np.ndarray:
+    """
+    Đổi số thực float64 sang khóa uint64 cùng thứ tự, để chia ngăn chính xác (không có sai số làm tròn).
+    """
+    bits = values.astype(np.float64).view(np.uint64)
+    return np.where(bits >> np.uint64(63), ~bits, bits | np.uint64(1 << 63))
+
+def _from_sort_key(key) -> float:
+    """
+    Số thực ứng với một khóa của _sort_keys.
+    """
+    key = np.uint64(key)
+    bits = key & ~np.uint64(1 << 63) if key >> np.uint64(63) else ~key
+    return float(np.array([bits], dtype=np.uint64).view(np.float64)[0])
+
+def _bucket_histogram(keys, bits):
+    """
+    Biểu đồ đếm theo MEDIAN_BUCKET_BITS bit kế tiếp sau bits bit đầu của khóa.
+    """
+    shift = np.uint64(64 - bits - MEDIAN_BUCKET_BITS)
+    buckets = (keys >> shift) & np.uint64(2 ** MEDIAN_BUCKET_BITS - 1)
+    return np.bincount(buckets.astype(np.intp), minlength=2 ** MEDIAN_BUCKET_BITS)
+
+def _narrow(target, histogram):
+    """
+    Thu hẹp mục tiêu [vị trí trong ngăn, tiền tố khóa, số bit của tiền tố, số giá trị trong ngăn]
+    về ngăn con chứa vị trí đó, theo biểu đồ đếm của ngăn hiện tại.
+    """
+    rank, prefix, bits, _ = target
+    cumulative = np.cumsum(histogram)
+    bucket = int(np.searchsorted(cumulative, rank, side='right'))
+    if bucket:
+        rank -= int(cumulative[bucket - 1])
+    return [rank, (prefix << MEDIAN_BUCKET_BITS) | bucket, bits + MEDIAN_BUCKET_BITS, int(histogram[bucket])]
+
+def _medians_by_passes(file_path, chunksize, histograms, sizes) -> dict:
+    """
+    Trung vị chính xác của các cột có quá nhiều giá trị khác nhau để đếm trong bộ nhớ.
+    Từ biểu đồ đếm theo 16 bit cao của khóa (lượt 1), mỗi lượt đọc tiếp chỉ xét ngăn chứa vị trí trung vị:
+    đếm theo 16 bit kế tiếp, hoặc lấy hẳn các giá trị khi ngăn có không quá chunksize giá trị.
+    Bộ nhớ chỉ phụ thuộc vào chunksize; cần nhiều nhất 4 lượt đọc thêm.
+    :param histograms: {cột: biểu đồ đếm theo MEDIAN_BUCKET_BITS bit đầu của khóa}
+    :param sizes: {cột: số giá trị không thiếu}
+    :return: {cột: trung vị}
+    """
+    targets = {}
+    for col, histogram in histograms.items():
+        for rank in {(sizes[col] - 1) // 2, sizes[col] // 2}:
+            targets[(col, rank)] = _narrow([rank, 0, 0, 0], histogram)
+    found = {}
+
+    while True:
+        for key, (rank, prefix, bits, _) in list(targets.items()):
+            if bits == 64:
+                # Mọi giá trị trong ngăn bằng nhau
+                found[key] = _from_sort_key(prefix)
+                del targets[key]
+        if not targets:
+            break
+
+        partial = {key: (np.zeros(2 ** MEDIAN_BUCKET_BITS, dtype=np.int64) if size > chunksize else [])
+                   for key, (_, _, _, size) in targets.items()}
+        # Chỉ đọc các cột cần tìm; giá trị ngoài miền hợp lệ bị bỏ như remove_outliers
+        columns = sorted({col for col, _ in targets})
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=columns):
+            for (col, rank), (_, prefix, bits, _) in targets.items():
+                values = chunk[col].dropna()
+                if col in NUM_CONDITIONS:
+                    values = values[NUM_CONDITIONS[col](values)]
+                keys = _sort_keys(values.to_numpy(dtype=float))
+                keys = keys[(keys >> np.uint64(64 - bits)) == np.uint64(prefix)]
+                if isinstance(partial[(col, rank)], list):
+                    partial[(col, rank)].append(keys)
+                else:
+                    partial[(col, rank)] += _bucket_histogram(keys, bits)
+
+        for key, result in partial.items():
+            if isinstance(result, list):
+                found[key] = _from_sort_key(np.sort(np.concatenate(result))[targets[key][0]])
+                del targets[key]
+            else:
+                targets[key] = _narrow(targets[key], result)
+
+    return {col: np.float64((found[(col, (sizes[col] - 1) // 2)] + found[(col, sizes[col] // 2)]) / 2)
+            for col in histograms}
+
+class _SpilledCounts:
+    """
+    Bảng đếm giá trị ghi ra đĩa, chia thành MODE_PARTITIONS file theo giá trị băm: mỗi giá trị chỉ nằm trong
+    một file nên mỗi file được đếm riêng (bộ nhớ khoảng số giá trị khác nhau / MODE_PARTITIONS).
+    """
+
+    def __init__(self, folder, name):
+        self.paths = [os.path.join(folder, f'{name}.{part}.csv') for part in range(MODE_PARTITIONS)]
+
+    def add(self, counts: pd.Series):
+        parts = pd.util.hash_array(counts.index.to_numpy(dtype=object)) % MODE_PARTITIONS
+        for part, group in counts.groupby(parts):
+            with open(self.paths[part], 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(zip(group.index, group.to_numpy()))
+
+    def mode(self):
+        """Giá trị xuất hiện nhiều lần nhất (bằng nhau thì lấy giá trị nhỏ nhất, như _mode_from_counts)."""
+        best, best_count = np.nan, 0
+        for path in self.paths:
+            if not os.path.exists(path):
+                continue
+            part = pd.read_csv(path, header=None, names=['value', 'count'], dtype={'value': str}, na_filter=False,
+                               encoding='utf-8')
+            counts = part.groupby('value')['count'].sum()
+            value, count = _mode_from_counts(counts), counts.max()
+            if count > best_count or (count == best_count and value < best):
+                best, best_count = value, count
+        return best
+
+def collect_fill_statistics(file_path, chunksize=CHUNK_SIZE) -> dict:
+    """
+    Lượt đọc thứ nhất: duyệt file theo từng khối để tính độ lệch, trung vị/trung bình và giá trị phổ biến nhất.
+    Kết quả giống hệt compute_fill_statistics trên toàn bộ dữ liệu.
+    Bộ nhớ chỉ phụ thuộc vào chunksize: cột có hơn chunksize giá trị khác nhau (ví dụ Income, Name) không được
+    đếm trong bộ nhớ; trung vị được tìm bằng các lượt đọc thêm (_medians_by_passes), bảng đếm giá trị phổ biến
+    nhất được ghi ra file tạm (_SpilledCounts).
+    :param file_path: Đường dẫn file CSV gốc
+    :param chunksize: Số dòng mỗi khối
+    :return: dictionary thống kê dùng cho apply_fill_statistics
+    """
+    num_columns = []   # Cột số theo thứ tự xuất hiện
+    str_columns = []   # Cột chuỗi theo thứ tự xuất hiện
+    columns = set()
+    moments = {}
+    num_counts = {}    # None: quá nhiều giá trị khác nhau, trung vị tìm theo biểu đồ đếm
+    histograms = {}
+    str_counts = {}
+    spilled = {}
+    dtypes = {}
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            columns.update(chunk.columns)
+            # Kiểu dữ liệu gốc của cột số, để lượt 2 đọc các khối với cùng kiểu như khi đọc toàn bộ file
+            for col in chunk.select_dtypes(include=['number']).columns:
+                dtypes[col] = np.result_type(dtypes[col], chunk[col].dtype) if col in dtypes else chunk[col].dtype
+
+            chunk = remove_outliers(chunk)
+            for col in chunk.select_dtypes(include=['number']).columns:
+                if col not in moments:
+                    num_columns.append(col)
+                    moments[col] = (0, 0.0, 0.0, 0.0)
+                    num_counts[col] = []
+                    histograms[col] = np.zeros(2 ** MEDIAN_BUCKET_BITS, dtype=np.int64)
+                values = chunk[col].dropna()
+                moments[col] = _merge_moments(moments[col], values.to_numpy(dtype=float))
+                histograms[col] += _bucket_histogram(_sort_keys(values.to_numpy(dtype=float)), 0)
+                if num_counts[col] is not None and _add_counts(num_counts[col], values, chunksize) is not None:
+                    num_counts[col] = None
+            for col in chunk.select_dtypes(include=['object']).columns:
+                if col not in str_counts:
+                    str_columns.append(col)
+                    str_counts[col] = []
+                if col in NO_FILL:
+                    continue
+                if col in spilled:
+                    spilled[col].add(chunk[col].dropna().value_counts())
+                    continue
+                overflow = _add_counts(str_counts[col], chunk[col].dropna(), chunksize)
+                if overflow is not None:
+                    spilled[col] = _SpilledCounts(spill_dir, str(len(spilled)))
+                    spilled[col].add(overflow)
+
+        # Cột có giá trị chuỗi ở bất kỳ khối nào sẽ là cột chuỗi khi đọc toàn bộ file
+        num_columns = [col for col in num_columns if col not in str_counts]
+
+        stats = {'num_fill': {}, 'str_fill': {}, 'dtypes': {col: dtypes[col] for col in num_columns if col in dtypes}}
+        skewness = {col: abs(_skewness(moments[col])) for col in num_columns}
+        median_columns = [col for col in num_columns if skewness[col] > 1]
+        medians = _medians_by_passes(
+            file_path, chunksize,
+            {col: histograms[col] for col in median_columns if num_counts[col] is None and moments[col][0]},
+            {col: moments[col][0] for col in median_columns})
+        for col in median_columns:
+            if col in medians:
+                stats['num_fill'][col] = round(medians[col])
+            else:
+                stats['num_fill'][col] = round(_median_from_counts(_merged_counts(num_counts[col] or [])))
+        for col in num_columns:
+            if skewness[col] <= 1:
+                n, mean, _, _ = moments[col]
+                stats['num_fill'][col] = round(np.float64(mean) if n else np.nan)
+
+        if str_columns:
+            for col, fill_value in NO_FILL.items():
+                if col in columns:
+                    stats['str_fill'][col] = fill_value
+            for col in sorted(set(str_columns).difference(NO_FILL.keys())):
+                if col in spilled:
+                    stats['str_fill'][col] = spilled[col].mode()
+                else:
+                    stats['str_fill'][col] = _mode_from_counts(_merged_counts(str_counts[col]))
+
+    return stats
+
+def clean_chunk(chunk: pd.DataFrame, stats: dict) -> pd.DataFrame:
+    """
+    Làm sạch và dự đoán nguy cơ trầm cảm cho một khối dữ liệu bằng thống kê toàn cục.
+    """
+    chunk = remove_outliers(chunk)
+    chunk = apply_fill_statistics(chunk, stats)
+    chunk['Depression Risk'] = predict_depression_risk(chunk)
+    return chunk
+
+def clean_data_chunked(file_path, output_path, chunksize=CHUNK_SIZE) -> tuple:
+    """
+    Làm sạch dữ liệu theo chế độ streaming (hai lượt đọc), bộ nhớ chỉ phụ thuộc vào kích thước khối.
+    - Lượt 1: thu thập thống kê điền giá trị thiếu (collect_fill_statistics).
+    - Lượt 2: làm sạch, dự đoán và ghi nối tiếp từng khối vào file kết quả.
+    Kết quả ghi ra giống hệt khi xử lý toàn bộ dữ liệu trong bộ nhớ.
+    :return: Tuple (số dòng đã ghi, thống kê đã dùng)
+    """
+    stats = collect_fill_statistics(file_path, chunksize)
+
+    total_rows = 0
+    first_chunk = True
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=stats['dtypes']):
+        chunk = clean_chunk(chunk, stats)
+        chunk.to_csv(output_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+        first_chunk = False
+        total_rows += len(chunk)
+
+    return total_rows, stats
+
+# ----- Làm sạch dữ liệu -----
+
+def clean_data(file_path=INPUT_FILE, output_path=OUTPUT_FILE, chunksize=None) -> dict:
+    """
+    Đọc file gốc, làm sạch, dự đoán nguy cơ trầm cảm và lưu kết quả ra file mới.
+    :param file_path: Đường dẫn file CSV gốc
+    :param output_path: Đường dẫn file CSV kết quả
+    :param chunksize: Nếu khác None, xử lý theo từng khối (clean_data_chunked) thay vì đọc toàn bộ vào bộ nhớ
+    :return: Thống kê đã dùng để điền giá trị thiếu
+    """
+    if chunksize:
+        return clean_data_chunked(file_path, output_path, chunksize)[1]
+
+    data = pd.read_csv(file_path)
+
+    # Xử lý và làm sạch dữ liệu
+    cleaned_data = remove_outliers(data)
+    stats = compute_fill_statistics(cleaned_data)
+    cleaned_data = apply_fill_statistics(cleaned_data, stats)
+
+    # Tạo cột "Depression Risk" cho toàn bộ dữ liệu
+    cleaned_data['Depression Risk'] = predict_depression_risk(cleaned_data)
+
+    # Lưu dữ liệu đã làm sạch vào file mới
+    cleaned_data.to_csv(output_path, index=False)
+    return stats
+
+# ----- Chạy tăng dần (incremental) -----
+
+# Số byte dùng để nhận diện nội dung file (đầu file và đoạn trước vị trí đã xử lý)
+FINGERPRINT_BYTES = 64 * 1024
+# Kích thước khối khi băm toàn bộ file
+HASH_BLOCK_BYTES = 1024 * 1024
+
+def _state_path(output_path):
+    """
+    Đường dẫn file trạng thái của lần chạy trước, đặt cạnh file kết quả.
+    """
+    return output_path + '.state.json'
+
+def _fingerprint(file_path, offset):
+    """
+    Băm phần đầu file và đoạn ngay trước vị trí offset để nhận biết file chỉ được ghi thêm ở cuối.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(min(FINGERPRINT_BYTES, offset)))
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        digest.update(f.read(min(FINGERPRINT_BYTES, offset)))
+    return digest.hexdigest()
+
+def _prefix_digest(file_path, offset):
+    """
+    Băm toàn bộ offset byte đầu của file (đọc theo từng khối).
+    :return: Đối tượng hashlib (có thể update tiếp với phần được ghi thêm)
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        remaining = offset
+        while remaining > 0:
+            block = f.read(min(HASH_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+def _load_state(output_path):
+    """
+    Đọc trạng thái của lần chạy trước (None nếu chưa có).
+    """
+    try:
+        with open(_state_path(output_path), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _save_state(file_path, output_path, offset, rows, stats, columns, digest=None):
+    """
+    Lưu trạng thái sau khi xử lý: kích thước, thời gian sửa đổi, dấu vân tay, mã băm toàn bộ phần đã xử lý
+    và thống kê điền dữ liệu.
+    :param digest: Mã băm offset byte đầu nếu đã tính sẵn (mặc định: đọc lại file để tính)
+    """
+    file_stat = os.stat(file_path)
+    digest = digest or _prefix_digest(file_path, offset).hexdigest()
+    state = {
+        'input': os.path.abspath(file_path),
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'offset': offset,
+        'rows': rows,
+        'fingerprint': _fingerprint(file_path, offset),
+        'digest': digest,
+        'columns': list(columns),
+        'num_fill': {col: int(value) for col, value in stats['num_fill'].items()},
+        'str_fill': {col: (None if pd.isna(value) else value) for col, value in stats['str_fill'].items()},
+        'dtypes': {col: str(dtype) for col, dtype in stats.get('dtypes', {}).items()},
+    }
+    with open(_state_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def run_incremental(file_path=INPUT_FILE, output_path=OUTPUT_FILE, chunksize=CHUNK_SIZE, force=False):
+    """
+    Làm sạch dữ liệu có nhớ trạng thái:
+    - Bỏ qua nếu file gốc không thay đổi: cùng kích thước và thời gian sửa đổi, hoặc (khi thời gian sửa đổi
+      khác) mã băm toàn bộ nội dung vẫn như cũ.
+    - Nếu file gốc chỉ được ghi thêm dòng ở cuối (phần đã xử lý có mã băm không đổi), chỉ làm sạch các dòng mới
+      và ghi nối vào file kết quả.
+      Các dòng mới được điền giá trị thiếu bằng thống kê của lần chạy đầy đủ gần nhất.
+    - Các trường hợp còn lại (hoặc force=True): chạy lại toàn bộ theo từng khối.
+    :return: Tuple (trạng thái 'skipped' | 'appended' | 'full', số dòng đã xử lý)
+    """
+    state = _load_state(output_path)
+    file_stat = os.stat(file_path)
+    size = file_stat.st_size
+
+    unchanged = False
+    digest = None
+    if (not force and state is not None and os.path.exists(output_path)
+            and state['input'] == os.path.abspath(file_path)
+            and state['offset'] <= size
+            and _fingerprint(file_path, state['offset']) == state['fingerprint']):
+        unchanged = size == state['offset'] and file_stat.st_mtime_ns == state['mtime_ns']
+        if not unchanged:
+            # Dấu vân tay chỉ xét một phần file: sửa giữa file (cùng kích thước) chỉ phát hiện được khi băm toàn bộ
+            digest = _prefix_digest(file_path, state['offset'])
+            if digest.hexdigest() != state.get('digest'):
+                digest = None
+
+    if unchanged or digest is not None:
+        stats = {
+            'num_fill': state['num_fill'],
+            'str_fill': {col: (np.nan if value is None else value) for col, value in state['str_fill'].items()},
+            'dtypes': state['dtypes'],
+        }
+
+        if size == state['offset']:
+            # Nội dung không đổi (có thể chỉ đổi thời gian sửa đổi)
+            if not unchanged:
+                _save_state(file_path, output_path, state['offset'], state['rows'], stats, state['columns'],
+                            digest.hexdigest())
+            return 'skipped', 0
+
+        # Chỉ đọc phần được ghi thêm kể từ lần chạy trước
+        with open(file_path, 'rb') as f:
+            f.seek(state['offset'])
+            appended = f.read(size - state['offset'])
+        digest.update(appended)
+
+        new_rows = 0
+        reader = pd.read_csv(io.BytesIO(appended), header=None, names=state['columns'], chunksize=chunksize)
+        for chunk in reader:
+            chunk = clean_chunk(chunk, stats)
+            chunk.to_csv(output_path, mode='a', header=False, index=False)
+            new_rows += len(chunk)
+
+        _save_state(file_path, output_path, size, state['rows'] + new_rows, stats, state['columns'],
+                    digest.hexdigest())
+        return 'appended', new_rows
+
+    rows, stats = clean_data_chunked(file_path, output_path, chunksize)
+    columns = pd.read_csv(file_path, nrows=0).columns
+    _save_state(file_path, output_path, size, rows, stats, columns)
+    return 'full', rows
+
+def main(argv=None):
+    """
+    Chạy làm sạch dữ liệu từ dòng lệnh.
+    """
+    parser = argparse.ArgumentParser(description="Làm sạch dữ liệu và dự đoán nguy cơ trầm cảm.")
+    parser.add_argument('input', nargs='?', default=INPUT_FILE, help="File CSV gốc")
+    parser.add_argument('output', nargs='?', default=OUTPUT_FILE, help="File CSV kết quả")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Số dòng mỗi khối")
+    parser.add_argument('--full', action='store_true', help="Bỏ qua trạng thái cũ và làm sạch lại toàn bộ")
+    args = parser.parse_args(argv)
 
-# Tạo cột "Depression Risk" cho toàn bộ dữ liệu
-cleaned_data['Depression Risk'] = predict_depression_risk(cleaned_data)
-#cleaned_data['Depression Risk'] = predict_depression_risk(cleaned_data)
+    status, rows = run_incremental(args.input, args.output, args.chunksize, force=args.full)
+    if status == 'skipped':
+        print(f"File '{args.input}' không thay đổi, bỏ qua.")
+    elif status == 'appended':
+        print(f"Đã làm sạch {rows} dòng mới và ghi nối vào '{args.output}'.")
+    else:
+        print(f"Đã làm sạch {rows} dòng và lưu vào '{args.output}'.")
 
-# Lưu dữ liệu đã làm sạch vào file mới
-output_path = 'dataset\\cleaned_and_predicted_data.csv'
-cleaned_data.to_csv(output_path, index=False)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+import pandas as pd
+from indexes import dataset_version, high_risk_view, HIGH_RISK_LEVELS
+from cube import contingency_cube, ContingencyCube
+
+# Bộ nhớ tối đa (byte) cho các khung nhìn dẫn xuất được lưu lại
+VIEW_MEMORY_BUDGET = 256 * 2**20
+
+def high_risk_rows(data: pd.DataFrame) -> pd.DataFrame:
+    """Các dòng có nguy cơ trầm cảm cao, lấy từ khung nhìn được duy trì tăng dần (không ghi ra file)."""
+    return high_risk_view(data).rows(data)
+
+def high_risk_cube(data: pd.DataFrame) -> ContingencyCube:
+    """Khối đếm của các dòng nguy cơ cao, lấy từ khối đếm của toàn bộ dữ liệu (không duyệt lại các dòng)."""
+    return contingency_cube(data).restrict(HIGH_RISK_LEVELS)
+
+# Các khung nhìn dẫn xuất có sẵn: tên -> hàm tạo từ DataFrame
+VIEWS = {
+    'high_risk': high_risk_rows,
+    'cube': contingency_cube,
+    'high_risk_cube': high_risk_cube,
+}
+
+def _memory_size(value) -> int:
+    """Ước tính bộ nhớ (byte) của một khung nhìn."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, ContingencyCube):
+        return sum(counts.nbytes for counts in value.counts.values())
+    return sys.getsizeof(value)
+
+class DatasetRegistry:
+    """
+    Nơi giữ các DataFrame đang dùng theo tên (ví dụ 'main' là dữ liệu trên Treeview) và các khung nhìn dẫn xuất.
+    - Khung nhìn (tập con nguy cơ cao, khối đếm...) chỉ được tính khi cần và được lưu lại theo phiên bản dữ liệu
+      (indexes.dataset_version), nên tự hết hiệu lực sau mỗi thao tác crud.
+    - Tổng bộ nhớ của các khung nhìn được giới hạn bởi memory_budget; khung nhìn ít dùng gần đây nhất bị loại trước.
+    An toàn khi dùng từ nhiều luồng (các khung nhìn thường được tính ở luồng nền).
+    """
+
+    def __init__(self, memory_budget=VIEW_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.frames = {}
+        self.views = OrderedDict()
+        self.memory = 0
+        self.lock = threading.RLock()
+
+    def set(self, name, data: pd.DataFrame):
+        """Đặt DataFrame cho tên name (các khung nhìn của DataFrame cũ bị bỏ)."""
+        with self.lock:
+            if self.frames.get(name) is not data:
+                self._drop(name)
+            self.frames[name] = data
+
+    def get(self, name) -> pd.DataFrame:
+        """DataFrame của tên name."""
+        try:
+            return self.frames[name]
+        except KeyError:
+            raise ValueError(f"Dữ liệu '{name}' chưa được nạp.")
+
+    def _drop(self, name):
+        for key in [key for key in self.views if key[0] == name]:
+            self.memory -= self.views.pop(key)[3]
+
+    def view(self, name, view, builder=None):
+        """
+        Khung nhìn dẫn xuất view của dữ liệu name, tính bằng builder(data) (mặc định: VIEWS[view]) nếu chưa có
+        hoặc dữ liệu đã thay đổi.
+        """
+        builder = builder or VIEWS[view]
+        key = (name, view)
+        with self.lock:
+            data = self.get(name)
+            version = dataset_version(data)
+            entry = self.views.get(key)
+            if entry is not None and entry[0]() is data and entry[1] == version:
+                self.views.move_to_end(key)
+                return entry[2]
+
+        value = builder(data)
+        size = _memory_size(value)
+        with self.lock:
+            # Chỉ lưu nếu dữ liệu không thay đổi trong lúc tính
+            if self.frames.get(name) is data and dataset_version(data) == version:
+                old = self.views.pop(key, None)
+                if old is not None:
+                    self.memory -= old[3]
+                self.views[key] = (weakref.ref(data), version, value, size)
+                self.memory += size
+                while self.memory > self.memory_budget and len(self.views) > 1:
+                    self.memory -= self.views.popitem(last=False)[1][3]
+        return value
+
+    def stats(self) -> dict:
+        """Số khung nhìn đang lưu và bộ nhớ ước tính (byte)."""
+        with self.lock:
+            return {'views': len(self.views), 'memory': self.memory}
+
+# Nơi giữ dữ liệu dùng chung cho giao diện
+datasets = DatasetRegistry()
@@ -0,0 +1,108 @@
+import pandas as pd
+from indexes import get_index
+from crud import insert_records, delete_records, set_values
+
+class EditHistory:
+    """
+    Lịch sử thay đổi của một DataFrame dạng nhật ký delta, dùng cho hoàn tác/làm lại và khôi phục.
+    - Được đăng ký như một chỉ mục (indexes.get_index) nên nhận mọi thao tác thêm/xóa/sửa qua crud
+      và đi theo DataFrame mới sau mỗi thao tác.
+    - Mỗi bước chỉ lưu các dòng được thêm/xóa (kèm vị trí) hoặc giá trị cũ/mới của các ô được sửa,
+      nên bộ nhớ tỉ lệ với số thay đổi, không phụ thuộc kích thước dữ liệu.
+    - Điểm lưu (save) chỉ là một vị trí trong nhật ký, không sao chép dữ liệu.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.undo_steps = []
+        self.redo_steps = []
+        self.saved = 0          # Số bước hoàn tác tại điểm lưu (None: không còn quay lại được)
+        self.replaying = False  # Đang hoàn tác/làm lại: không ghi nhận thành bước mới
+
+    def _record(self, step):
+        if self.replaying:
+            return
+        if self.saved is not None and self.saved > len(self.undo_steps):
+            # Điểm lưu nằm trong các bước làm lại sắp bị bỏ
+            self.saved = None
+        self.undo_steps.append(step)
+        self.redo_steps.clear()
+
+    def on_insert(self, data, row_ids):
+        positions = data.index.get_indexer(row_ids)
+        self._record(('insert', data.take(positions), positions))
+
+    def on_delete(self, data, row_ids):
+        positions = data.index.get_indexer(row_ids)
+        self._record(('delete', data.take(positions), positions))
+
+    def on_update(self, data, row_id, old_values, new_values):
+        self._record(('update', row_id, dict(old_values), dict(new_values)))
+
+    def _apply(self, data, step, reverse):
+        """
+        Thực hiện lại (reverse=False) hoặc đảo ngược (reverse=True) một bước qua crud.
+        """
+        self.replaying = True
+        try:
+            kind = step[0]
+            if kind == 'update':
+                _, row_id, old_values, new_values = step
+                set_values(data, row_id, old_values if reverse else new_values)
+            elif (kind == 'insert') == reverse:
+                data = delete_records(data, list(step[1].index))
+            else:
+                data = insert_records(data, step[1], step[2])
+        finally:
+            self.replaying = False
+        return data
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def undo(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Hoàn tác thay đổi gần nhất (chỉ các dòng/ô liên quan).
+        :return: DataFrame sau khi hoàn tác
+        """
+        if not self.undo_steps:
+            raise ValueError("Không có thay đổi nào để hoàn tác.")
+        data = self._apply(data, self.undo_steps[-1], reverse=True)
+        self.redo_steps.append(self.undo_steps.pop())
+        return data
+
+    def redo(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Làm lại thay đổi vừa được hoàn tác.
+        :return: DataFrame sau khi làm lại
+        """
+        if not self.redo_steps:
+            raise ValueError("Không có thay đổi nào để làm lại.")
+        data = self._apply(data, self.redo_steps[-1], reverse=False)
+        self.undo_steps.append(self.redo_steps.pop())
+        return data
+
+    def save(self):
+        """Đánh dấu trạng thái hiện tại làm điểm khôi phục."""
+        self.saved = len(self.undo_steps)
+
+    def restore(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Đưa dữ liệu về điểm lưu gần nhất bằng cách hoàn tác (hoặc làm lại) từng bước.
+        :return: DataFrame sau khi khôi phục
+        """
+        if self.saved is None:
+            raise ValueError("Điểm lưu đã bị thay thế bởi các thay đổi mới, không thể khôi phục.")
+        while len(self.undo_steps) > self.saved:
+            data = self.undo(data)
+        while len(self.undo_steps) < self.saved:
+            data = self.redo(data)
+        return data
+
+def edit_history(data: pd.DataFrame) -> EditHistory:
+    """
+    Lịch sử thay đổi của DataFrame; chỉ các thay đổi sau lần gọi đầu tiên được ghi nhận.
+    """
+    return get_index(data, 'history', EditHistory)
@@ -0,0 +1,197 @@
+import threading
+import weakref
+import pandas as pd
+
+# Các chỉ mục gắn với từng DataFrame: id(DataFrame) -> _Entry
+_entries = {}
+# Khóa của _entries và các chỉ mục: crud (luồng Tk) cập nhật chỉ mục trong khi các tác vụ nền đọc/xây dựng chỉ mục.
+# Các chỉ mục ở module khác (ví dụ sort_index) dùng khóa này khi thay thế/đọc trạng thái của mình.
+lock = threading.RLock()
+
+class _Entry:
+    """
+    Các chỉ mục và số phiên bản của một DataFrame.
+    """
+    def __init__(self, data):
+        self.version = 0
+        self.indexes = {}
+        self.finalizer = weakref.finalize(data, _entries.pop, id(data), None)
+
+def _entry(data: pd.DataFrame) -> _Entry:
+    """
+    Lấy (hoặc tạo) thông tin chỉ mục của DataFrame.
+    """
+    with lock:
+        entry = _entries.get(id(data))
+        if entry is None:
+            entry = _entries[id(data)] = _Entry(data)
+        return entry
+
+def dataset_version(data: pd.DataFrame) -> int:
+    """
+    Số phiên bản của DataFrame, tăng lên sau mỗi thao tác ghi thông qua crud.
+    """
+    return _entry(data).version
+
+def get_index(data: pd.DataFrame, name, builder):
+    """
+    Lấy chỉ mục tên name của DataFrame, xây dựng bằng builder(data) ở lần dùng đầu tiên.
+    Việc xây dựng chạy ngoài khóa (có thể ở luồng nền); chỉ mục chỉ được lưu nếu dữ liệu không thay đổi trong lúc đó.
+    """
+    with lock:
+        entry = _entry(data)
+        index = entry.indexes.get(name)
+        version = entry.version
+    if index is None:
+        index = builder(data)
+        with lock:
+            if _entries.get(id(data)) is entry and entry.version == version:
+                index = entry.indexes.setdefault(name, index)
+    return index
+
+def _transfer(old: pd.DataFrame, new: pd.DataFrame) -> _Entry:
+    """
+    Chuyển các chỉ mục từ DataFrame cũ sang DataFrame mới (sau thao tác thêm/xóa trả về DataFrame mới).
+    """
+    if old is new:
+        return _entry(new)
+    with lock:
+        entry = _entries.pop(id(old), None)
+        if entry is None:
+            return _entry(new)
+        entry.finalizer.detach()
+        entry.finalizer = weakref.finalize(new, _entries.pop, id(new), None)
+        _entries[id(new)] = entry
+        return entry
+
+def notify_insert(old: pd.DataFrame, new: pd.DataFrame, row_ids):
+    """
+    Cập nhật các chỉ mục sau khi thêm các dòng row_ids (new là DataFrame sau khi thêm).
+    """
+    with lock:
+        entry = _transfer(old, new)
+        entry.version += 1
+        for index in list(entry.indexes.values()):
+            index.on_insert(new, row_ids)
+
+def notify_delete(old: pd.DataFrame, new: pd.DataFrame, row_ids):
+    """
+    Cập nhật các chỉ mục sau khi xóa các dòng row_ids (old là DataFrame trước khi xóa).
+    """
+    with lock:
+        entry = _transfer(old, new)
+        entry.version += 1
+        for index in list(entry.indexes.values()):
+            index.on_delete(old, row_ids)
+
+def notify_update(data: pd.DataFrame, row_id, old_values, new_values):
+    """
+    Cập nhật các chỉ mục sau khi sửa các ô của dòng row_id.
+    :param old_values: Giá trị cũ {cột: giá trị}
+    :param new_values: Giá trị mới {cột: giá trị}
+    """
+    with lock:
+        entry = _entry(data)
+        entry.version += 1
+        for index in list(entry.indexes.values()):
+            index.on_update(data, row_id, old_values, new_values)
+
+class NameIndex:
+    """
+    Chỉ mục băm từ Name đến danh sách mã dòng (một tên có thể xuất hiện ở nhiều dòng).
+    Tra cứu theo tên là O(1); tra cứu mã dòng -> vị trí dùng bảng băm của data.index.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.rows = {}
+        if 'Name' in data.columns and len(data):
+            labels = data.index.to_numpy()
+            groups = data.groupby('Name', sort=False, observed=True).indices
+            self.rows = {name: labels[positions].tolist() for name, positions in groups.items()}
+
+    def lookup(self, name):
+        """Danh sách mã dòng có Name bằng name (rỗng nếu không có)."""
+        return self.rows.get(name, [])
+
+    def _add(self, name, row_id):
+        if not pd.isna(name):
+            self.rows.setdefault(name, []).append(row_id)
+
+    def _remove(self, name, row_id):
+        ids = self.rows.get(name)
+        if ids is not None:
+            ids.remove(row_id)
+            if not ids:
+                del self.rows[name]
+
+    def on_insert(self, data, row_ids):
+        for row_id in row_ids:
+            self._add(data.at[row_id, 'Name'], row_id)
+
+    def on_delete(self, data, row_ids):
+        for row_id in row_ids:
+            self._remove(data.at[row_id, 'Name'], row_id)
+
+    def on_update(self, data, row_id, old_values, new_values):
+        if 'Name' in new_values and old_values.get('Name') != new_values['Name']:
+            self._remove(old_values.get('Name'), row_id)
+            self._add(new_values['Name'], row_id)
+
+def name_index(data: pd.DataFrame) -> NameIndex:
+    """
+    Chỉ mục Name của DataFrame (xây dựng một lần, sau đó được crud cập nhật tăng dần).
+    """
+    return get_index(data, 'name', NameIndex)
+
+def locate(data: pd.DataFrame, row_id) -> int:
+    """
+    Vị trí (số thứ tự dòng) của mã dòng row_id trong DataFrame.
+    """
+    return data.index.get_loc(row_id)
+
+# Các mức độ nguy cơ trầm cảm cao
+HIGH_RISK_LEVELS = ['High', 'Very High']
+
+class HighRiskView:
+    """
+    Khung nhìn các dòng có nguy cơ trầm cảm cao: tập mã dòng trong bộ nhớ,
+    được cập nhật theo phần thay đổi qua các thao tác crud (mỗi thao tác O(số dòng thay đổi)).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.row_ids = set()
+        if 'Depression Risk' in data.columns:
+            mask = data['Depression Risk'].isin(HIGH_RISK_LEVELS).to_numpy()
+            self.row_ids = set(data.index[mask].tolist())
+
+    def rows(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Các dòng nguy cơ cao theo thứ tự trong data (không duyệt toàn bộ cột Depression Risk)."""
+        positions = data.index.get_indexer(list(self.row_ids))
+        positions.sort()
+        return data.take(positions[positions >= 0])
+
+    def rebuild(self, data: pd.DataFrame):
+        """Tính lại tập mã dòng từ đầu."""
+        self.__init__(data)
+
+    @staticmethod
+    def _is_high(value):
+        return not pd.isna(value) and value in HIGH_RISK_LEVELS
+
+    def on_insert(self, data, row_ids):
+        self.row_ids.update(row_id for row_id in row_ids if self._is_high(data.at[row_id, 'Depression Risk']))
+
+    def on_delete(self, data, row_ids):
+        self.row_ids.difference_update(row_ids)
+
+    def on_update(self, data, row_id, old_values, new_values):
+        if self._is_high(data.at[row_id, 'Depression Risk']):
+            self.row_ids.add(row_id)
+        else:
+            self.row_ids.discard(row_id)
+
+def high_risk_view(data: pd.DataFrame) -> HighRiskView:
+    """
+    Khung nhìn các dòng nguy cơ cao của DataFrame (xây dựng một lần, sau đó được crud cập nhật tăng dần).
+    """
+    return get_index(data, 'high_risk', HighRiskView)
@@ -0,0 +1,350 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from schema import apply_schema, read_dataset
+
+# Số thao tác tối thiểu trong nhật ký trước khi nên gộp vào file gốc
+COMPACT_MIN_OPS = 1000
+# Nên gộp khi số thao tác vượt quá tỉ lệ này so với số dòng của file gốc
+COMPACT_RATIO = 0.1
+
+# Trạng thái nhật ký theo từng file: mã dòng tiếp theo, số thao tác, số dòng file gốc
+_state = {}
+# Khóa của file gốc và nhật ký: compact chạy ở luồng nền trong khi luồng Tk ghi nối nhật ký
+_lock = threading.RLock()
+# Các file đang được gộp nhật ký
+_compacting = set()
+
+def journal_path(csv_path):
+    """
+    Đường dẫn file nhật ký thay đổi (JSON lines) đặt cạnh file CSV.
+    """
+    return csv_path + '.journal'
+
+def ids_path(csv_path):
+    """
+    Đường dẫn file lưu mã dòng của file gốc sau khi gộp nhật ký.
+    """
+    return csv_path + '.ids.npy'
+
+def _base_signature(csv_path):
+    """
+    Kích thước và thời gian sửa đổi của file gốc tại thời điểm bắt đầu nhật ký.
+    """
+    file_stat = os.stat(csv_path)
+    return {'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns}
+
+def to_json_value(value):
+    """
+    Chuyển giá trị numpy/pandas sang kiểu JSON (NaN -> None).
+    """
+    if pd.isna(value):
+        return None
+    if isinstance(value, np.floating) and value.dtype.itemsize < 8:
+        # Số thực float32 (theo schema): dùng biểu diễn ngắn nhất thay vì mở rộng nhị phân (199999.98, không phải 199999.984375)
+        return float(str(value))
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def _read_journal(csv_path):
+    """
+    Đọc nhật ký: trả về (dòng tiêu đề, danh sách thao tác) hoặc (None, []) nếu chưa có.
+    """
+    try:
+        with open(journal_path(csv_path), encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None, []
+    if not lines or lines[0].get('op') != 'base':
+        return None, lines
+    return lines[0], lines[1:]
+
+def _write_header(csv_path, has_ids):
+    """
+    Tạo nhật ký mới chỉ gồm dòng tiêu đề ghi lại chữ ký của file gốc hiện tại.
+    """
+    header = {'op': 'base', 'ids': has_ids, **_base_signature(csv_path)}
+    with open(journal_path(csv_path), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header) + '\n')
+
+def _restored_row(base: pd.Series, row):
+    """
+    Giá trị của một dòng gốc được thêm lại (hoàn tác xóa): số thực chỉ khác giá trị trong file gốc
+    do làm tròn float32 (giá trị được ghi từ DataFrame theo schema) lấy lại giá trị đầy đủ của file gốc.
+    """
+    for col, value in row.items():
+        old = base.get(col)
+        if not isinstance(value, float) or pd.isna(old):
+            continue
+        try:
+            if np.float32(value) == np.float32(float(old)):
+                row[col] = old
+        except ValueError:
+            pass
+    return row
+
+def _csv_text(value):
+    """
+    Giá trị JSON trong nhật ký dưới dạng chuỗi trong file CSV (None -> ô trống).
+    """
+    return '' if value is None else str(value)
+
+def replay(data: pd.DataFrame, ops, raw=False) -> pd.DataFrame:
+    """
+    Áp dụng lần lượt các thao tác thêm/sửa/xóa trong nhật ký lên DataFrame của file gốc.
+    Dòng thêm mới nằm cuối dữ liệu, trừ khi thao tác có 'position' (ví dụ hoàn tác xóa đưa dòng về vị trí cũ);
+    thứ tự dòng chỉ được theo dõi từ thao tác có 'position' đầu tiên.
+    :param raw: data là file gốc đọc dạng chuỗi (xem compact): giá trị được ghi dạng chuỗi, không áp dụng schema
+    """
+    def value_of(value):
+        if raw:
+            return _csv_text(value)
+        return np.nan if value is None else value
+
+    inserted = {}
+    deleted = set()
+    order = None  # Thứ tự mã dòng hiện tại (None: file gốc rồi đến các dòng thêm mới)
+    for op in ops:
+        if op['op'] == 'insert':
+            row_id, row = op['id'], dict(op['row'])
+            if row_id in deleted and row_id in data.index:
+                row = _restored_row(data.loc[row_id], row)
+            if raw:
+                row = {col: value_of(value) for col, value in row.items()}
+            if order is None and 'position' in op:
+                order = [label for label in data.index if label not in deleted] + list(inserted)
+            inserted[row_id] = row
+            if order is not None:
+                order.insert(op.get('position', len(order)), row_id)
+        elif op['op'] == 'update':
+            if op['id'] in inserted:
+                inserted[op['id']].update({col: value_of(value) for col, value in op['values'].items()})
+            else:
+                for col, value in op['values'].items():
+                    data.at[op['id'], col] = value_of(value)
+        elif op['op'] == 'delete':
+            for row_id in op['ids']:
+                if inserted.pop(row_id, None) is None:
+                    deleted.add(row_id)
+            if order is not None:
+                removed = set(op['ids'])
+                order = [label for label in order if label not in removed]
+
+    if deleted:
+        data = data.drop(list(deleted), errors='ignore')
+    if inserted:
+        new_data = pd.DataFrame(list(inserted.values()), index=list(inserted.keys()))
+        if not raw:
+            new_data = apply_schema(new_data)
+        data = pd.concat([data, new_data]) if not data.empty else new_data
+    if order is not None:
+        data = data.loc[order]
+    return data
+
+def _matches_base(csv_path, header) -> bool:
+    """
+    Nhật ký có tiêu đề header được ghi cho file gốc hiện tại hay không.
+    """
+    return header is not None and {k: header[k] for k in ('size', 'mtime_ns')} == _base_signature(csv_path)
+
+def _set_ids(csv_path, header, data: pd.DataFrame):
+    """
+    Gán mã dòng đã lưu (file .ids.npy) cho DataFrame của file gốc.
+    """
+    if header.get('ids'):
+        ids = np.load(ids_path(csv_path))
+        if len(ids) == len(data):
+            data.index = pd.Index(ids)
+
+def load(csv_path, report=False) -> pd.DataFrame:
+    """
+    Đọc file gốc và áp dụng nhật ký thay đổi. Chỉ số (index) của DataFrame là mã dòng ổn định.
+    Nhật ký không khớp với file gốc (file gốc đã bị ghi lại bên ngoài) sẽ được đổi tên thành '.stale' và bỏ qua.
+    """
+    with _lock:
+        return _load(csv_path, report)
+
+def _load(csv_path, report):
+    data = read_dataset(csv_path, report=report)
+    header, ops = _read_journal(csv_path)
+
+    if _matches_base(csv_path, header):
+        _set_ids(csv_path, header, data)
+        data = replay(data, ops)
+    else:
+        if os.path.exists(journal_path(csv_path)):
+            os.replace(journal_path(csv_path), journal_path(csv_path) + '.stale')
+            print(f"Nhật ký của '{csv_path}' không khớp với file gốc, đã bỏ qua.")
+        if os.path.exists(ids_path(csv_path)):
+            os.remove(ids_path(csv_path))
+        ops = []
+
+    max_id = max([int(data.index.max()) if len(data) else -1]
+                 + [op['id'] for op in ops if op['op'] == 'insert'])
+    _state[csv_path] = {'next_id': max_id + 1, 'ops': len(ops), 'rows': len(data)}
+    return data
+
+def preview(csv_path, rows) -> pd.DataFrame:
+    """
+    Đọc nhanh rows dòng đầu của dữ liệu (ví dụ để hiển thị trang đầu trong lúc dữ liệu đầy đủ đang được đọc).
+    Các thao tác sửa/xóa trong nhật ký được áp dụng như replay; dòng thêm mới (nằm cuối dữ liệu) bị bỏ qua.
+    Nếu nhật ký có dòng được thêm lại vào giữa dữ liệu ('position'), đọc toàn bộ như load.
+    """
+    header, ops = _read_journal(csv_path)
+    if not _matches_base(csv_path, header):
+        return apply_schema(pd.read_csv(csv_path, nrows=rows))
+    if any('position' in op for op in ops):
+        return load(csv_path).head(rows)
+
+    inserted = set()
+    deleted = set()
+    for op in ops:
+        if op['op'] == 'insert':
+            inserted.add(op['id'])
+        elif op['op'] == 'delete':
+            for row_id in op['ids']:
+                if row_id in inserted:
+                    inserted.discard(row_id)
+                else:
+                    deleted.add(row_id)
+
+    # Đọc thêm số dòng đã xóa để vẫn đủ rows dòng còn lại
+    data = apply_schema(pd.read_csv(csv_path, nrows=rows + len(deleted)))
+    if header.get('ids'):
+        ids = np.load(ids_path(csv_path), mmap_mode='r')
+        if len(ids) >= len(data):
+            data.index = pd.Index(np.asarray(ids[:len(data)]))
+    data = data.drop([row_id for row_id in deleted if row_id in data.index]).head(rows)
+
+    for op in ops:
+        if op['op'] == 'update' and op['id'] in data.index and op['id'] not in inserted:
+            for col, value in op['values'].items():
+                data.at[op['id'], col] = np.nan if value is None else value
+    return data
+
+def next_row_id(csv_path, data: pd.DataFrame) -> int:
+    """
+    Cấp mã dòng mới, không trùng với các mã đã dùng trong file gốc và nhật ký.
+    """
+    state = _state.setdefault(csv_path, {'next_id': 0, 'ops': 0, 'rows': len(data)})
+    row_id = max(state['next_id'], int(data.index.max()) + 1 if len(data) else 0)
+    state['next_id'] = row_id + 1
+    return row_id
+
+def _write_ops(csv_path, ops):
+    with open(journal_path(csv_path), 'a', encoding='utf-8') as f:
+        for op in ops:
+            f.write(json.dumps(op, ensure_ascii=False) + '\n')
+
+def append(csv_path, ops):
+    """
+    Ghi nối các thao tác vào cuối nhật ký (chi phí không phụ thuộc kích thước dữ liệu).
+    Nhật ký không được gộp ở đây; xem needs_compaction và compact.
+    :param ops: Danh sách thao tác dạng {'op': 'insert'|'update'|'delete', ...}
+    """
+    with _lock:
+        if not os.path.exists(journal_path(csv_path)):
+            _write_header(csv_path, has_ids=False)
+        _write_ops(csv_path, ops)
+        state = _state.setdefault(csv_path, {'next_id': 0, 'ops': 0, 'rows': 0})
+        state['ops'] += len(ops)
+
+def needs_compaction(csv_path) -> bool:
+    """
+    Nhật ký đã đủ dài (so với file gốc) để nên gộp vào file gốc bằng compact.
+    """
+    state = _state.get(csv_path)
+    return state is not None and state['ops'] >= max(COMPACT_MIN_OPS, COMPACT_RATIO * state['rows'])
+
+def log_insert(csv_path, row_id, row):
+    """
+    Ghi nhận thao tác thêm một dòng với mã dòng row_id.
+    """
+    append(csv_path, [{'op': 'insert', 'id': int(row_id), 'row': {col: to_json_value(v) for col, v in row.items()}}])
+
+def log_inserts(csv_path, rows, positions=None):
+    """
+    Ghi nhận nhiều thao tác thêm dòng trong một lần ghi.
+    :param rows: Danh sách (row_id, {cột: giá trị})
+    :param positions: Vị trí của từng dòng trong dữ liệu sau khi thêm (mặc định: cuối dữ liệu)
+    """
+    ops = [
+        {'op': 'insert', 'id': int(row_id), 'row': {col: to_json_value(v) for col, v in row.items()}}
+        for row_id, row in rows
+    ]
+    if positions is not None:
+        # Thêm lần lượt theo vị trí tăng dần thì mỗi dòng nằm đúng vị trí cuối cùng của nó
+        for op, position in zip(ops, positions):
+            op['position'] = int(position)
+        ops.sort(key=lambda op: op['position'])
+    append(csv_path, ops)
+
+def log_update(csv_path, row_id, values):
+    """
+    Ghi nhận thao tác cập nhật các ô của dòng row_id.
+    """
+    append(csv_path, [{'op': 'update', 'id': int(row_id), 'values': {col: to_json_value(v) for col, v in values.items()}}])
+
+def log_updates(csv_path, updates):
+    """
+    Ghi nhận nhiều thao tác cập nhật trong một lần ghi.
+    :param updates: Danh sách (row_id, {cột: giá trị})
+    """
+    append(csv_path, [
+        {'op': 'update', 'id': int(row_id), 'values': {col: to_json_value(v) for col, v in values.items()}}
+        for row_id, values in updates
+    ])
+
+def log_delete(csv_path, row_ids):
+    """
+    Ghi nhận thao tác xóa các dòng.
+    """
+    append(csv_path, [{'op': 'delete', 'ids': [int(row_id) for row_id in row_ids]}])
+
+def compact(csv_path):
+    """
+    Gộp nhật ký vào file gốc: ghi lại file CSV một lần và bắt đầu nhật ký mới.
+    Mã dòng được giữ nguyên (lưu trong file .ids.npy) để các DataFrame đang mở vẫn dùng được.
+    File gốc được đọc dạng chuỗi (không theo schema) nên các ô không bị sửa, kể cả giá trị ngoài miền hợp lệ
+    hoặc số thực đầy đủ độ chính xác, được ghi lại y nguyên.
+    Có thể chạy ở luồng nền: việc đọc và ghi file tạm chạy ngoài khóa, các thao tác được ghi nối trong lúc đó
+    được giữ lại trong nhật ký mới.
+    """
+    with _lock:
+        header, ops = _read_journal(csv_path)
+        if csv_path in _compacting or not _matches_base(csv_path, header):
+            return
+        _compacting.add(csv_path)
+    temp_path = csv_path + '.compact'
+    try:
+        data = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        _set_ids(csv_path, header, data)
+        data = replay(data, ops, raw=True)
+        data.to_csv(temp_path, index=False)
+
+        with _lock:
+            current_header, current = _read_journal(csv_path)
+            if current_header != header or not _matches_base(csv_path, header):
+                # File gốc đã bị ghi lại trong lúc gộp (ví dụ làm sạch dữ liệu): bỏ kết quả gộp
+                return
+            os.replace(temp_path, csv_path)
+            has_ids = not data.index.equals(pd.RangeIndex(len(data)))
+            if has_ids:
+                np.save(ids_path(csv_path), data.index.to_numpy(dtype=np.int64))
+            elif os.path.exists(ids_path(csv_path)):
+                os.remove(ids_path(csv_path))
+            _write_header(csv_path, has_ids)
+            _write_ops(csv_path, current[len(ops):])
+
+            state = _state.setdefault(csv_path, {'next_id': 0, 'ops': 0, 'rows': 0})
+            max_id = max([int(data.index.max()) if len(data) else -1]
+                         + [op['id'] for op in current if op['op'] == 'insert'])
+            state.update(next_id=max(state['next_id'], max_id + 1), ops=len(current) - len(ops), rows=len(data))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        with _lock:
+            _compacting.discard(csv_path)
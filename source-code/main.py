@@ -1,56 +1,82 @@
+import time
+import argparse
+# Thời điểm bắt đầu chạy, dùng cho báo cáo thời gian khởi động
+STARTED = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from crud import read_csv_data, paginate_data, create_data, update_data, delete_records
-from search_filter_sort import sort_data, filter_data
-from visualization import plot_age_distribution, plot_education_vs_depression, plot_employment_vs_depression, plot_sleep_vs_depression, plot_marital_vs_depression
-# from data_cleaning import clean_data
+from crud import (read_csv_data, read_preview, paginate_data, create_data, update_data, update_record, delete_records,
+                  compaction_due, compact_data, get_backend, use_sqlite)
+from storage import SQLiteBackend
+from query import Query
+from history import edit_history
+from datasets import datasets
+from indexes import dataset_version
+from tasks import TaskRunner
+from search_index import search_positions
+from data_cleaning import clean_data
+from schema import VALID_VALUES
+from risk_scoring import RISK_COLUMN
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
+# matplotlib, seaborn và visualization chỉ được import khi mở cửa sổ biểu đồ lần đầu (khởi động nhanh hơn)
+IMPORTED = time.perf_counter()
 
-CSV_FILE ='dataset\\cleaned_and_predicted_data.csv'
+# Thời gian chờ sau lần gõ phím cuối cùng trước khi tìm kiếm (mili giây)
+SEARCH_DELAY_MS = 250
+# Chu kỳ kiểm tra nhật ký thay đổi cần gộp vào file gốc (mili giây)
+COMPACT_CHECK_MS = 5000
 
-VALID_VALUES = {
-    "Smoking Status": ["Non-smoker", "Former", "Current"],
-    "Physical Activity Level": ["Sedentary", "Moderate", "Active"],
-    "Employment Status": ["Employed", "Unemployed"],
-    "Alcohol Consumption": ["Low", "Moderate", "High"],
-    "Dietary Habits": ["Healthy", "Moderate", "Unhealthy"],
-    "Sleep Patterns": ["Poor", "Good", "Fair"],
-    "History of Mental Illness": ["Yes", "No"],
-    "History of Substance Abuse": ["Yes", "No"],
-    "Family History of Depression": ["Yes", "No"],
-    "Chronic Medical Conditions": ["Yes", "No"],
-    "Marital Status": ["Single", "Married", "Divorced", "Widowed"],
-    "Education Level": ["High School", "Bachelor's Degree", "Master's Degree", "Associate Degree", "PhD"],
-    "Depression Risk": ["Very Low", "Low", "Medium", "High", "Very High"]
-}
+CSV_FILE ='dataset\\cleaned_and_predicted_data.csv'
 
 
 class DataApp:
+    @property
+    def data(self):
+        """DataFrame đang hiển thị, được giữ trong datasets với tên 'main'."""
+        return datasets.get('main')
+
+    @data.setter
+    def data(self, data):
+        datasets.set('main', data)
+
     def __init__(self, root):
         self.root = root
         self.root.title("Quản lý dữ liệu")
         self.root.geometry("1200x600")
         
-        self.data = pd.read_csv(CSV_FILE)
-        self.original_data = self.data.copy()  # Lưu trữ dữ liệu gốc
-        
-        
-        # self.data = read_csv_data()
         self.current_page = 1
         self.page_size = 10
         self.total_pages = 1
 
+        # Hiển thị ngay trang đầu từ các dòng đầu của file; toàn bộ dữ liệu được đọc ở nền (load_data)
+        self.data = read_preview(self.page_size)
+        self.loading = True
+        # Truy vấn lười (lọc, tìm kiếm, sắp xếp) đang hiển thị trên Treeview
+        self.query = Query(self.data)
+        self.startup = [("Import các module", IMPORTED - STARTED), ("Đọc trang đầu", time.perf_counter() - STARTED)]
+
+        # Treeview ảo: một tập item cố định (bằng số dòng nhìn thấy) được dùng lại khi chuyển trang hoặc cuộn
+        self.visible_rows = 20
+        self.row_items = []
+        self.row_offset = 0       # Dòng đầu tiên được hiển thị trong trang hiện tại
+        self.page_data = None
+        self.shown_page = None
+
         # Treeview và thanh cuộn
         self.tree_frame = ttk.Frame(root)
         self.tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         self.frame_data = ttk.Frame(root)
 
         self.tree, self.v_scroll, self.h_scroll = self.create_treeview_with_scrollbars(
-            parent_frame=self.tree_frame, columns=list(self.data.columns), height=20
+            parent_frame=self.tree_frame, columns=list(self.data.columns), height=self.visible_rows
         )
         self.tree.bind("<Double-1>", self.on_treeview_double_click)
+        # Thanh cuộn dọc và con lăn chuột cuộn theo dòng của trang, không theo item của Treeview
+        self.tree.configure(yscrollcommand="")
+        self.v_scroll.configure(command=self.scroll_rows)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_rows("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows("scroll", 1, "units"))
 
         # Menu chức năng
         self.menu_frame = ttk.Frame(root)
@@ -64,10 +90,13 @@ class DataApp:
         ttk.Button(self.menu_frame, text="Sắp xếp", command=self.open_sort_window).pack(side=tk.LEFT, padx=10)
         ttk.Button(self.menu_frame, text="Lọc", command=self.open_filter_window).pack(side=tk.LEFT, padx=10)
         ttk.Button(self.menu_frame, text="Xem biểu đồ", command=self.view_chart).pack(side=tk.LEFT, padx=10)
+        ttk.Button(self.menu_frame, text="Hoàn tác", command=self.undo).pack(side=tk.LEFT, padx=10)
+        ttk.Button(self.menu_frame, text="Làm lại", command=self.redo).pack(side=tk.LEFT, padx=10)
         ttk.Button(self.menu_frame, text="Khôi phục Treeview", command=self.restore_data).pack(side=tk.LEFT, padx=10)
+        ttk.Button(self.menu_frame, text="Hủy mọi thay đổi", command=self.revert_changes).pack(side=tk.LEFT, padx=10)
         # ttk.Button(self.menu_frame, text="Lưu thay đổi", command=self.save_changes).pack(side=tk.LEFT, padx=10)
         # ttk.Button(self.menu_frame, text="Khôi phục Treeview", command=self.update_treeview).pack(side=tk.LEFT, padx=10)
-        # ttk.Button(self.menu_frame, text="Làm sạch dữ liệu", command=self.clean_data).pack(side=tk.LEFT, padx=10)
+        ttk.Button(self.menu_frame, text="Làm sạch dữ liệu", command=self.clean_data).pack(side=tk.LEFT, padx=10)
 
         # Điều hướng trang
         self.nav_frame = ttk.Frame(root)
@@ -82,12 +111,67 @@ class DataApp:
         self.pagination_label = ttk.Label(root, text="Trang: 1/1", font=("Arial", 10))
         self.pagination_label.pack(side=tk.BOTTOM, pady=5)
 
+        # Tác vụ nặng chạy ở nền, thanh tiến trình hiển thị khi có tác vụ đang chạy
+        self.progress = ttk.Progressbar(self.nav_frame, mode="indeterminate", length=150)
+        self.progress.pack(side=tk.LEFT, padx=10)
+        self.status_label = ttk.Label(self.nav_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        self.busy = False
+        self.tasks = TaskRunner(root, on_busy=self.show_busy)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.chart_window = None
+        self.chart_panel = None
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+
         self.update_treeview()
+        self.load_data()
+
+    def load_data(self):
+        """
+        Đọc toàn bộ dữ liệu ở luồng nền trong lúc cửa sổ đã hiển thị trang đầu.
+        Các chức năng thay đổi/truy vấn dữ liệu bị khóa cho tới khi đọc xong.
+        """
+        for button in self.menu_frame.winfo_children():
+            button.state(["disabled"])
+        self.pagination_label.config(text="Trang: 1/... - Đang đọc dữ liệu")
+        self.root.after_idle(lambda: self.startup.append(("Cửa sổ sẵn sàng", time.perf_counter() - STARTED)))
+
+        def load():
+            data = read_csv_data(report=True)
+            edit_history(data)  # Ghi nhận các thay đổi (chỉ phần thay đổi) để hoàn tác/khôi phục
+            return data
+
+        def loaded(data):
+            self.data = data
+            self.query = Query(self.data)
+            self.loading = False
+            for button in self.menu_frame.winfo_children():
+                button.state(["!disabled"])
+            self.update_treeview()
+            self.startup.append(("Đọc toàn bộ dữ liệu", time.perf_counter() - STARTED))
+            self.report_startup()
+            self.check_compaction()
+
+        def failed(error):
+            messagebox.showerror("Lỗi", f"Không thể đọc dữ liệu: {error}")
+
+        self.tasks.submit("load", load, on_done=loaded, on_error=failed, description="Đang đọc dữ liệu")
+
+    def report_startup(self):
+        """
+        In thời gian của các bước khởi động (tính từ lúc bắt đầu chạy).
+        """
+        print("Thời gian khởi động:")
+        for step, elapsed in self.startup:
+            print(f"  {step}: {elapsed:.2f} giây")
         
     def on_treeview_double_click(self, event):
         """
         Xử lý khi người dùng nhấp đúp vào một hàng trong Treeview.
         """
+        if self.loading:
+            return
         selected_item = self.tree.selection()
         if not selected_item:
             messagebox.showerror("Lỗi", "Vui lòng chọn một dòng để thao tác.")
@@ -247,18 +331,86 @@ class DataApp:
         return tree, v_scroll, h_scroll
 
     def update_treeview(self):
-        page_data, self.total_pages = paginate_data(self.data, self.page_size, self.current_page)
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for idx, row in page_data.iterrows():
-            self.tree.insert("", tk.END, values=list(row), tags=(idx,))
+        self.query = self.query.with_data(self.data)
+        self.page_data, self.total_pages = paginate_data(self.query, self.page_size, self.current_page)
+        # Sang trang khác thì hiển thị từ dòng đầu, cập nhật cùng trang (thêm/sửa/xóa) thì giữ vị trí cuộn
+        if self.shown_page != (self.current_page, self.page_size):
+            self.shown_page = (self.current_page, self.page_size)
+            self.row_offset = 0
+        self.render_rows()
         self.pagination_label.config(text=f"Trang: {self.current_page}/{self.total_pages}")
 
+    def show_rows(self, rows, status):
+        """
+        Hiển thị tạm các dòng (ví dụ kết quả tìm kiếm chưa đầy đủ) mà không đổi truy vấn đang hiển thị.
+        """
+        self.page_data = rows
+        self.shown_page = None
+        self.row_offset = 0
+        self.render_rows()
+        self.pagination_label.config(text=status)
+
+    def render_rows(self):
+        """
+        Hiển thị các dòng nhìn thấy của trang hiện tại lên tập item cố định của Treeview:
+        chỉ cập nhật giá trị của item (tree.item), giá trị lấy theo cột thay vì iterrows.
+        Chi phí chỉ phụ thuộc số dòng nhìn thấy, không phụ thuộc kích thước trang hay số kết quả.
+        """
+        total = len(self.page_data)
+        self.row_offset = min(self.row_offset, max(total - self.visible_rows, 0))
+        window = self.page_data.iloc[self.row_offset:self.row_offset + self.visible_rows]
+        columns = [[self.format_value(value) for value in window[col].to_numpy()] for col in window.columns]
+        labels = window.index.tolist()
+
+        while len(self.row_items) < len(window):
+            self.row_items.append(self.tree.insert("", tk.END))
+        self.tree.selection_remove(self.tree.selection())
+        for position, item in enumerate(self.row_items):
+            if position < len(window):
+                self.tree.item(item, values=[values[position] for values in columns], tags=(labels[position],))
+                self.tree.move(item, "", position)
+            else:
+                self.tree.detach(item)
+
+        if total:
+            self.v_scroll.set(self.row_offset / total, (self.row_offset + len(window)) / total)
+        else:
+            self.v_scroll.set(0, 1)
+
+    @staticmethod
+    def format_value(value):
+        """
+        Chuỗi hiển thị của một ô: giá trị thiếu để trống, số thực không dùng dạng khoa học.
+        """
+        if pd.isna(value):
+            return ""
+        if isinstance(value, (float, np.floating)):
+            return np.format_float_positional(value, trim="0")
+        return str(value)
+
+    def scroll_rows(self, action, amount, unit=None):
+        """
+        Cuộn trong trang hiện tại bằng cách đổi dòng đầu tiên được hiển thị (không tạo thêm item).
+        Nhận các tham số của lệnh cuộn Tk: ("moveto", tỉ lệ) hoặc ("scroll", số bước, "units"/"pages").
+        """
+        if self.page_data is None:
+            return "break"
+        total = len(self.page_data)
+        if action == "moveto":
+            offset = int(float(amount) * total)
+        else:
+            step = self.visible_rows if unit == "pages" else 3
+            offset = self.row_offset + int(amount) * step
+        self.row_offset = min(max(offset, 0), max(total - self.visible_rows, 0))
+        self.render_rows()
+        return "break"
+
     def handle_update_data(self, record_index, updated_data):
         """
         Cập nhật dữ liệu tại chỉ số được chọn.
         """
         errors = []
+        changes = {}
         for col, value in updated_data.items():
             if col == "Age":
                 if not str(value).isdigit() or not (18 <= int(value) <= 80):
@@ -276,19 +428,20 @@ class DataApp:
             elif col in VALID_VALUES and value not in VALID_VALUES[col]:
                 errors.append(f"Trường '{col}' phải thuộc {VALID_VALUES[col]}.")
 
-            # Lưu dữ liệu vào DataFrame nếu không có lỗi
+            # Chuẩn bị giá trị mới nếu không có lỗi
             if not errors:
                 if pd.api.types.is_numeric_dtype(self.data[col]):
-                    self.data.at[record_index, col] = pd.to_numeric(value, errors="coerce")
+                    changes[col] = pd.to_numeric(value, errors="coerce")
                 else:
-                    self.data.at[record_index, col] = value
+                    changes[col] = value
 
         if errors:
             messagebox.showerror("Lỗi nhập liệu", "\n".join(errors))
         else:
-            self.data.to_csv(CSV_FILE, index=False)
+            # Cập nhật DataFrame, tính lại nguy cơ trầm cảm của dòng này và ghi nối thay đổi vào nhật ký
+            update_record(self.data, record_index, changes)
             self.update_treeview()
-            messagebox.showinfo("Thành công", "Dữ liệu đã được cập nhật.")
+            messagebox.showinfo("Thành công", f"Dữ liệu đã được cập nhật. Nguy cơ trầm cảm: {self.data.at[record_index, RISK_COLUMN]}.")
 
 
     def open_input_window(self, title, action_callback, record_data=None):
@@ -302,6 +455,11 @@ class DataApp:
         widgets = {}
         for i, col in enumerate(self.data.columns):
             ttk.Label(input_window, text=f"{col}:").grid(row=i, column=0, padx=10, pady=5, sticky=tk.W)
+            if col == RISK_COLUMN:
+                # Nguy cơ trầm cảm được tính tự động từ các yếu tố khác khi lưu
+                current = record_data.get(col, "") if record_data else ""
+                ttk.Label(input_window, text=f"{current} (tự động tính)").grid(row=i, column=1, padx=10, pady=5, sticky=tk.W)
+                continue
             if col in VALID_VALUES:
                 widget = ttk.Combobox(input_window, values=VALID_VALUES[col], state="readonly")
                 if record_data:
@@ -354,36 +512,73 @@ class DataApp:
         self.data = create_data(self.data, new_data)
         self.current_page = 1
         self.update_treeview()
-        messagebox.showinfo("Thành công", "Dữ liệu mới đã được thêm.")
+        messagebox.showinfo("Thành công", f"Dữ liệu mới đã được thêm. Nguy cơ trầm cảm: {self.data[RISK_COLUMN].iloc[-1]}.")
 
     def open_search_window(self):
         """
         Mở cửa sổ tìm kiếm nhỏ để người dùng tìm theo bất kỳ cột nào ngay trên cửa sổ Treeview chính.
+        Tìm kiếm khi đang gõ: chờ người dùng ngừng gõ SEARCH_DELAY_MS mili giây rồi tìm ở luồng nền,
+        lần tìm cũ chưa xong bị hủy; kết quả tạm thời được hiển thị ngay khi tìm thấy.
         """
-        def perform_search():
+        pending = {"after": None}
+
+        def schedule_search(event=None):
+            if pending["after"] is not None:
+                self.root.after_cancel(pending["after"])
+            pending["after"] = self.root.after(SEARCH_DELAY_MS, perform_search)
+
+        def perform_search(explicit=False):
+            pending["after"] = None
             column = column_combobox.get()  # Cột người dùng chọn
             value = value_entry.get().strip()  # Giá trị người dùng nhập
+            base = self.query.with_data(self.data).search(None)
             if not value:
-                messagebox.showerror("Lỗi", "Vui lòng nhập giá trị cần tìm.")
+                if explicit:
+                    messagebox.showerror("Lỗi", "Vui lòng nhập giá trị cần tìm.")
+                    return
+                # Xóa ô tìm kiếm: hiển thị lại dữ liệu không tìm kiếm
+                self.tasks.cancel("search")
+                if self.query.search_text:
+                    self.query = base
+                    self.current_page = 1
+                    self.update_treeview()
                 return
 
-            if not column:  # Nếu không chọn cột, tìm kiếm trong tất cả các cột
-                # Tìm kiếm trong tất cả các cột
-                results = self.data[self.data.apply(lambda row: row.astype(str).str.contains(value, case=False, na=False).any(), axis=1)]
-            else:  # Nếu chọn cột, tìm kiếm trong cột đó
-                results = self.data[self.data[column].astype(str).str.contains(value, case=False, na=False)]
+            # Tìm bằng chỉ mục trigram (không chọn cột: tìm trong tất cả các cột); gõ thêm ký tự thì chỉ
+            # kiểm tra lại các giá trị đã khớp ở lần tìm trước
+            columns = [column] if column else None
 
-            if results.empty:
-                messagebox.showinfo("Thông báo", "Không có kết quả tìm kiếm.")
-                return
+            def search(task):
+                order = base.positions()  # Thứ tự dòng của truy vấn hiện tại (lọc, sắp xếp), chưa tìm kiếm
+
+                def partial(positions):
+                    found = np.zeros(len(base.data), dtype=bool)
+                    found[positions] = True
+                    task.emit(order[found[order]][:self.page_size])
+
+                if search_positions(base.data, value, columns, on_partial=partial, cancelled=lambda: task.cancelled) is None:
+                    return None
+                query = base.search(value, columns)
+                query.count()
+                return query
 
-            # Xóa các kết quả cũ trong Treeview chính
-            for row in self.tree.get_children():
-                self.tree.delete(row)
+            def show_partial(positions):
+                self.show_rows(base.data.iloc[positions], f"Đang tìm: {len(positions)}+ kết quả")
+
+            def done(query):
+                if query.count() == 0:
+                    self.update_treeview()
+                    self.pagination_label.config(text=f"Trang: {self.current_page}/{self.total_pages} - Không có kết quả tìm kiếm.")
+                    if explicit:
+                        messagebox.showinfo("Thông báo", "Không có kết quả tìm kiếm.")
+                    return
+                # Hiển thị kết quả tìm kiếm theo trang trên Treeview chính
+                self.query = query
+                self.current_page = 1
+                self.update_treeview()
 
-            # Chèn các kết quả tìm kiếm vào Treeview chính
-            for idx, row in results.iterrows():
-                self.tree.insert("", tk.END, values=list(row), tags=(idx,))
+            self.tasks.submit("search", search, with_task=True, on_partial=show_partial, on_done=done,
+                              on_error=lambda error: messagebox.showerror("Lỗi", str(error)), description="Đang tìm kiếm")
 
         # Tạo một khung tìm kiếm nhỏ gọn trên cửa sổ chính
         search_frame = ttk.Frame(self.root)
@@ -393,14 +588,16 @@ class DataApp:
         ttk.Label(search_frame, text="Chọn cột để tìm kiếm:").pack(side=tk.LEFT, padx=5)
         column_combobox = ttk.Combobox(search_frame, values=[""] + list(self.data.columns), state="readonly")  # Thêm lựa chọn trống cho tìm kiếm trong tất cả cột
         column_combobox.pack(side=tk.LEFT, padx=5)
+        column_combobox.bind("<<ComboboxSelected>>", schedule_search)
 
         # Label và ô nhập giá trị cần tìm
         ttk.Label(search_frame, text="Nhập giá trị cần tìm:").pack(side=tk.LEFT, padx=5)
         value_entry = ttk.Entry(search_frame, width=30)
         value_entry.pack(side=tk.LEFT, padx=5)
+        value_entry.bind("<KeyRelease>", schedule_search)
 
         # Nút tìm kiếm
-        ttk.Button(search_frame, text="Tìm kiếm", command=perform_search).pack(side=tk.LEFT, padx=10)
+        ttk.Button(search_frame, text="Tìm kiếm", command=lambda: perform_search(explicit=True)).pack(side=tk.LEFT, padx=10)
        
         
     def open_filter_window(self):
@@ -411,21 +608,32 @@ class DataApp:
             """
             column = column_combobox.get()
             value = value_entry.get().strip()
-            if not column or not value:
-                messagebox.showerror("Lỗi", "Vui lòng chọn cột và nhập giá trị cần lọc.")
+            low_text = low_entry.get().strip()
+            high_text = high_entry.get().strip()
+            if not column or not (value or low_text or high_text):
+                messagebox.showerror("Lỗi", "Vui lòng chọn cột và nhập giá trị hoặc khoảng cần lọc.")
                 return
             try:
-                # Sử dụng hàm filter_data để lọc
-                self.data = filter_data(self.data, column, value)
-                self.current_page = 1
-                self.update_treeview()  # Cập nhật Treeview với dữ liệu mới
+                query = self.query.with_data(self.data)
+                # Lọc theo khoảng giá trị (cột số) bằng chỉ mục sắp xếp
+                if low_text or high_text:
+                    try:
+                        low = float(low_text) if low_text else None
+                        high = float(high_text) if high_text else None
+                    except ValueError:
+                        raise ValueError("Giá trị 'Từ' và 'Đến' phải là số.")
+                    query = query.between(column, low, high)
+                # Lọc theo chuỗi (như filter_data)
+                if value:
+                    query = query.where(column, value)
+                self.show_query(query, "Không có dòng nào thỏa mãn điều kiện lọc.")
             except ValueError as e:
                 messagebox.showerror("Lỗi", str(e))
 
 
         filter_window = tk.Toplevel(self.root)
         filter_window.title("Lọc dữ liệu")
-        filter_window.geometry("300x200")
+        filter_window.geometry("300x320")
 
         ttk.Label(filter_window, text="Chọn cột:").pack(pady=5)
         column_combobox = ttk.Combobox(filter_window, values=list(self.data.columns), state="readonly")
@@ -435,6 +643,16 @@ class DataApp:
         value_entry = ttk.Entry(filter_window)
         value_entry.pack(pady=5)
 
+        # Khoảng giá trị cho cột số (Age, Income, Number of Children), có thể bỏ trống một đầu
+        range_frame = ttk.Frame(filter_window)
+        range_frame.pack(pady=5)
+        ttk.Label(range_frame, text="Từ:").pack(side=tk.LEFT, padx=2)
+        low_entry = ttk.Entry(range_frame, width=10)
+        low_entry.pack(side=tk.LEFT, padx=2)
+        ttk.Label(range_frame, text="Đến:").pack(side=tk.LEFT, padx=2)
+        high_entry = ttk.Entry(range_frame, width=10)
+        high_entry.pack(side=tk.LEFT, padx=2)
+
         ttk.Button(filter_window, text="Lọc", command=perform_filter).pack(pady=10)
 
     def open_sort_window(self):
@@ -448,10 +666,12 @@ class DataApp:
                 messagebox.showerror("Lỗi", "Vui lòng chọn cột để sắp xếp.")
                 return
             
-            self.data = sort_data(self.data, column, ascending)
-            self.update_treeview()
+            # Sắp xếp ổn định: cột mới là khóa chính, các khóa trước đó là khóa phụ
+            keys = [(column, ascending)] + [key for key in self.query.order if key[0] != column]
+            query = self.query.with_data(self.data).order_by(*keys)
             sort_window.destroy()
-            messagebox.showinfo("Thành công", f"Dữ liệu đã được sắp xếp theo '{column}' ({order}).")
+            self.show_query(query, "Không có dữ liệu để sắp xếp.",
+                            f"Dữ liệu đã được sắp xếp theo '{column}' ({order}).")
 
         sort_window = tk.Toplevel(self.root)
         sort_window.title("Sắp xếp dữ liệu")
@@ -482,25 +702,46 @@ class DataApp:
         """
         Mở cửa sổ để hiển thị biểu đồ, bao gồm cả biểu đồ từ 'visualization.py'.
         """
+        # Import thư viện vẽ ở lần mở đầu tiên (các lần sau lấy từ sys.modules)
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from visualization import (ChartPanel, plot_age_distribution, plot_education_vs_depression,
+                                   plot_employment_vs_depression, plot_sleep_vs_depression, plot_marital_vs_depression)
+
         def plot_chart():
             """
             Vẽ biểu đồ cho cột đã chọn từ dữ liệu trong DataFrame hoặc từ các hàm trong visualization.py.
             """
             selected_chart = chart_combobox.get()
-            file_path_1 = 'dataset\\filtered_depression_data.csv'
-            file_path_2 = 'dataset\\cleaned_and_predicted_data.csv'
-            self.data_1 = pd.read_csv(file_path_1)
-            self.data_2 = pd.read_csv(file_path_2)
+            if selected_chart not in charts:
+                return
+
+            # Khối đếm của dữ liệu đang mở (toàn bộ và tập con nguy cơ cao) được lưu theo phiên bản dữ liệu;
+            # chỉ lần đầu hoặc sau khi dữ liệu thay đổi mới phải tính lại (ở luồng nền), vẽ trên luồng Tk
+            def load():
+                version = dataset_version(self.data)
+                return datasets.view('main', 'high_risk_cube'), datasets.view('main', 'cube'), version
+
+            def loaded(result):
+                self.data_1, self.data_2, version = result
+                if self.chart_panel is not None:
+                    draw(selected_chart, version)
+
+            self.tasks.submit("chart", load, on_done=loaded, description="Đang đọc dữ liệu biểu đồ",
+                              on_error=lambda error: messagebox.showerror("Lỗi", str(error)))
+
+        def draw(selected_chart, version):
+            # Vẽ vào Figure nhúng trong cửa sổ (dùng lại Axes và ảnh đã dựng của biểu đồ nếu có)
             if selected_chart == "Phân phối nhóm tuổi theo nguy cơ trầm cảm":
-                plot_age_distribution(self.data_1)
+                self.chart_panel.show(selected_chart, plot_age_distribution, self.data_1, version)
             elif selected_chart == "Nguy cơ trầm cảm theo trình độ học vấn":
-                plot_education_vs_depression(self.data_1)
+                self.chart_panel.show(selected_chart, plot_education_vs_depression, self.data_1, version)
             elif selected_chart == "Trạng thái việc làm và trầm cảm":
-                plot_employment_vs_depression(self.data_2)
+                self.chart_panel.show(selected_chart, plot_employment_vs_depression, self.data_2, version)
             elif selected_chart == "Tương quan tình trạng hôn nhân và nguy cơ trầm cảm":
-                plot_marital_vs_depression(self.data_2)
+                self.chart_panel.show(selected_chart, plot_marital_vs_depression, self.data_2, version)
             elif selected_chart == "Tương quan giấc ngủ và nguy cơ trầm cảm":
-                plot_sleep_vs_depression(self.data_1)
+                self.chart_panel.show(selected_chart, plot_sleep_vs_depression, self.data_1, version)
             else:
                 return
 
@@ -525,19 +766,35 @@ class DataApp:
             # canvas.draw()
             # canvas.get_tk_widget().pack()
 
+        # Chỉ có một cửa sổ biểu đồ (một Figure dùng lâu dài)
+        if self.chart_window is not None:
+            self.chart_window.lift()
+            return
+
         # Cửa sổ hiển thị biểu đồ
         chart_window = tk.Toplevel(self.root)
         chart_window.title("Xem Biểu đồ")
-        chart_window.geometry("500x500")
+        chart_window.geometry("1000x750")
+        self.chart_window = chart_window
+
+        def close_chart_window():
+            self.tasks.cancel("chart")
+            self.chart_panel.close()
+            self.chart_panel = None
+            self.chart_window = None
+            chart_window.destroy()
+
+        chart_window.protocol("WM_DELETE_WINDOW", close_chart_window)
 
         ttk.Label(chart_window, text="Chọn biểu đồ:").pack(pady=10)
-        chart_combobox = ttk.Combobox(chart_window, values=[
+        charts = [
             "Phân phối nhóm tuổi theo nguy cơ trầm cảm", 
             "Nguy cơ trầm cảm theo trình độ học vấn", 
             "Trạng thái việc làm và trầm cảm",
             "Tương quan tình trạng hôn nhân và nguy cơ trầm cảm",
             "Tương quan giấc ngủ và nguy cơ trầm cảm",
-        ], )
+        ]
+        chart_combobox = ttk.Combobox(chart_window, values=charts, )
         chart_combobox.pack(pady=5)
 
         # ttk.Label(chart_window, text="Chọn cột để vẽ biểu đồ:").pack(pady=10)
@@ -545,36 +802,147 @@ class DataApp:
         # column_combobox.pack(pady=5)
 
         ttk.Button(chart_window, text="Vẽ biểu đồ", command=plot_chart).pack(pady=10)
+        chart_combobox.bind("<<ComboboxSelected>>", lambda event: plot_chart())
+
+        # Figure không do pyplot quản lý: được giải phóng cùng cửa sổ, không mở cửa sổ plt riêng
+        figure = Figure(figsize=(10, 6))
+        canvas = FigureCanvasTkAgg(figure, master=chart_window)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.chart_panel = ChartPanel(figure, canvas)
     
-    # def clean_data(self):
-    #     """
-    #     Hàm xử lý khi nhấn nút "Làm sạch dữ liệu"
-    #     """
-    #     try:
-    #         file_path = 'dataset\\depression_data.csv'  # Đường dẫn đến file CSV gốc
-    #         output_path = 'dataset\\cleaned_and_predicted_data.csv'  # Đường dẫn đến file kết quả
-    #         cleaned_data = clean_data(file_path, output_path)  # Gọi hàm clean_data
-    #         messagebox.showinfo("Thành công", "Dữ liệu đã được làm sạch và lưu vào file mới.")
-    #     except Exception as e:
-    #         messagebox.showerror("Lỗi", f"Đã xảy ra lỗi: {e}")
+    def clean_data(self):
+        """
+        Hàm xử lý khi nhấn nút "Làm sạch dữ liệu"
+        """
+        file_path = 'dataset\\depression_data.csv'  # Đường dẫn đến file CSV gốc
+        output_path = 'dataset\\cleaned_and_predicted_data.csv'  # Đường dẫn đến file kết quả
+
+        def failed(error):
+            messagebox.showerror("Lỗi", f"Đã xảy ra lỗi: {error}")
+
+        def load():
+            backend = get_backend()
+            if isinstance(backend, SQLiteBackend):
+                # Dữ liệu đã làm sạch được ghi ra file CSV: tạo lại cơ sở dữ liệu SQLite từ file đó
+                use_sqlite(backend.db_path, output_path, rebuild=True)
+            data = read_csv_data()
+            edit_history(data)
+            return data
+
+        def loaded(data):
+            self.data = data
+            self.query = Query(self.data)
+            self.current_page = 1
+            self.update_treeview()
+            messagebox.showinfo("Thành công", "Dữ liệu đã được làm sạch và lưu vào file mới.")
+
+        def cleaned(_):
+            self.tasks.submit("load", load, on_done=loaded, on_error=failed, description="Đang đọc dữ liệu")
+
+        # Làm sạch dữ liệu (tính toán nặng) chạy trong tiến trình riêng, sau đó đọc lại dữ liệu ở luồng nền
+        self.tasks.submit("clean", clean_data, file_path, output_path, process=True,
+                          on_done=cleaned, on_error=failed, description="Đang làm sạch dữ liệu")
+
+    def show_query(self, query, empty_message, done_message=None):
+        """
+        Thực thi truy vấn (lọc, tìm kiếm, sắp xếp) ở luồng nền rồi hiển thị trang đầu tiên trên luồng Tk.
+        Truy vấn mới thay thế truy vấn cũ chưa chạy xong; truy vấn không có kết quả thì giữ nguyên Treeview.
+        """
+        def done(count):
+            if count == 0:
+                messagebox.showinfo("Thông báo", empty_message)
+                return
+            self.query = query
+            self.current_page = 1
+            self.update_treeview()
+            if done_message:
+                messagebox.showinfo("Thành công", done_message)
+
+        self.tasks.submit("query", query.count, on_done=done, description="Đang truy vấn dữ liệu",
+                          on_error=lambda error: messagebox.showerror("Lỗi", str(error)))
+
+    def show_busy(self, running, description):
+        """
+        Hiển thị thanh tiến trình khi có tác vụ nền đang chạy.
+        """
+        if running and not self.busy:
+            self.progress.start(10)
+        elif not running and self.busy:
+            self.progress.stop()
+        self.busy = bool(running)
+        self.status_label.config(text=f"{description}..." if running else "")
+
+    def check_compaction(self):
+        """
+        Định kỳ gộp nhật ký thay đổi vào file gốc ở luồng nền khi nhật ký đã đủ dài (không chặn luồng Tk).
+        """
+        if compaction_due() and not self.tasks.is_running("compact"):
+            self.tasks.submit("compact", compact_data, description="Đang gộp nhật ký thay đổi",
+                              on_error=lambda error: print(f"Không thể gộp nhật ký thay đổi: {error}"))
+        self.root.after(COMPACT_CHECK_MS, self.check_compaction)
+
+    def close(self):
+        """
+        Dừng các tác vụ nền và đóng cửa sổ.
+        """
+        self.tasks.shutdown()
+        self.root.destroy()
 
     def save_changes(self):
         """
-        Lưu các thay đổi từ self.data vào self.original_data.
-        Điều này sẽ cập nhật dữ liệu gốc với tất cả các thay đổi (thêm, xóa, cập nhật).
+        Đánh dấu trạng thái hiện tại làm điểm khôi phục cho revert_changes.
+        Chỉ ghi lại vị trí trong lịch sử thay đổi, không sao chép dữ liệu.
         """
-        self.original_data = self.data.copy()  # Sao chép dữ liệu hiện tại vào dữ liệu gốc
+        edit_history(self.data).save()
         messagebox.showinfo("Thông báo", "Thay đổi đã được lưu!")
         
     def restore_data(self):
         """
-        Khôi phục dữ liệu về trạng thái ban đầu (không bao gồm các thay đổi về tìm kiếm, lọc, sắp xếp).
+        Khôi phục Treeview về toàn bộ dữ liệu (bỏ tìm kiếm, lọc, sắp xếp).
         Các thay đổi về thêm, xóa, cập nhật vẫn được lưu giữ.
         """
-        # Khôi phục dữ liệu về trạng thái ban đầu
-        self.data = self.original_data.copy()
+        self.query = Query(self.data)
     
-        # Cập nhật lại Treeview để hiển thị dữ liệu đã khôi phục
+        # Cập nhật lại Treeview để hiển thị toàn bộ dữ liệu
+        self.update_treeview()
+
+    def revert_changes(self):
+        """
+        Hủy mọi thay đổi kể từ điểm lưu gần nhất (mặc định: lúc mở ứng dụng) sau khi người dùng xác nhận.
+        Chỉ các dòng/ô đã thay đổi được hoàn tác, theo lịch sử thay đổi; việc hoàn tác cũng được lưu vào file.
+        """
+        confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn hủy mọi thay đổi kể từ lúc mở ứng dụng? "
+                                                  "Dữ liệu đã lưu sẽ được đưa về trạng thái lúc đó.")
+        if not confirm:
+            return
+        try:
+            self.data = edit_history(self.data).restore(self.data)
+        except ValueError as e:
+            messagebox.showerror("Lỗi", str(e))
+            return
+        self.query = Query(self.data)
+        self.update_treeview()
+
+    def undo(self):
+        """
+        Hoàn tác thao tác thêm/xóa/cập nhật gần nhất.
+        """
+        try:
+            self.data = edit_history(self.data).undo(self.data)
+        except ValueError as e:
+            messagebox.showinfo("Thông báo", str(e))
+            return
+        self.update_treeview()
+
+    def redo(self):
+        """
+        Làm lại thao tác vừa được hoàn tác.
+        """
+        try:
+            self.data = edit_history(self.data).redo(self.data)
+        except ValueError as e:
+            messagebox.showinfo("Thông báo", str(e))
+            return
         self.update_treeview()
     def prev_page(self):
         if self.current_page > 1:
@@ -600,6 +968,13 @@ class DataApp:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quản lý dữ liệu trầm cảm.")
+    parser.add_argument('--sqlite', metavar='DB',
+                        help="Lưu dữ liệu trong cơ sở dữ liệu SQLite DB (tạo từ file CSV nếu chưa có) "
+                             "thay vì file CSV kèm nhật ký thay đổi")
+    args = parser.parse_args()
+    if args.sqlite:
+        use_sqlite(args.sqlite)
     root = tk.Tk()
     app = DataApp(root)
     root.mainloop()
@@ -0,0 +1,107 @@
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Số trang tối đa được lưu trong bộ nhớ đệm
+PAGE_CACHE_SIZE = 64
+
+class PageCache:
+    """
+    Bộ nhớ đệm các trang dữ liệu, loại bỏ trang ít dùng gần đây nhất (LRU).
+    - Khóa do nơi gọi tạo, gồm phiên bản dữ liệu, truy vấn, số dòng mỗi trang và số trang,
+      nên trang cũ tự hết hiệu lực khi dữ liệu thay đổi.
+    - Các trang lân cận có thể được nạp trước (prefetch) ở luồng nền.
+    - Bộ đếm hits/misses/prefetched dùng để điều chỉnh kích thước.
+    """
+
+    def __init__(self, capacity=PAGE_CACHE_SIZE):
+        self.capacity = capacity
+        self.pages = OrderedDict()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='page-prefetch')
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def _lookup(self, key, owner):
+        """
+        Lấy trang đã lưu (gọi khi đang giữ khóa). owner là đối tượng dữ liệu của trang: trang chỉ dùng được
+        nếu owner vẫn là cùng đối tượng (id của DataFrame đã bị giải phóng có thể được dùng lại).
+        """
+        entry = self.pages.get(key)
+        if entry is None:
+            return None
+        ref, page = entry
+        if ref is not None and ref() is not owner:
+            del self.pages[key]
+            return None
+        self.pages.move_to_end(key)
+        return page
+
+    def _store(self, key, owner, page):
+        ref = weakref.ref(owner) if owner is not None else None
+        with self.lock:
+            self.pages[key] = (ref, page)
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.capacity:
+                self.pages.popitem(last=False)
+
+    def get(self, key, loader, owner=None):
+        """
+        Lấy trang theo khóa, gọi loader() để tạo trang nếu chưa có.
+        :param owner: DataFrame của trang (chỉ giữ tham chiếu yếu), None nếu khóa đã đủ xác định dữ liệu
+        """
+        with self.lock:
+            page = self._lookup(key, owner)
+            if page is not None:
+                self.hits += 1
+                return page
+            self.misses += 1
+        page = loader()
+        self._store(key, owner, page)
+        return page
+
+    def prefetch(self, key, loader, owner=None, still_valid=None):
+        """
+        Nạp trước trang ở luồng nền (bỏ qua nếu trang đã có hoặc đang được nạp).
+        :param still_valid: Hàm kiểm tra dữ liệu chưa thay đổi trong lúc nạp; trang chỉ được lưu nếu trả về True
+        """
+        with self.lock:
+            if key in self.pending or self._lookup(key, owner) is not None:
+                return
+            self.pending.add(key)
+        ref = weakref.ref(owner) if owner is not None else None
+
+        def run():
+            try:
+                target = ref() if ref is not None else None
+                if ref is not None and target is None:
+                    return
+                page = loader()
+                if still_valid is None or still_valid():
+                    self._store(key, target, page)
+                    with self.lock:
+                        self.prefetched += 1
+            except Exception:
+                # Lỗi khi nạp trước không ảnh hưởng tới người dùng; trang sẽ được nạp lại khi cần
+                pass
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+
+        self.executor.submit(run)
+
+    def clear(self):
+        """Xóa toàn bộ các trang đã lưu."""
+        with self.lock:
+            self.pages.clear()
+
+    def stats(self) -> dict:
+        """Số lần trúng, trượt, số trang nạp trước và số trang đang lưu."""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'prefetched': self.prefetched, 'size': len(self.pages)}
+
+# Bộ nhớ đệm trang dùng cho crud.paginate_data
+page_cache = PageCache()
@@ -0,0 +1,139 @@
+import copy
+import math
+import numpy as np
+import pandas as pd
+from indexes import dataset_version
+from search_filter_sort import filter_mask, range_mask, sort_permutation
+from search_index import search_positions
+
+class Query:
+    """
+    Truy vấn lười trên một DataFrame: tích lũy điều kiện lọc, tìm kiếm, khóa sắp xếp và giới hạn dòng,
+    chỉ thực thi một lần khi cần kết quả (count, fetch, page).
+    Khi thực thi:
+    - Các khoảng giá trị chạy trước bằng chỉ mục sắp xếp, sau đó là lọc theo từ điển và tìm kiếm bằng chỉ mục trigram;
+      chỉ các cột có điều kiện được đọc.
+    - Sắp xếp dùng hoán vị đã lưu của cột (hoặc chỉ sắp xếp các dòng còn lại nếu ít).
+    - Chỉ các dòng của trang được yêu cầu mới được lấy ra khỏi DataFrame.
+    Mỗi phương thức trả về một Query mới; kết quả được lưu lại cho tới khi dữ liệu thay đổi (dataset_version).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self.filters = ()
+        self.ranges = {}
+        self.search_text = None
+        self.search_columns = None
+        self.order = ()
+        self.skip = 0
+        self.max_rows = None
+        self._result = None
+
+    def _replace(self, **changes):
+        query = copy.copy(self)
+        query.__dict__.update(changes)
+        query._result = None
+        return query
+
+    def _check_column(self, column):
+        if column not in self.data.columns:
+            raise ValueError(f"Cột '{column}' không tồn tại.")
+
+    def with_data(self, data: pd.DataFrame):
+        """Cùng các điều kiện trên DataFrame khác (ví dụ sau khi thêm/xóa dòng)."""
+        return self if data is self.data else self._replace(data=data)
+
+    def where(self, column, value):
+        """Thêm điều kiện: giá trị trong cột chứa chuỗi value (như filter_data)."""
+        self._check_column(column)
+        return self._replace(filters=self.filters + ((column, value),))
+
+    def between(self, column, low=None, high=None):
+        """Thêm điều kiện: giá trị cột số trong khoảng [low, high] (None: không giới hạn)."""
+        self._check_column(column)
+        ranges = dict(self.ranges)
+        if column in ranges:
+            # Giao với khoảng đã có trên cùng cột
+            old_low, old_high = ranges[column]
+            low = old_low if low is None else low if old_low is None else max(low, old_low)
+            high = old_high if high is None else high if old_high is None else min(high, old_high)
+        ranges[column] = (low, high)
+        return self._replace(ranges=ranges)
+
+    def search(self, text, columns=None):
+        """Tìm các dòng chứa text trong các cột columns (mặc định: tất cả); thay cho lần tìm kiếm trước."""
+        for column in columns or []:
+            self._check_column(column)
+        return self._replace(search_text=text, search_columns=list(columns) if columns else None)
+
+    def order_by(self, *keys):
+        """
+        Đặt khóa sắp xếp (thay cho các khóa trước đó).
+        :param keys: Tên cột hoặc (cột, ascending), theo thứ tự ưu tiên giảm dần
+        """
+        keys = tuple((key, True) if isinstance(key, str) else tuple(key) for key in keys)
+        for column, _ in keys:
+            self._check_column(column)
+        return self._replace(order=keys)
+
+    def offset(self, count):
+        """Bỏ qua count dòng đầu của kết quả."""
+        return self._replace(skip=max(int(count), 0))
+
+    def limit(self, count):
+        """Chỉ lấy tối đa count dòng (None: không giới hạn)."""
+        return self._replace(max_rows=None if count is None else max(int(count), 0))
+
+    def cache_key(self):
+        """Khóa định danh DataFrame và các điều kiện của truy vấn (dùng cho bộ nhớ đệm trang)."""
+        return (id(self.data), self.filters, tuple(sorted(self.ranges.items())), self.search_text,
+                tuple(self.search_columns or ()), self.order, self.skip, self.max_rows)
+
+    def positions(self) -> np.ndarray:
+        """
+        Thực thi truy vấn: vị trí các dòng kết quả theo thứ tự (đã áp dụng offset/limit).
+        """
+        version = dataset_version(self.data)
+        if self._result is not None and self._result[0] == version:
+            return self._result[1]
+
+        data = self.data
+        mask = range_mask(data, self.ranges)
+        for column, value in self.filters:
+            column_mask = filter_mask(data, column, value)
+            mask = column_mask if mask is None else mask & column_mask
+        if self.search_text:
+            found = np.zeros(len(data), dtype=bool)
+            found[search_positions(data, self.search_text, self.search_columns)] = True
+            mask = found if mask is None else mask & found
+
+        positions = None if mask is None else np.flatnonzero(mask)
+        if self.order:
+            positions = sort_permutation(data, list(self.order), positions)
+        elif positions is None:
+            positions = np.arange(len(data))
+
+        stop = None if self.max_rows is None else self.skip + self.max_rows
+        positions = positions[self.skip:stop]
+        self._result = (version, positions)
+        return positions
+
+    def count(self) -> int:
+        """Số dòng kết quả."""
+        return len(self.positions())
+
+    def fetch(self) -> pd.DataFrame:
+        """Các dòng kết quả (giữ nguyên mã dòng)."""
+        return self.data.iloc[self.positions()]
+
+    def page(self, page_size: int, current_page: int):
+        """
+        Lấy một trang của kết quả; chỉ các dòng của trang được lấy ra.
+        :return: DataFrame của trang và tổng số trang
+        """
+        positions = self.positions()
+        total_pages = math.ceil(len(positions) / page_size)
+        if current_page < 1 or current_page > total_pages:
+            raise ValueError("Trang không hợp lệ.")
+        start_idx = (current_page - 1) * page_size
+        return self.data.iloc[positions[start_idx:start_idx + page_size]], total_pages
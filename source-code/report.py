@@ -0,0 +1,125 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
+# Vẽ không cần màn hình (phải chọn trước khi import pyplot qua visualization)
+matplotlib.use('Agg')
+from schema import read_dataset
+from indexes import HIGH_RISK_LEVELS
+from cube import ContingencyCube
+from visualization import (plot_sleep_vs_depression, plot_marital_vs_depression, plot_age_distribution,
+                           plot_education_vs_depression, plot_employment_vs_depression)
+
+# Thư mục kết quả và định dạng mặc định
+OUTPUT_DIR = 'reports'
+FORMATS = ['png']
+
+# Các biểu đồ của báo cáo: tên -> (hàm vẽ, chỉ dùng các dòng nguy cơ cao như trong cửa sổ biểu đồ)
+CHARTS = {
+    'sleep': (plot_sleep_vs_depression, True),
+    'marital': (plot_marital_vs_depression, False),
+    'age': (plot_age_distribution, True),
+    'education': (plot_education_vs_depression, True),
+    'employment': (plot_employment_vs_depression, False),
+}
+
+def aggregate(file_path) -> ContingencyCube:
+    """
+    Đọc một file dữ liệu và tổng hợp khối đếm dùng chung cho mọi biểu đồ của file đó.
+    Không ghi cache cạnh file dữ liệu (báo cáo chỉ đọc các file đầu vào).
+    """
+    return ContingencyCube(read_dataset(file_path, use_cache=False))
+
+def render(cube, chart, paths):
+    """
+    Vẽ một biểu đồ từ khối đếm và lưu vào các đường dẫn paths (mỗi định dạng một file).
+    :return: Danh sách file đã ghi
+    """
+    plot, high_risk = CHARTS[chart]
+    plot(cube.restrict(HIGH_RISK_LEVELS) if high_risk else cube, save_path=paths)
+    return paths
+
+def _cohort_names(file_paths):
+    """
+    Tên thư mục kết quả của từng file dữ liệu: tên file (bỏ phần mở rộng); các file trùng tên ở các thư mục
+    khác nhau được thêm số thứ tự (data, data_2, ...).
+    """
+    names = {}
+    used = set()
+    for file_path in file_paths:
+        if file_path in names:
+            continue
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        name, number = stem, 1
+        while name in used:
+            number += 1
+            name = f'{stem}_{number}'
+        used.add(name)
+        names[file_path] = name
+    return names
+
+def _output_paths(output_dir, name, chart, formats):
+    folder = os.path.join(output_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    return [os.path.join(folder, f'{chart}.{fmt}') for fmt in formats]
+
+def render_report(file_paths, output_dir=OUTPUT_DIR, formats=FORMATS, workers=None, charts=None):
+    """
+    Vẽ các biểu đồ cho nhiều file dữ liệu trong process pool.
+    Mỗi file được tổng hợp một lần (một tác vụ), sau đó mỗi biểu đồ là một tác vụ riêng dùng khối đếm đó,
+    nên cả báo cáo một file lẫn nhiều file đều dùng hết các nhân.
+    :param workers: Số tiến trình (mặc định: số nhân)
+    :param charts: Tên các biểu đồ cần vẽ (mặc định: tất cả trong CHARTS)
+    :return: {file dữ liệu: danh sách file đã ghi} và {file dữ liệu: lỗi}
+    """
+    charts = list(charts or CHARTS)
+    names = _cohort_names(file_paths)
+    written = {file_path: [] for file_path in file_paths}
+    errors = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        aggregations = {executor.submit(aggregate, file_path): file_path for file_path in file_paths}
+        renders = {}
+        for future in as_completed(aggregations):
+            file_path = aggregations[future]
+            try:
+                cube = future.result()
+            except Exception as e:
+                errors[file_path] = e
+                continue
+            for chart in charts:
+                paths = _output_paths(output_dir, names[file_path], chart, formats)
+                renders[executor.submit(render, cube, chart, paths)] = file_path
+
+        for future in as_completed(renders):
+            file_path = renders[future]
+            try:
+                written[file_path].extend(future.result())
+            except Exception as e:
+                errors.setdefault(file_path, e)
+    return written, errors
+
+def main(argv=None):
+    """
+    Tạo báo cáo biểu đồ từ dòng lệnh, ví dụ:
+    python report.py cohort_1.csv cohort_2.csv --output reports --format png svg
+    """
+    parser = argparse.ArgumentParser(description="Vẽ các biểu đồ của visualization.py cho nhiều file dữ liệu.")
+    parser.add_argument('files', nargs='+', help="Các file CSV dữ liệu đã làm sạch")
+    parser.add_argument('--output', default=OUTPUT_DIR,
+                        help="Thư mục kết quả (mỗi file dữ liệu một thư mục con; tên trùng được thêm số thứ tự)")
+    parser.add_argument('--format', nargs='+', default=FORMATS, choices=['png', 'svg'], help="Định dạng file ảnh")
+    parser.add_argument('--charts', nargs='+', choices=list(CHARTS), help="Các biểu đồ cần vẽ (mặc định: tất cả)")
+    parser.add_argument('--workers', type=int, default=None, help="Số tiến trình (mặc định: số nhân)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    written, errors = render_report(args.files, args.output, args.format, args.workers, args.charts)
+    for file_path, error in errors.items():
+        print(f"Lỗi khi tạo báo cáo cho '{file_path}': {error}")
+    total = sum(len(paths) for paths in written.values())
+    print(f"Đã ghi {total} file biểu đồ cho {len(args.files) - len(errors)} file dữ liệu vào '{args.output}' "
+          f"trong {time.perf_counter() - start:.1f} giây.")
+
+if __name__ == '__main__':
+    main()
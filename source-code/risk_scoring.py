@@ -0,0 +1,142 @@
+import operator
+import numpy as np
+import pandas as pd
+from schema import CATEGORY_DTYPES
+
+# Bảng luật tính điểm rủi ro: (cột, điều kiện, giá trị so sánh, điểm)
+RULES = [
+    ('Income', '<', 20000, 1),
+    ('Physical Activity Level', '==', 'Sedentary', 1),
+    ('Smoking Status', '==', 'Current', 1),
+    ('History of Mental Illness', '==', 'Yes', 1),
+    ('Chronic Medical Conditions', '==', 'Yes', 1),
+    ('Sleep Patterns', '==', 'Poor', 1),
+    ('Employment Status', '==', 'Unemployed', 1),
+    ('Alcohol Consumption', '==', 'High', 1),
+    ('Dietary Habits', '==', 'Unhealthy', 1),
+    ('History of Substance Abuse', '==', 'Yes', 1),
+    ('Family History of Depression', '==', 'Yes', 1),
+]
+
+# Ngưỡng phân loại mức độ: (điểm tối thiểu, mức độ), xét từ cao xuống thấp
+BANDS = [
+    (8, 'Very High'),
+    (6, 'High'),
+    (4, 'Medium'),
+    (2, 'Low'),
+]
+DEFAULT_BAND = 'Very Low'
+
+# Cột lưu kết quả phân loại
+RISK_COLUMN = 'Depression Risk'
+
+# Các điều kiện được hỗ trợ trong bảng luật
+PREDICATES = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda values, options: np.isin(values, list(options)),
+}
+
+class RiskScorer:
+    """
+    Bộ tính điểm rủi ro được biên dịch từ bảng luật.
+    - Các luật trên cùng một cột phân loại được gộp thành một bảng tra cứu (lookup table) theo mã category,
+      nên mỗi cột chỉ cần một lượt duyệt số nguyên nhỏ.
+    - Cột số được so sánh trực tiếp và cộng dồn vào mảng điểm int8.
+    - Điểm được đổi sang mức độ bằng bảng tra cứu, trả về Categorical.
+    """
+
+    def __init__(self, rules=RULES, bands=BANDS, default_band=DEFAULT_BAND):
+        for _, predicate, _, _ in rules:
+            if predicate not in PREDICATES:
+                raise ValueError(f"Điều kiện '{predicate}' không được hỗ trợ.")
+        self.rules = list(rules)
+        self.rules_by_column = {}
+        for column, predicate, value, weight in self.rules:
+            self.rules_by_column.setdefault(column, []).append((predicate, value, weight))
+
+        # Khoảng điểm có thể có, dùng để chọn kiểu số nguyên và dựng bảng tra cứu mức độ
+        self.min_score = sum(min(weight, 0) for *_, weight in self.rules)
+        self.max_score = sum(max(weight, 0) for *_, weight in self.rules)
+        self.score_dtype = np.int8 if -128 <= self.min_score and self.max_score <= 127 else np.int16
+
+        levels = [band for _, band in sorted(bands)]
+        ordered_levels = [default_band] + levels
+        if set(ordered_levels) == set(CATEGORY_DTYPES['Depression Risk'].categories):
+            self.band_dtype = CATEGORY_DTYPES['Depression Risk']
+        else:
+            self.band_dtype = pd.CategoricalDtype(ordered_levels, ordered=True)
+        band_codes = np.full(self.max_score - self.min_score + 1, self.band_dtype.categories.get_loc(default_band), dtype=np.int8)
+        for threshold, band in sorted(bands):
+            start = max(threshold - self.min_score, 0)
+            band_codes[start:] = self.band_dtype.categories.get_loc(band)
+        self.band_codes = band_codes
+
+    @property
+    def columns(self):
+        """Các cột đầu vào của bảng luật."""
+        return set(self.rules_by_column)
+
+    def _column_points(self, values: pd.Series, rules):
+        """
+        Tính bảng tra cứu điểm cho các giá trị phân biệt của một cột.
+        :return: (mảng điểm theo mã, mảng mã của từng dòng); mã -1 (giá trị thiếu) ứng với phần tử cuối
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = pd.Series(values.cat.categories)
+        else:
+            codes, uniques = pd.factorize(values)
+            uniques = pd.Series(uniques)
+        uniques = pd.concat([uniques.astype(object), pd.Series([np.nan], dtype=object)], ignore_index=True)
+
+        lut = np.zeros(len(uniques), dtype=self.score_dtype)
+        for predicate, value, weight in rules:
+            matches = PREDICATES[predicate](uniques, value)
+            lut += np.where(np.asarray(matches, dtype=bool), weight, 0).astype(self.score_dtype)
+        return lut, codes
+
+    def score(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Tính điểm rủi ro (int8) cho từng dòng trong một lượt duyệt mỗi cột.
+        """
+        scores = np.zeros(len(data), dtype=self.score_dtype)
+        for column, rules in self.rules_by_column.items():
+            values = data[column]
+            if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+                array = values.to_numpy()
+                for predicate, value, weight in rules:
+                    np.add(scores, self.score_dtype(weight), out=scores, where=np.asarray(PREDICATES[predicate](array, value)))
+            else:
+                lut, codes = self._column_points(values, rules)
+                np.add(scores, lut[codes], out=scores)
+        return scores
+
+    def band(self, scores: np.ndarray) -> pd.Categorical:
+        """
+        Đổi điểm rủi ro sang mức độ trầm cảm (Categorical).
+        """
+        return pd.Categorical.from_codes(self.band_codes[scores.astype(np.intp) - self.min_score], dtype=self.band_dtype)
+
+    def score_batch(self, data: pd.DataFrame):
+        """
+        Tính điểm và mức độ cho một DataFrame hoặc một khối dữ liệu.
+        :return: Tuple (Series điểm int8, Series mức độ Categorical), cùng index với data
+        """
+        scores = self.score(data)
+        return (pd.Series(scores, index=data.index, name='Risk Score'),
+                pd.Series(self.band(scores), index=data.index, name='Depression Risk'))
+
+# Bộ tính điểm mặc định theo bảng luật ở trên
+default_scorer = RiskScorer()
+
+def score_batch(data: pd.DataFrame, scorer=None):
+    """
+    Tính điểm và mức độ trầm cảm cho DataFrame hoặc khối dữ liệu bằng bộ tính điểm (mặc định: default_scorer).
+    :return: Tuple (Series điểm int8, Series mức độ Categorical)
+    """
+    return (scorer or default_scorer).score_batch(data)
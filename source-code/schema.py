@@ -0,0 +1,111 @@
+import sys
+import numpy as np
+import pandas as pd
+from sidecar_cache import load_cached, store_cached
+
+# Miền giá trị hợp lệ của các cột phân loại (thứ tự các giá trị là thứ tự cố định của category)
+VALID_VALUES = {
+    "Smoking Status": ["Non-smoker", "Former", "Current"],
+    "Physical Activity Level": ["Sedentary", "Moderate", "Active"],
+    "Employment Status": ["Employed", "Unemployed"],
+    "Alcohol Consumption": ["Low", "Moderate", "High"],
+    "Dietary Habits": ["Healthy", "Moderate", "Unhealthy"],
+    "Sleep Patterns": ["Poor", "Good", "Fair"],
+    "History of Mental Illness": ["Yes", "No"],
+    "History of Substance Abuse": ["Yes", "No"],
+    "Family History of Depression": ["Yes", "No"],
+    "Chronic Medical Conditions": ["Yes", "No"],
+    "Marital Status": ["Single", "Married", "Divorced", "Widowed"],
+    "Education Level": ["High School", "Bachelor's Degree", "Master's Degree", "Associate Degree", "PhD"],
+    "Depression Risk": ["Very Low", "Low", "Medium", "High", "Very High"]
+}
+
+# Các cột phân loại có thứ tự tự nhiên
+ORDERED_COLUMNS = {"Depression Risk"}
+
+# Kiểu dữ liệu pandas cho từng cột phân loại
+CATEGORY_DTYPES = {
+    col: pd.CategoricalDtype(values, ordered=col in ORDERED_COLUMNS)
+    for col, values in VALID_VALUES.items()
+}
+
+# Kiểu dữ liệu thu gọn cho các cột số
+NUMERIC_DTYPES = {
+    "Age": "int8",
+    "Number of Children": "int8",
+    "Income": "float32",
+}
+
+def downcast_numeric(series: pd.Series, dtype) -> pd.Series:
+    """
+    Thu gọn cột số về kiểu dtype nếu giá trị vừa với kiểu đó.
+    Cột số nguyên có giá trị thiếu hoặc vượt giới hạn sẽ được giữ nguyên.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return series.astype(dtype)
+    if series.isna().any():
+        return series
+    info = np.iinfo(dtype)
+    if series.empty or (series.min() >= info.min and series.max() <= info.max):
+        return series.astype(dtype)
+    return series
+
+def apply_schema(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Chuyển các cột phân loại sang Categorical với thứ tự cố định và thu gọn các cột số.
+    Giá trị nằm ngoài miền hợp lệ sẽ trở thành NaN.
+    """
+    for col, dtype in CATEGORY_DTYPES.items():
+        if col in data.columns and data[col].dtype != dtype:
+            data[col] = data[col].astype(dtype)
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in data.columns and pd.api.types.is_numeric_dtype(data[col]):
+            data[col] = downcast_numeric(data[col], dtype)
+    return data
+
+def plain_memory_usage(data: pd.DataFrame) -> int:
+    """
+    Ước tính bộ nhớ (byte) của DataFrame nếu đọc bằng pd.read_csv thông thường:
+    cột phân loại là chuỗi object, cột số là 64-bit.
+    """
+    total = data.index.memory_usage()
+    for col in data.columns:
+        series = data[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Mỗi ô object gồm con trỏ 8 byte và đối tượng chuỗi riêng
+            sizes = np.array([sys.getsizeof(value) for value in series.cat.categories] + [sys.getsizeof(np.nan)])
+            total += int(sizes[series.cat.codes.to_numpy()].sum()) + 8 * len(series)
+        elif pd.api.types.is_numeric_dtype(series):
+            total += 8 * len(series)
+        else:
+            total += int(series.memory_usage(index=False, deep=True))
+    return total
+
+def read_dataset(file_path, report=False, use_cache=True) -> pd.DataFrame:
+    """
+    Đọc file CSV theo schema: cột phân loại được đọc trực tiếp thành Categorical, cột số được thu gọn.
+    :param file_path: Đường dẫn file CSV
+    :param report: In ra bộ nhớ sử dụng trước và sau khi áp dụng schema
+    :param use_cache: Dùng cache nhị phân cạnh file CSV (tạo mới nếu chưa có hoặc đã cũ)
+    :return: DataFrame theo schema
+    """
+    data = load_cached(file_path) if use_cache else None
+    if data is None:
+        columns = pd.read_csv(file_path, nrows=0).columns
+        dtypes = {col: dtype for col, dtype in CATEGORY_DTYPES.items() if col in columns}
+        if "Income" in columns:
+            dtypes["Income"] = NUMERIC_DTYPES["Income"]
+        data = apply_schema(pd.read_csv(file_path, dtype=dtypes))
+        if use_cache:
+            try:
+                store_cached(file_path, data)
+            except OSError as e:
+                print(f"Không thể ghi cache cho '{file_path}': {e}")
+
+    if report:
+        before = plain_memory_usage(data)
+        after = int(data.memory_usage(deep=True).sum())
+        print(f"Bộ nhớ dữ liệu '{file_path}': {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB "
+              f"(giảm {before / max(after, 1):.1f} lần).")
+    return data
@@ -1,8 +1,14 @@
+import math
 import pandas as pd
 import numpy as np
+from schema import read_dataset
+from indexes import high_risk_view
+from sort_index import sorted_index, sort_key
 
 # Đường dẫn file CSV
 CSV_FILE = "dataset\\cleaned_and_predicted_data.csv"
+# File lưu các dòng nguy cơ trầm cảm cao
+FILTERED_FILE = "dataset\\filtered_depression_data.csv"
 
 # Đọc dữ liệu từ file CSV
 def read_csv_data():
@@ -11,7 +17,7 @@ def read_csv_data():
     :return: DataFrame chứa dữ liệu
     """
     try:
-        data = pd.read_csv(CSV_FILE)
+        data = read_dataset(CSV_FILE)
         print(f"Đã đọc thành công dữ liệu từ file '{CSV_FILE}'.")
         return data
     except FileNotFoundError:
@@ -21,28 +27,191 @@ def read_csv_data():
         print(f"Lỗi khi đọc file: {e}")
         return pd.DataFrame()
                
+class SortedView:
+    """
+    Dữ liệu đã sắp xếp ở dạng lười: chỉ giữ DataFrame gốc và hoán vị vị trí dòng.
+    Các dòng chỉ được lấy ra khi cần, ví dụ view.iloc[a:b] trong paginate_data chỉ lấy một trang.
+    """
+
+    def __init__(self, data, permutation):
+        self.data = data
+        self.permutation = permutation
+
+    def __len__(self):
+        return len(self.permutation)
+
+    @property
+    def columns(self):
+        return self.data.columns
+
+    @property
+    def iloc(self):
+        return _ViewLocator(self)
+
+    def to_frame(self):
+        """Lấy toàn bộ các dòng theo thứ tự đã sắp xếp (giữ nguyên mã dòng)."""
+        return self.data.take(self.permutation)
+
+class _ViewLocator:
+    def __init__(self, view):
+        self.view = view
+
+    def __getitem__(self, key):
+        return self.view.data.iloc[self.view.permutation[key]]
+
+def sort_permutation(data, keys, positions=None):
+    """
+    Hoán vị sắp xếp ổn định theo nhiều cột.
+    :param keys: Danh sách (cột, ascending) theo thứ tự ưu tiên giảm dần
+    :param positions: Chỉ sắp xếp các vị trí dòng này (tăng dần; mặc định: tất cả các dòng)
+    :return: Mảng vị trí dòng
+    """
+    for column, _ in keys:
+        if column not in data.columns:
+            raise ValueError(f"Cột '{column}' không tồn tại.")
+    # Một khóa và tập dòng đủ lớn: lọc hoán vị đã lưu của cả cột thay vì sắp xếp lại
+    if len(keys) == 1 and (positions is None or len(positions) * 8 >= len(data)):
+        column, ascending = keys[0]
+        order = sort_key(data, column).permutation(data, ascending)
+        if positions is None:
+            return order
+        selected = np.zeros(len(data), dtype=bool)
+        selected[positions] = True
+        return order[selected[order]]
+
+    rank_arrays, sizes = [], []
+    for column, ascending in keys:
+        ranks, levels = sort_key(data, column).get_ranks(data)
+        if positions is not None:
+            ranks = ranks[positions]
+        if not ascending and levels:
+            ranks = np.where(ranks < levels, levels - 1 - ranks, ranks)
+        rank_arrays.append(ranks)
+        sizes.append(levels + 1)
+
+    # Gộp các thứ hạng thành một khóa số nguyên duy nhất nếu không tràn số
+    total = math.prod(sizes)
+    if total >= 2 ** 63:
+        # np.lexsort dùng khóa cuối cùng làm khóa chính
+        order = np.lexsort(rank_arrays[::-1])
+    else:
+        dtype = np.min_scalar_type(total - 1)
+        combined = np.zeros(len(rank_arrays[0]), dtype=dtype)
+        for ranks, size in zip(rank_arrays, sizes):
+            combined *= dtype.type(size)
+            combined += ranks.astype(dtype)
+        order = np.argsort(combined, kind='stable')
+    return order if positions is None else positions[order]
+
+def sorted_view(data, keys):
+    """
+    Sắp xếp lười theo danh sách (cột, ascending); hoán vị của từng cột được lưu lại cho tới khi dữ liệu thay đổi.
+    """
+    return SortedView(data, sort_permutation(data, keys))
+
 def sort_data(data, column, ascending=True):
-    """Sắp xếp dữ liệu theo cột."""
+    """Sắp xếp dữ liệu theo cột (ổn định, giữ nguyên mã dòng)."""
+    return sorted_view(data, [(column, ascending)]).to_frame()
+
+def _dictionary_mask(series, value):
+    """
+    So khớp value với các giá trị phân biệt (từ điển) của cột một lần,
+    sau đó chọn dòng bằng bảng tra cứu theo mã (một lượt duyệt số nguyên).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    matched = pd.Series(uniques).astype(str).str.contains(value, case=False, na=False).to_numpy(dtype=bool)
+    # Mã -1 (giá trị thiếu) ứng với phần tử cuối của bảng tra cứu
+    lut = np.append(matched, False)
+    return lut[codes]
+
+def _numeric_mask(series, value):
+    """
+    Lọc cột số theo giá trị bằng (không chuyển sang chuỗi).
+    :return: Mảng boolean, hoặc None nếu value không phải là số
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    dtype = series.dtype
+    if pd.api.types.is_integer_dtype(dtype):
+        info = np.iinfo(dtype)
+        if not number.is_integer() or not info.min <= number <= info.max:
+            return np.zeros(len(series), dtype=bool)
+    return series.to_numpy() == dtype.type(number)
+
+def filter_mask(data, column, value) -> np.ndarray:
+    """
+    Mảng boolean các dòng có giá trị trong cột chứa chuỗi value.
+    Cột số với value là số: so sánh bằng.
+    """
     if column not in data.columns:
         raise ValueError(f"Cột '{column}' không tồn tại.")
-    return data.sort_values(by=column, ascending=ascending, ignore_index=True)
+    series = data[column]
+    mask = None
+    if pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+        mask = _numeric_mask(series, value)
+    if mask is None:
+        mask = _dictionary_mask(series, value)
+    return mask
 
 def filter_data(data, column, value):
-    if column not in data.columns:
-        raise ValueError(f"Cột '{column}' không tồn tại.")
-    return data[data[column].astype(str).str.contains(value, case=False, na=False)].reset_index(drop=True)
+    """
+    Lọc các dòng có giá trị trong cột chứa chuỗi value (giữ nguyên mã dòng).
+    Cột số với value là số: lọc theo giá trị bằng.
+    """
+    return data[filter_mask(data, column, value)]
+
+def filter_range(data, column, low=None, high=None):
+    """
+    Lọc các dòng có giá trị cột số trong khoảng [low, high] (None: không giới hạn).
+    """
+    return filter_ranges(data, {column: (low, high)})
+
+def filter_ranges(data, ranges):
+    """
+    Lọc theo nhiều khoảng giá trị cùng lúc, ví dụ {'Income': (None, 19999), 'Age': (30, 40)}.
+    Mỗi khoảng được trả lời bằng chỉ mục sắp xếp của cột (sort_index.sorted_index), giữ nguyên thứ tự dòng.
+    """
+    mask = range_mask(data, ranges)
+    return data if mask is None else data[mask]
+
+def range_mask(data, ranges):
+    """
+    Mảng boolean các dòng thỏa mãn mọi khoảng {cột: (low, high)}, hoặc None nếu không có khoảng nào.
+    """
+    mask = None
+    for column, (low, high) in ranges.items():
+        if column not in data.columns:
+            raise ValueError(f"Cột '{column}' không tồn tại.")
+        if not pd.api.types.is_numeric_dtype(data[column].dtype) or isinstance(data[column].dtype, pd.CategoricalDtype):
+            raise ValueError(f"Cột '{column}' không phải là cột số.")
+        positions = data.index.get_indexer(sorted_index(data, column).between(low, high))
+        column_mask = np.zeros(len(data), dtype=bool)
+        column_mask[positions[positions >= 0]] = True
+        mask = column_mask if mask is None else mask & column_mask
+    return mask
 
 # Lọc dữ liệu nguy cơ trầm cảm cao
-def filter_depression_risk(data):
+def filter_depression_risk(data, rebuild=False):
     """
-    Lọc các dòng có giá trị 'High' hoặc 'Very High' trong cột 'Depression Risk'.
+    Lọc các dòng có giá trị 'High' hoặc 'Very High' trong cột 'Depression Risk' và lưu vào file FILTERED_FILE.
+    Tập dòng được duy trì tăng dần qua các thao tác crud (indexes.high_risk_view), không duyệt lại toàn bộ cột.
+    :param rebuild: Tính lại tập dòng từ đầu
     """
     column = 'Depression Risk'
     if column not in data.columns:
         print(f"Lỗi: Cột '{column}' không tồn tại trong dữ liệu.")
         return pd.DataFrame()
-    filtered_data = data[data[column].isin(['High', 'Very High'])]
+    view = high_risk_view(data)
+    if rebuild:
+        view.rebuild(data)
+    filtered_data = view.rows(data)
     print(f"Đã lọc thành công {len(filtered_data)} dòng có nguy cơ trầm cảm cao.")
-    filtered_data.to_csv("filtered_depression_data.csv", index=False)
-    print("Đã lưu trữ dữ liệu vào file 'filtered_depression_data.csv'.")
+    filtered_data.to_csv(FILTERED_FILE, index=False)
+    print(f"Đã lưu trữ dữ liệu vào file '{FILTERED_FILE}'.")
     return filtered_data
@@ -0,0 +1,244 @@
+import threading
+from collections import defaultdict
+from functools import reduce
+import numpy as np
+import pandas as pd
+from indexes import get_index
+
+# Tỉ lệ thay đổi (dòng bị xóa hoặc giá trị bị thay) so với số dòng để xây dựng lại chỉ mục
+REBUILD_RATIO = 0.2
+REBUILD_MIN_CHANGES = 1000
+# Số dòng tìm thấy trước lần báo kết quả tạm thời đầu tiên (tìm kiếm khi đang gõ); các lần sau cách nhau gấp đôi
+PARTIAL_ROWS = 50_000
+
+def _trigrams(text):
+    """
+    Tập các chuỗi con độ dài 3 của text.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """
+    Chỉ mục ngược (inverted index) theo trigram trên dạng chuỗi của mọi cột, dùng cho tìm kiếm chuỗi con
+    không phân biệt hoa thường.
+    - Mỗi giá trị phân biệt (cột, chuỗi) có một mã giá trị; trigram -> mảng mã giá trị đã sắp xếp.
+    - Mã giá trị -> mảng mã dòng đã sắp xếp (posting list).
+    Truy vấn: giao các posting list của trigram, kiểm tra lại chuỗi con trên các giá trị ứng viên
+    (số giá trị phân biệt nhỏ hơn nhiều so với số dòng), rồi hợp các posting list dòng.
+    Chỉ mục được cập nhật tăng dần khi thêm/sửa/xóa qua crud.
+    Kết quả lần tìm trước được giữ lại: tìm lại cùng chuỗi trả về ngay, chuỗi mới chứa chuỗi trước (gõ thêm ký tự)
+    chỉ cần kiểm tra lại các giá trị đã khớp. Có thể dùng từ luồng nền (có khóa).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.lock = threading.RLock()
+        self.generation = 0
+        self._build(data)
+
+    def _build(self, data):
+        self.columns = list(data.columns)
+        self.values = []          # mã giá trị -> chuỗi chữ thường (None với giá trị thiếu, không tìm được)
+        self.value_column = []    # mã giá trị -> tên cột
+        self.value_ids = {}       # (cột, chuỗi gốc) -> mã giá trị
+        self.rows = []            # mã giá trị -> mảng mã dòng đã sắp xếp
+        self.trigrams = {}        # trigram -> mảng mã giá trị đã sắp xếp
+
+        # Các thay đổi chưa gộp vào mảng (gộp khi đọc)
+        self.pending_trigrams = defaultdict(list)
+        self.pending_rows = defaultdict(list)
+        self.removed_rows = defaultdict(set)
+        self.deleted = set()
+        self.changes = 0
+        self.size = len(data)
+        self.stale = False
+        self.last = None
+
+        labels = data.index.to_numpy()
+        trigram_lists = defaultdict(list)
+        for col in self.columns:
+            codes, uniques = pd.factorize(data[col], use_na_sentinel=False)
+            order = np.lexsort((labels, codes))
+            sorted_labels = labels[order]
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            for code, value in enumerate(uniques):
+                value_id = self._add_value(col, value)
+                self.rows.append(sorted_labels[bounds[code]:bounds[code + 1]])
+                if self.values[value_id] is not None:
+                    for trigram in _trigrams(self.values[value_id]):
+                        trigram_lists[trigram].append(value_id)
+        self.trigrams = {trigram: np.array(ids, dtype=np.int64) for trigram, ids in trigram_lists.items()}
+
+    # ----- Đọc chỉ mục -----
+
+    def _trigram_posting(self, trigram):
+        posting = self.trigrams.get(trigram)
+        pending = self.pending_trigrams.pop(trigram, None)
+        if pending:
+            extra = np.array(pending, dtype=np.int64)
+            posting = extra if posting is None else np.concatenate([posting, extra])
+            self.trigrams[trigram] = posting
+        return posting if posting is not None else np.empty(0, dtype=np.int64)
+
+    def _value_rows(self, value_id):
+        rows = self.rows[value_id]
+        pending = self.pending_rows.pop(value_id, None)
+        if pending:
+            rows = np.sort(np.concatenate([rows, np.array(pending, dtype=rows.dtype if len(rows) else np.int64)]))
+        removed = self.removed_rows.pop(value_id, None)
+        if removed:
+            rows = rows[~np.isin(rows, list(removed))]
+        self.rows[value_id] = rows
+        return rows
+
+    def matching_values(self, query, columns=None):
+        """
+        Các mã giá trị có chuỗi chứa query (không phân biệt hoa thường).
+        """
+        query = query.lower()
+        columns_key = tuple(sorted(columns)) if columns else None
+        last = self.last
+        if last is not None and last['query'] in query and last['columns'] == columns_key \
+                and last['values'] == len(self.values):
+            # Chuỗi mới chứa chuỗi trước: chỉ các giá trị đã khớp trước đó mới có thể khớp
+            candidates = last['value_ids']
+        elif len(query) >= 3:
+            postings = sorted((self._trigram_posting(t) for t in _trigrams(query)), key=len)
+            candidates = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), postings)
+        else:
+            candidates = range(len(self.values))
+        columns = set(columns) if columns else None
+        return [value_id for value_id in candidates
+                if self.values[value_id] is not None and query in self.values[value_id]
+                and (columns is None or self.value_column[value_id] in columns)]
+
+    def search(self, data: pd.DataFrame, query, columns=None, on_partial=None, cancelled=None):
+        """
+        Tìm các dòng có ít nhất một cột chứa query.
+        :param data: DataFrame mà chỉ mục thuộc về (dùng để xây dựng lại khi cần)
+        :param columns: Chỉ tìm trong các cột này (mặc định: tất cả các cột)
+        :param on_partial: Gọi on_partial(mảng mã dòng đã tìm thấy) sau PARTIAL_ROWS, 2*PARTIAL_ROWS, 4*PARTIAL_ROWS... dòng
+        :param cancelled: Hàm trả về True khi cần dừng tìm kiếm
+        :return: Mảng mã dòng đã sắp xếp, hoặc None nếu bị dừng
+        """
+        with self.lock:
+            if self.stale or self.changes > max(REBUILD_MIN_CHANGES, REBUILD_RATIO * self.size):
+                self._build(data)
+
+            query = query.lower()
+            columns_key = tuple(sorted(columns)) if columns else None
+            last = self.last
+            if last is not None and (last['query'], last['columns'], last['generation']) == (query, columns_key, self.generation):
+                return last['rows']
+
+            value_ids = self.matching_values(query, columns)
+            parts = [self._value_rows(value_id) for value_id in value_ids]
+            parts = [rows for rows in parts if len(rows)]
+            rows = np.empty(0, dtype=np.int64)
+            if parts:
+                # Hợp các posting list bằng mảng đánh dấu theo mã dòng (không cần sắp xếp lại)
+                marked = np.zeros(max(int(rows[-1]) for rows in parts) + 1, dtype=bool)
+                deleted = np.fromiter(self.deleted, dtype=np.int64)
+                deleted = deleted[deleted < len(marked)]
+                total, threshold = 0, PARTIAL_ROWS
+                for part in parts:
+                    marked[part] = True
+                    total += len(part)
+                    if total >= threshold:
+                        threshold *= 2
+                        if cancelled is not None and cancelled():
+                            return None
+                        if on_partial is not None:
+                            found = marked.copy()
+                            found[deleted] = False
+                            on_partial(np.flatnonzero(found))
+                marked[deleted] = False
+                rows = np.flatnonzero(marked)
+
+            self.last = {'query': query, 'columns': columns_key, 'generation': self.generation,
+                         'values': len(self.values), 'value_ids': value_ids, 'rows': rows}
+            return rows
+
+    # ----- Cập nhật tăng dần -----
+
+    def _add_value(self, col, value):
+        value_id = len(self.values)
+        self.values.append(None if pd.isna(value) else str(value).lower())
+        self.value_column.append(col)
+        self.value_ids[(col, str(value))] = value_id
+        return value_id
+
+    def _value_id(self, col, value):
+        value_id = self.value_ids.get((col, str(value)))
+        if value_id is None:
+            value_id = self._add_value(col, value)
+            self.rows.append(np.empty(0, dtype=np.int64))
+            if self.values[value_id] is not None:
+                for trigram in _trigrams(self.values[value_id]):
+                    self.pending_trigrams[trigram].append(value_id)
+        return value_id
+
+    def on_insert(self, data, row_ids):
+        with self.lock:
+            self.generation += 1
+            self._insert(data, row_ids)
+
+    def _insert(self, data, row_ids):
+        for row_id in row_ids:
+            if row_id in self.deleted:
+                # Mã dòng được dùng lại: các posting list cũ không còn đúng
+                self.stale = True
+                return
+            for col in self.columns:
+                self.pending_rows[self._value_id(col, data.at[row_id, col])].append(row_id)
+        self.size += len(row_ids)
+
+    def on_delete(self, data, row_ids):
+        with self.lock:
+            self.generation += 1
+            self._delete(row_ids)
+
+    def _delete(self, row_ids):
+        self.deleted.update(row_ids)
+        self.changes += len(row_ids)
+        self.size -= len(row_ids)
+
+    def on_update(self, data, row_id, old_values, new_values):
+        with self.lock:
+            self.generation += 1
+            self._update(row_id, old_values, new_values)
+
+    def _update(self, row_id, old_values, new_values):
+        for col, value in new_values.items():
+            if col not in self.columns or str(old_values.get(col)) == str(value):
+                continue
+            old_id = self.value_ids.get((col, str(old_values.get(col))))
+            if old_id is not None:
+                self.removed_rows[old_id].add(row_id)
+            self.pending_rows[self._value_id(col, value)].append(row_id)
+            self.changes += 1
+
+def search_index(data: pd.DataFrame) -> TrigramIndex:
+    """
+    Chỉ mục tìm kiếm của DataFrame (xây dựng một lần cho mỗi phiên bản dữ liệu, sau đó cập nhật tăng dần).
+    """
+    return get_index(data, 'search', TrigramIndex)
+
+def _row_positions(data, row_ids):
+    positions = data.index.get_indexer(row_ids)
+    return np.sort(positions[positions >= 0])
+
+def search_positions(data: pd.DataFrame, query, columns=None, on_partial=None, cancelled=None):
+    """
+    Vị trí (tăng dần) các dòng có giá trị (dạng chuỗi) chứa query.
+    :param on_partial: Gọi on_partial(vị trí các dòng đã tìm thấy) trong lúc tìm (kết quả tạm thời)
+    :param cancelled: Hàm trả về True khi cần dừng; khi đó trả về None
+    """
+    partial = None if on_partial is None else (lambda row_ids: on_partial(_row_positions(data, row_ids)))
+    row_ids = search_index(data).search(data, query, columns, on_partial=partial, cancelled=cancelled)
+    return None if row_ids is None else _row_positions(data, row_ids)
+
+def search_rows(data: pd.DataFrame, query, columns=None) -> pd.DataFrame:
+    """
+    Tìm các dòng có giá trị (dạng chuỗi) chứa query, giữ nguyên thứ tự dòng của data.
+    """
+    return data.iloc[search_positions(data, query, columns)]
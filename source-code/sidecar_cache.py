@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Phiên bản định dạng cache, tăng lên khi thay đổi cách lưu
+CACHE_FORMAT = 1
+
+def cache_dir(csv_path):
+    """
+    Thư mục cache nhị phân đặt cạnh file CSV.
+    """
+    return csv_path + '.cache'
+
+def _source_signature(csv_path):
+    """
+    Kích thước và thời gian sửa đổi của file CSV, dùng để phát hiện cache đã cũ.
+    """
+    file_stat = os.stat(csv_path)
+    return {'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns}
+
+def load_cached(csv_path):
+    """
+    Đọc DataFrame từ cache nhị phân nếu cache còn khớp với file CSV.
+    :return: DataFrame hoặc None nếu chưa có cache hoặc cache đã cũ
+    """
+    directory = cache_dir(csv_path)
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != CACHE_FORMAT or meta.get('source') != _source_signature(csv_path):
+            return None
+
+        columns = {}
+        for i, info in enumerate(meta['columns']):
+            values = np.load(os.path.join(directory, f'col_{i}.npy'))
+            if info['kind'] == 'category':
+                dtype = pd.CategoricalDtype(info['categories'], ordered=info['ordered'])
+                columns[info['name']] = pd.Categorical.from_codes(values, dtype=dtype)
+            elif info['kind'] == 'object':
+                # Mã -1 là giá trị thiếu
+                uniques = np.array(info['uniques'] + [np.nan], dtype=object)
+                columns[info['name']] = uniques[values]
+            else:
+                columns[info['name']] = values
+        return pd.DataFrame(columns)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+def store_cached(csv_path, data: pd.DataFrame):
+    """
+    Lưu DataFrame thành cache nhị phân dạng cột (mỗi cột một file .npy) cạnh file CSV.
+    Cột Categorical và cột chuỗi được lưu dưới dạng mã số nguyên kèm bảng giá trị.
+    """
+    directory = cache_dir(csv_path)
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    meta = {'format': CACHE_FORMAT, 'source': _source_signature(csv_path), 'columns': []}
+    for i, col in enumerate(data.columns):
+        series = data[col]
+        info = {'name': col}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            info.update(kind='category', categories=list(series.cat.categories), ordered=bool(series.cat.ordered))
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            info['kind'] = 'numeric'
+            values = series.to_numpy()
+        else:
+            codes, uniques = pd.factorize(series)
+            info.update(kind='object', uniques=[str(value) for value in uniques])
+            values = codes.astype(np.int32)
+        np.save(os.path.join(tmp_directory, f'col_{i}.npy'), values, allow_pickle=False)
+        meta['columns'].append(info)
+
+    with open(os.path.join(tmp_directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    # Thay thế cache cũ sau khi đã ghi xong
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+
+def invalidate_cache(csv_path):
+    """
+    Xóa cache nhị phân của file CSV.
+    """
+    shutil.rmtree(cache_dir(csv_path), ignore_errors=True)
@@ -0,0 +1,193 @@
+import math
+import numpy as np
+import pandas as pd
+from indexes import get_index, lock
+
+class SortedIndex:
+    """
+    Chỉ mục sắp xếp của một cột số: các giá trị đã sắp xếp (argsort) và mã dòng tương ứng.
+    Truy vấn khoảng [low, high] bằng searchsorted trong O(log n + k). Giá trị thiếu không có trong chỉ mục.
+    Các mảng chỉ được thay thế khi giữ indexes.lock (trong notify_*), nên truy vấn ở luồng nền luôn thấy một cặp khớp nhau.
+    """
+
+    def __init__(self, data: pd.DataFrame, column):
+        self.column = column
+        values = data[column].to_numpy()
+        keep = ~pd.isna(values)
+        order = np.argsort(values[keep], kind='stable')
+        self.values = values[keep][order]
+        self.row_ids = data.index.to_numpy()[keep][order]
+
+    def _bound(self, dtype, value, side):
+        """
+        Đổi cận sang kiểu dữ liệu của cột để searchsorted không phải chuyển kiểu cả mảng.
+        :return: Cận đã đổi kiểu, hoặc None nếu khoảng chắc chắn rỗng
+        """
+        if not np.issubdtype(dtype, np.integer):
+            return dtype.type(value)
+        info = np.iinfo(dtype)
+        if side == 'left':
+            value = max(math.ceil(value), info.min)
+            return dtype.type(value) if value <= info.max else None
+        value = min(math.floor(value), info.max)
+        return dtype.type(value) if value >= info.min else None
+
+    def between(self, low=None, high=None) -> np.ndarray:
+        """
+        Mã dòng có giá trị trong khoảng [low, high] (None: không giới hạn), theo thứ tự tăng dần của giá trị.
+        """
+        with lock:
+            values, row_ids = self.values, self.row_ids
+        start, stop = 0, len(values)
+        if low is not None:
+            low = self._bound(values.dtype, low, 'left')
+            if low is None:
+                return row_ids[:0]
+            start = np.searchsorted(values, low, side='left')
+        if high is not None:
+            high = self._bound(values.dtype, high, 'right')
+            if high is None:
+                return row_ids[:0]
+            stop = np.searchsorted(values, high, side='right')
+        return row_ids[start:max(start, stop)]
+
+    def _add(self, values, row_ids):
+        """
+        Chèn nhiều giá trị trong một lần trộn: sắp xếp k giá trị mới, tìm vị trí bằng searchsorted
+        rồi chèn cùng lúc bằng một lần np.insert, tổng cộng O(n + k log k) thay vì O(k * n) khi chèn từng giá trị.
+        """
+        values = np.asarray(values)
+        keep = ~pd.isna(values)
+        if not keep.any():
+            return
+        values = values[keep].astype(self.values.dtype)
+        row_ids = np.asarray(row_ids)[keep]
+        order = np.argsort(values, kind='stable')
+        values, row_ids = values[order], row_ids[order]
+        positions = np.searchsorted(self.values, values, side='right')
+        self.values = np.insert(self.values, positions, values)
+        self.row_ids = np.insert(self.row_ids, positions, row_ids)
+
+    def _remove(self, row_ids):
+        keep = ~np.isin(self.row_ids, list(row_ids))
+        self.values = self.values[keep]
+        self.row_ids = self.row_ids[keep]
+
+    def on_insert(self, data, row_ids):
+        row_ids = list(row_ids)
+        self._add(data.loc[row_ids, self.column].to_numpy(), row_ids)
+
+    def on_delete(self, data, row_ids):
+        self._remove(row_ids)
+
+    def on_update(self, data, row_id, old_values, new_values):
+        if self.column in new_values:
+            self._remove([row_id])
+            self._add([new_values[self.column]], [row_id])
+
+def sorted_index(data: pd.DataFrame, column) -> SortedIndex:
+    """
+    Chỉ mục sắp xếp của cột số column (xây dựng một lần, sau đó được crud cập nhật tăng dần).
+    """
+    return get_index(data, 'sorted:' + column, lambda frame: SortedIndex(frame, column))
+
+class SortKey:
+    """
+    Thứ hạng (dense rank, theo vị trí dòng) và hoán vị sắp xếp tăng dần ổn định của một cột.
+    - Cột Categorical không có thứ tự xếp theo bảng chữ cái, cột có thứ tự theo thứ tự category.
+    - Giá trị thiếu có thứ hạng lớn nhất và luôn đứng cuối (cả khi giảm dần).
+    - Hoán vị giảm dần được suy ra từ hoán vị tăng dần bằng cách đảo thứ tự các nhóm bằng nhau trong O(n).
+    Bị hủy khi dữ liệu của cột thay đổi và được tính lại ở lần dùng kế tiếp.
+    Kết quả được tính ngoài khóa (có thể ở luồng nền) và gắn với thế hệ (generation) lúc bắt đầu tính:
+    kết quả của thế hệ cũ (dữ liệu đã đổi trong lúc tính) được trả về cho lời gọi đó nhưng không được lưu.
+    """
+
+    def __init__(self, data: pd.DataFrame, column):
+        self.column = column
+        self.generation = 0
+        self._reset()
+
+    def _reset(self):
+        with lock:
+            self.generation += 1
+            self.state = None       # (thứ hạng, số mức, hoán vị tăng dần)
+            self.descending = None
+
+    def _compute(self, data):
+        series = data[self.column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            rank_of_code = np.arange(len(categories))
+            if not series.cat.ordered:
+                rank_of_code[np.argsort(np.asarray(categories, dtype=object), kind='stable')] = np.arange(len(categories))
+            levels = len(categories)
+            # Mã -1 (giá trị thiếu) ứng với phần tử cuối
+            ranks = np.append(rank_of_code, levels)[series.cat.codes.to_numpy()]
+        else:
+            codes, uniques = pd.factorize(series, sort=True)
+            levels = len(uniques)
+            ranks = np.where(codes < 0, levels, codes)
+        # Kiểu số nguyên không dấu nhỏ nhất (argsort ổn định trên số nguyên nhỏ dùng radix sort)
+        ranks = ranks.astype(np.min_scalar_type(levels))
+        return ranks, levels, np.argsort(ranks, kind='stable')
+
+    def _state(self, data):
+        """
+        (thứ hạng, số mức, hoán vị tăng dần) khớp nhau, cùng thế hệ của chúng.
+        """
+        with lock:
+            state, generation = self.state, self.generation
+        if state is None:
+            state = self._compute(data)
+            with lock:
+                if self.generation == generation:
+                    self.state = state
+        return state, generation
+
+    def get_ranks(self, data: pd.DataFrame):
+        """
+        Thứ hạng của từng dòng (theo vị trí) và số mức (thứ hạng của giá trị thiếu).
+        :return: Tuple (thứ hạng, số mức)
+        """
+        (ranks, levels, _), _ = self._state(data)
+        return ranks, levels
+
+    def permutation(self, data: pd.DataFrame, ascending=True) -> np.ndarray:
+        """
+        Hoán vị vị trí dòng sắp xếp ổn định theo cột (các dòng bằng nhau giữ thứ tự ban đầu).
+        """
+        (ranks, levels, order), generation = self._state(data)
+        if ascending:
+            return order
+        with lock:
+            descending = self.descending if self.generation == generation else None
+        if descending is None:
+            present = order[:np.searchsorted(ranks[order], levels)]
+            sorted_ranks = ranks[present]
+            starts = np.flatnonzero(np.r_[True, sorted_ranks[1:] != sorted_ranks[:-1]]) if len(present) else np.empty(0, dtype=np.intp)
+            lengths = np.diff(np.r_[starts, len(present)])
+            # Đảo thứ tự các nhóm, giữ nguyên thứ tự trong từng nhóm
+            reversed_starts, reversed_lengths = starts[::-1], lengths[::-1]
+            targets = np.cumsum(reversed_lengths) - reversed_lengths
+            positions = np.repeat(reversed_starts - targets, reversed_lengths) + np.arange(len(present))
+            descending = np.concatenate([present[positions], order[len(present):]])
+            with lock:
+                if self.generation == generation:
+                    self.descending = descending
+        return descending
+
+    def on_insert(self, data, row_ids):
+        self._reset()
+
+    def on_delete(self, data, row_ids):
+        self._reset()
+
+    def on_update(self, data, row_id, old_values, new_values):
+        if self.column in new_values:
+            self._reset()
+
+def sort_key(data: pd.DataFrame, column) -> SortKey:
+    """
+    Thứ hạng và hoán vị sắp xếp (được lưu lại) của cột column.
+    """
+    return get_index(data, 'sort:' + column, lambda frame: SortKey(frame, column))
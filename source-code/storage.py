@@ -0,0 +1,267 @@
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import pandas as pd
+import journal
+from schema import VALID_VALUES, NUMERIC_DTYPES, apply_schema
+
+class StorageBackend(ABC):
+    """
+    Giao diện chung của nơi lưu trữ dữ liệu dùng bởi module crud.
+    Mỗi bản ghi được xác định bằng mã dòng ổn định (index của DataFrame).
+    Lớp con phải cài đặt các phương thức trừu tượng; các phương thức còn lại có cài đặt mặc định.
+    """
+
+    @abstractmethod
+    def load(self, report=False) -> pd.DataFrame:
+        """Đọc toàn bộ dữ liệu thành DataFrame."""
+
+    def preview(self, rows) -> pd.DataFrame:
+        """Đọc nhanh rows bản ghi đầu tiên (không đọc toàn bộ dữ liệu)."""
+        return self.page(rows, 1)
+
+    @abstractmethod
+    def next_row_id(self, data: pd.DataFrame) -> int:
+        """Cấp mã dòng mới cho bản ghi sắp thêm."""
+
+    @abstractmethod
+    def insert(self, row_id, entry):
+        """Lưu bản ghi mới."""
+
+    def insert_many(self, rows, positions=None):
+        """
+        Lưu nhiều bản ghi mới: danh sách (row_id, {cột: giá trị}).
+        :param positions: Vị trí của từng bản ghi trong dữ liệu sau khi thêm (mặc định: cuối dữ liệu);
+            nơi lưu trữ không giữ thứ tự dòng có thể bỏ qua
+        """
+        for row_id, entry in rows:
+            self.insert(row_id, entry)
+
+    @abstractmethod
+    def update(self, row_id, values):
+        """Lưu các giá trị mới của một bản ghi."""
+
+    def update_many(self, updates):
+        """Lưu giá trị mới của nhiều bản ghi: danh sách (row_id, {cột: giá trị})."""
+        for row_id, values in updates:
+            self.update(row_id, values)
+
+    @abstractmethod
+    def delete(self, row_ids):
+        """Xóa các bản ghi."""
+
+    def count(self, filters=None) -> int:
+        """Đếm số bản ghi thỏa mãn bộ lọc {cột: giá trị hoặc danh sách giá trị}."""
+        data = _apply_filters(self.load(), filters)
+        return len(data)
+
+    def page(self, page_size, current_page, filters=None) -> pd.DataFrame:
+        """Lấy một trang dữ liệu thỏa mãn bộ lọc."""
+        data = _apply_filters(self.load(), filters)
+        start_idx = (current_page - 1) * page_size
+        return data.iloc[start_idx:start_idx + page_size]
+
+    def needs_compaction(self) -> bool:
+        """Có nhiều thay đổi chưa được gộp vào nơi lưu trữ chính (nên gọi compact)."""
+        return False
+
+    def compact(self):
+        """Gộp các thay đổi vào nơi lưu trữ chính (nếu có)."""
+        return None
+
+def _apply_filters(data, filters):
+    """
+    Lọc DataFrame theo dictionary {cột: giá trị hoặc danh sách giá trị}.
+    """
+    for col, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            data = data[data[col].isin(list(value))]
+        else:
+            data = data[data[col] == value]
+    return data
+
+class CsvJournalBackend(StorageBackend):
+    """
+    Lưu trữ bằng file CSV gốc kèm nhật ký thay đổi (module journal).
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+
+    def load(self, report=False):
+        return journal.load(self.csv_path, report=report)
+
+    def preview(self, rows):
+        return journal.preview(self.csv_path, rows)
+
+    def next_row_id(self, data):
+        return journal.next_row_id(self.csv_path, data)
+
+    def insert(self, row_id, entry):
+        journal.log_insert(self.csv_path, row_id, entry)
+
+    def insert_many(self, rows, positions=None):
+        journal.log_inserts(self.csv_path, rows, positions)
+
+    def update(self, row_id, values):
+        journal.log_update(self.csv_path, row_id, values)
+
+    def update_many(self, updates):
+        journal.log_updates(self.csv_path, updates)
+
+    def delete(self, row_ids):
+        journal.log_delete(self.csv_path, row_ids)
+
+    def needs_compaction(self):
+        return journal.needs_compaction(self.csv_path)
+
+    def compact(self):
+        journal.compact(self.csv_path)
+
+# Các cột được đánh chỉ mục trong SQLite
+SQLITE_INDEXED_COLUMNS = ["Name"] + list(VALID_VALUES)
+
+def _quote(column):
+    """
+    Đặt tên cột trong dấu nháy kép để dùng trong câu lệnh SQL.
+    """
+    return '"' + column.replace('"', '""') + '"'
+
+class SQLiteBackend(StorageBackend):
+    """
+    Lưu trữ bằng cơ sở dữ liệu SQLite trên đĩa.
+    Phân trang, lọc và đếm chạy bằng câu lệnh SQL (có chỉ mục) mà không cần đọc toàn bộ dữ liệu.
+    Chế độ WAL cho phép nhiều tiến trình đọc cùng lúc.
+    """
+    TABLE = 'records'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._columns = None
+
+    @contextmanager
+    def _connect(self):
+        """
+        Mở kết nối mới cho mỗi thao tác (an toàn khi dùng từ nhiều luồng), tự commit và đóng.
+        """
+        connection = sqlite3.connect(self.db_path)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @property
+    def columns(self):
+        """Danh sách cột dữ liệu (không gồm row_id)."""
+        if self._columns is None:
+            with self._connect() as connection:
+                info = connection.execute(f'PRAGMA table_info({self.TABLE})').fetchall()
+            self._columns = [row[1] for row in info if row[1] != 'row_id']
+        return self._columns
+
+    @classmethod
+    def from_csv(cls, csv_path, db_path, chunksize=100_000):
+        """
+        Tạo cơ sở dữ liệu SQLite từ file CSV (đọc theo từng khối) và đánh chỉ mục.
+        Mã dòng là số thứ tự của dòng trong file CSV, giống như CsvJournalBackend.
+        """
+        backend = cls(db_path)
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        with backend._connect() as connection:
+            definitions = ['row_id INTEGER PRIMARY KEY']
+            for col in columns:
+                sql_type = 'TEXT'
+                if col in NUMERIC_DTYPES:
+                    sql_type = 'REAL' if NUMERIC_DTYPES[col].startswith('float') else 'INTEGER'
+                definitions.append(f'{_quote(col)} {sql_type}')
+            connection.execute(f'DROP TABLE IF EXISTS {cls.TABLE}')
+            connection.execute(f'CREATE TABLE {cls.TABLE} ({", ".join(definitions)})')
+
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+                chunk.to_sql(cls.TABLE, connection, if_exists='append', index=True, index_label='row_id')
+
+            for col in SQLITE_INDEXED_COLUMNS:
+                if col in columns:
+                    index_name = 'idx_' + ''.join(ch if ch.isalnum() else '_' for ch in col)
+                    connection.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {cls.TABLE} ({_quote(col)})')
+        return backend
+
+    def _where(self, filters):
+        """
+        Tạo mệnh đề WHERE có tham số từ bộ lọc {cột: giá trị hoặc danh sách giá trị}.
+        Giá trị được chuyển như khi ghi (journal.to_json_value) để số kiểu numpy lấy từ DataFrame vẫn khớp.
+        """
+        clauses, params = [], []
+        for col, value in (filters or {}).items():
+            if col not in self.columns:
+                raise ValueError(f"Cột '{col}' không tồn tại.")
+            if pd.api.types.is_list_like(value):
+                value = [journal.to_json_value(item) for item in value]
+                clauses.append(f'{_quote(col)} IN ({", ".join("?" * len(value))})')
+                params.extend(value)
+            else:
+                clauses.append(f'{_quote(col)} = ?')
+                params.append(journal.to_json_value(value))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _read_sql(self, sql, params):
+        """
+        Chạy câu truy vấn và trả về DataFrame theo schema, index là row_id.
+        """
+        with self._connect() as connection:
+            data = pd.read_sql_query(sql, connection, params=params, index_col='row_id')
+        data.index.name = None
+        return apply_schema(data)
+
+    def load(self, report=False):
+        data = self._read_sql(f'SELECT * FROM {self.TABLE} ORDER BY row_id', [])
+        if report:
+            print(f"Đã đọc {len(data)} dòng từ '{self.db_path}'.")
+        return data
+
+    def next_row_id(self, data):
+        with self._connect() as connection:
+            max_id = connection.execute(f'SELECT MAX(row_id) FROM {self.TABLE}').fetchone()[0]
+        candidates = [-1 if max_id is None else max_id]
+        if len(data):
+            candidates.append(int(data.index.max()))
+        return max(candidates) + 1
+
+    def insert(self, row_id, entry):
+        entry = {col: journal.to_json_value(value) for col, value in entry.items() if col in self.columns}
+        names = ', '.join(['row_id'] + [_quote(col) for col in entry])
+        marks = ', '.join('?' * (len(entry) + 1))
+        with self._connect() as connection:
+            connection.execute(f'INSERT INTO {self.TABLE} ({names}) VALUES ({marks})', [int(row_id), *entry.values()])
+
+    def update(self, row_id, values):
+        self.update_many([(row_id, values)])
+
+    def update_many(self, updates):
+        with self._connect() as connection:
+            for row_id, values in updates:
+                values = {col: journal.to_json_value(value) for col, value in values.items() if col in self.columns}
+                if not values:
+                    continue
+                assignments = ', '.join(f'{_quote(col)} = ?' for col in values)
+                connection.execute(f'UPDATE {self.TABLE} SET {assignments} WHERE row_id = ?', [*values.values(), int(row_id)])
+
+    def delete(self, row_ids):
+        row_ids = [int(row_id) for row_id in row_ids]
+        with self._connect() as connection:
+            connection.executemany(f'DELETE FROM {self.TABLE} WHERE row_id = ?', [(row_id,) for row_id in row_ids])
+
+    def count(self, filters=None):
+        where, params = self._where(filters)
+        with self._connect() as connection:
+            return connection.execute(f'SELECT COUNT(*) FROM {self.TABLE}{where}', params).fetchone()[0]
+
+    def page(self, page_size, current_page, filters=None):
+        where, params = self._where(filters)
+        offset = (current_page - 1) * page_size
+        return self._read_sql(
+            f'SELECT * FROM {self.TABLE}{where} ORDER BY row_id LIMIT ? OFFSET ?',
+            params + [int(page_size), int(offset)]
+        )
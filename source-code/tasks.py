@@ -0,0 +1,161 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Chu kỳ kiểm tra kết quả của các tác vụ trên luồng Tk (mili giây)
+POLL_INTERVAL_MS = 50
+# Số luồng cho tác vụ I/O và pandas/numpy
+THREAD_WORKERS = 4
+
+class Task:
+    """
+    Một tác vụ đang chạy ở nền. Hàm chạy ở luồng có thể kiểm tra task.cancelled để dừng sớm
+    và gửi kết quả tạm thời bằng task.emit(giá trị).
+    """
+
+    def __init__(self, channel, description):
+        self.channel = channel
+        self.description = description
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.on_done = None
+        self.on_error = None
+        self.on_partial = None
+        self.partials = deque()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def emit(self, value):
+        """Gửi kết quả tạm thời (được đưa về luồng Tk qua on_partial; chỉ giá trị mới nhất được dùng)."""
+        self.partials.append(value)
+
+    def cancel(self):
+        """Hủy tác vụ: chưa chạy thì không chạy nữa, đang chạy thì kết quả bị bỏ qua."""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+class TaskRunner:
+    """
+    Chạy tác vụ nặng ngoài luồng giao diện Tk để cửa sổ luôn phản hồi.
+    - Luồng (thread pool) cho đọc/ghi file và các phép tính pandas/numpy (nhả GIL);
+      tiến trình (process pool) cho tác vụ tính toán chỉ nhận đối số nhỏ, ví dụ đường dẫn file.
+    - Kết quả được đưa về luồng Tk bằng root.after (Tk không cho phép gọi từ luồng khác).
+    - Mỗi tác vụ thuộc một kênh (channel): tác vụ mới trên cùng kênh thay thế tác vụ cũ.
+    - on_busy(số tác vụ đang chạy, mô tả tác vụ mới nhất) được gọi khi số tác vụ thay đổi (hiển thị tiến trình).
+    """
+
+    def __init__(self, root, on_busy=None, thread_workers=THREAD_WORKERS, process_workers=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix='task')
+        self.process_workers = process_workers
+        self.processes = None
+        self.tasks = []
+        self.current = {}
+        self.polling = False
+
+    def _process_pool(self):
+        if self.processes is None:
+            # 'spawn' để tiến trình con không sao chép trạng thái Tk và các luồng của tiến trình chính
+            self.processes = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self.processes
+
+    def submit(self, channel, func, *args, on_done=None, on_error=None, on_partial=None, process=False, with_task=False,
+               description=''):
+        """
+        Chạy func(*args) ở nền.
+        :param channel: Kênh của tác vụ; tác vụ cũ trên cùng kênh bị hủy
+        :param on_done: Gọi on_done(kết quả) trên luồng Tk khi xong
+        :param on_error: Gọi on_error(lỗi) trên luồng Tk nếu func ném ngoại lệ
+        :param on_partial: Gọi on_partial(giá trị) trên luồng Tk với kết quả tạm thời mới nhất (task.emit)
+        :param process: Chạy trong process pool (func và các đối số phải pickle được)
+        :param with_task: Truyền đối tượng Task làm đối số đầu tiên (để func kiểm tra task.cancelled)
+        :return: Đối tượng Task
+        """
+        self.cancel(channel)
+        task = Task(channel, description)
+        task.on_done, task.on_error, task.on_partial = on_done, on_error, on_partial
+        if with_task:
+            args = (task,) + args
+        executor = self._process_pool() if process else self.threads
+        task.future = executor.submit(func, *args)
+        self.current[channel] = task
+        self.tasks.append(task)
+        self._busy_changed()
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def cancel(self, channel):
+        """Hủy tác vụ đang chạy trên kênh (nếu có)."""
+        task = self.current.pop(channel, None)
+        if task is not None:
+            task.cancel()
+
+    def is_running(self, channel):
+        """Kênh có tác vụ chưa xong hay không."""
+        task = self.current.get(channel)
+        return task is not None and not task.future.done()
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            running = [task for task in self.tasks if not task.cancelled]
+            self.on_busy(len(running), running[-1].description if running else '')
+
+    def _call(self, task, callback, value):
+        """
+        Gọi callback của tác vụ; lỗi trong callback chỉ được in ra để không dừng vòng kiểm tra (_poll).
+        """
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"Lỗi khi xử lý kết quả của tác vụ '{task.description}': {e}")
+
+    def _poll(self):
+        """
+        Kiểm tra các tác vụ đã xong trên luồng Tk và gọi callback tương ứng.
+        """
+        try:
+            for task in self.tasks:
+                if task.partials and not task.cancelled and task.on_partial is not None:
+                    value = task.partials.pop()
+                    task.partials.clear()
+                    if not task.future.done():
+                        self._call(task, task.on_partial, value)
+
+            finished = [task for task in self.tasks if task.future.done()]
+            for task in finished:
+                self.tasks.remove(task)
+                if task.cancelled or self.current.get(task.channel) is not task:
+                    continue
+                del self.current[task.channel]
+                error = task.future.exception()
+                if error is not None:
+                    if task.on_error is not None:
+                        self._call(task, task.on_error, error)
+                    else:
+                        print(f"Lỗi khi chạy tác vụ '{task.description}': {error}")
+                elif task.on_done is not None:
+                    self._call(task, task.on_done, task.future.result())
+            if finished:
+                self._busy_changed()
+        finally:
+            # Luôn lên lịch lần kiểm tra tiếp theo, kể cả khi có lỗi ngoài dự kiến
+            if self.tasks:
+                self.root.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self.polling = False
+
+    def shutdown(self):
+        """Hủy mọi tác vụ và dừng các pool (gọi khi đóng cửa sổ)."""
+        for channel in list(self.current):
+            self.cancel(channel)
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        if self.processes is not None:
+            self.processes.shutdown(wait=False, cancel_futures=True)
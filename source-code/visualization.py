@@ -1,79 +1,182 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from cube import ContingencyCube, contingency_cube
 
 # Hàm hỗ trợ
-def save_or_show_plot(save_path=None, verbose=True):
+def save_or_show_plot(save_path=None, verbose=True, figure=None):
     """
     Lưu hoặc hiển thị biểu đồ.
+    :param save_path: Đường dẫn file, hoặc danh sách đường dẫn (ví dụ cùng biểu đồ dạng PNG và SVG)
+    :param figure: Figure cần lưu (mặc định: figure hiện tại của pyplot)
     """
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        if verbose:
-            print(f"Biểu đồ đã được lưu tại: {save_path}")
+        for path in [save_path] if isinstance(save_path, str) else save_path:
+            (figure or plt).savefig(path, dpi=300, bbox_inches='tight')
+            if verbose:
+                print(f"Biểu đồ đã được lưu tại: {path}")
     else:
         plt.show()
 
+class Chart:
+    """
+    Biểu đồ đã vẽ trên một Axes. Các artist được giữ theo khóa dữ liệu để update_chart
+    cập nhật tại chỗ (set_height, set_data) khi dữ liệu thay đổi, không cần vẽ lại.
+    """
+
+    def __init__(self, name, ax):
+        self.name = name
+        self.ax = ax
+        self.bars = {}      # khóa -> Rectangle
+        self.labels = {}    # khóa -> Text ghi giá trị của cột
+        self.lines = {}     # khóa -> Line2D
+        self.label_zero = True  # Cột có giá trị 0 cũng có nhãn
+
+def _figure(ax, figsize):
+    """
+    Axes để vẽ: ax của nơi gọi (Figure do nơi gọi quản lý), hoặc Figure mới nếu ax là None.
+    :return: Figure mới (None nếu dùng ax của nơi gọi) và Axes
+    """
+    if ax is not None:
+        return None, ax
+    figure, ax = plt.subplots(figsize=figsize)
+    return figure, ax
+
+def _finish(figure, save_path):
+    """
+    Với Figure tự tạo: căn chỉnh bố cục, lưu/hiển thị rồi đóng ngay để giải phóng bộ nhớ.
+    Khi vẽ vào Axes của nơi gọi, nơi gọi tự căn chỉnh và vẽ lại canvas.
+    """
+    if figure is not None:
+        figure.tight_layout()
+        save_or_show_plot(save_path, figure=figure)
+        plt.close(figure)
+
+def _cube(data):
+    """
+    Khối đếm của dữ liệu: data là DataFrame (khối đếm được xây dựng một lần và lưu lại) hoặc ContingencyCube.
+    """
+    return data if isinstance(data, ContingencyCube) else contingency_cube(data)
+
+def _observed(table):
+    """
+    Bỏ các hàng/cột không có bản ghi nào của bảng đếm (như groupby với observed=True).
+    """
+    return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+def _long_counts(table):
+    """
+    Bảng đếm dạng dài (giá trị cột, Depression Risk, Count) giảm dần theo Count, như DataFrame.value_counts.
+    """
+    counts = table.stack().rename('Count').reset_index()
+    return counts.sort_values('Count', ascending=False, kind='stable').reset_index(drop=True)
+
+def _table_values(table):
+    """Giá trị của bảng theo khóa (hàng, cột)."""
+    return {(row, col): table.at[row, col] for row in table.index for col in table.columns}
+
+def _track_bars(chart, ax, keys):
+    """
+    Gắn các cột do seaborn vẽ với khóa (x, hue): mỗi container ứng với một giá trị hue theo hue_order,
+    các cột trong container theo order (dữ liệu đầy đủ mọi tổ hợp nên không thiếu cột nào).
+    """
+    for container, hue_keys in zip(ax.containers, keys):
+        chart.bars.update(zip(hue_keys, container))
+
+def _employment_table(cube):
+    """Tỉ lệ (%) trạng thái việc làm trong từng mức độ nguy cơ: hàng là mức độ, cột là trạng thái việc làm."""
+    depression_order = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+    grouped_data = _observed(cube.table('Employment Status')).T
+    grouped_data = grouped_data.reindex([level for level in depression_order if level in grouped_data.index])
+    return grouped_data.div(grouped_data.sum(axis=1), axis=0) * 100
+
+def _age_density(table, risk_level):
+    """Mật độ phân phối tuổi của một mức độ nguy cơ từ bảng đếm Age."""
+    counts = table[risk_level] if risk_level in table.columns else pd.Series(dtype='int64')
+    counts = counts[counts > 0]
+    return counts / counts.sum()
+
 # Các hàm vẽ biểu đồ
-def plot_sleep_vs_depression(data, save_path=None):
+def plot_sleep_vs_depression(data, save_path=None, ax=None):
     """
     Vẽ biểu đồ mối tương quan giữa Mẫu giấc ngủ và Nguy cơ trầm cảm.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :param ax: Axes để vẽ vào (không lưu/hiển thị); mặc định tạo Figure mới
+    :return: Chart
     """
-    sleep_vs_depression = data.groupby(['Sleep Patterns', 'Depression Risk']).size().unstack()
+    sleep_vs_depression = _observed(_cube(data).table('Sleep Patterns'))
     sleep_vs_depression_reset = sleep_vs_depression.reset_index().melt(
         id_vars='Sleep Patterns', 
         var_name='Depression Risk', 
         value_name='Count'
     )
+    order, hue_order = list(sleep_vs_depression.index), list(sleep_vs_depression.columns)
 
-    plt.figure(figsize=(14, 8))
-    barplot = sns.barplot(
+    figure, ax = _figure(ax, figsize=(14, 8))
+    sns.barplot(
         data=sleep_vs_depression_reset, 
         x='Sleep Patterns', 
         y='Count', 
         hue='Depression Risk', 
-        palette="coolwarm"
+        order=order,
+        hue_order=hue_order,
+        palette="coolwarm",
+        ax=ax
     )
 
-    plt.title('Sleep Patterns by Depression Risk', fontsize=16, pad=20)
-    plt.xlabel('Sleep Patterns', fontsize=14, labelpad=10)
-    plt.ylabel('Number of People', fontsize=14, labelpad=10)
-    plt.legend(title='Depression Risk', fontsize=12)
+    ax.set_title('Sleep Patterns by Depression Risk', fontsize=16, pad=20)
+    ax.set_xlabel('Sleep Patterns', fontsize=14, labelpad=10)
+    ax.set_ylabel('Number of People', fontsize=14, labelpad=10)
+    ax.legend(title='Depression Risk', fontsize=12)
 
-    for p in barplot.patches:
+    chart = Chart('sleep', ax)
+    chart.label_zero = False
+    _track_bars(chart, ax, [[(x, hue) for x in order] for hue in hue_order])
+    for key, p in chart.bars.items():
         height = p.get_height()
         if height > 0:
-            barplot.annotate(f'{int(height)}', 
-                             (p.get_x() + p.get_width() / 2., height), 
-                             ha='center', va='bottom', 
-                             fontsize=10, color='black', 
-                             xytext=(0, 3), textcoords='offset points')
+            chart.labels[key] = ax.annotate(f'{int(height)}', 
+                                            (p.get_x() + p.get_width() / 2., height), 
+                                            ha='center', va='bottom', 
+                                            fontsize=10, color='black', 
+                                            xytext=(0, 3), textcoords='offset points')
 
-    plt.tight_layout()
-    save_or_show_plot(save_path)
+    _finish(figure, save_path)
+    return chart
 
-def plot_marital_vs_depression(data, save_path=None):
+def plot_marital_vs_depression(data, save_path=None, ax=None):
     """
     Vẽ biểu đồ mối tương quan giữa Tình trạng hôn nhân và Nguy cơ trầm cảm.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :param ax: Axes để vẽ vào (không lưu/hiển thị); mặc định tạo Figure mới
+    :return: Chart
     """
-    marital_vs_depression = data.value_counts(['Marital Status', 'Depression Risk']).reset_index(name='Count')
+    table = _observed(_cube(data).table('Marital Status'))
+    marital_vs_depression = _long_counts(table)
+    order = list(table.index)
+    hue_order = list(dict.fromkeys(marital_vs_depression['Depression Risk']))
 
-    plt.figure(figsize=(12, 6))
+    figure, ax = _figure(ax, figsize=(12, 6))
     sns.barplot(
         data=marital_vs_depression, 
         x='Marital Status', 
         y='Count', 
         hue='Depression Risk', 
-        palette='coolwarm'
+        order=order,
+        hue_order=hue_order,
+        palette='coolwarm',
+        ax=ax
     )
 
-    plt.title('Marital status by Depression Risk', fontsize=16, pad=20)
-    plt.xlabel('Tình trạng hôn nhân', fontsize=14)
-    plt.ylabel('Số lượng người', fontsize=14)
-    plt.legend(title='Nguy cơ trầm cảm', fontsize=12)
+    ax.set_title('Marital status by Depression Risk', fontsize=16, pad=20)
+    ax.set_xlabel('Tình trạng hôn nhân', fontsize=14)
+    ax.set_ylabel('Số lượng người', fontsize=14)
+    ax.legend(title='Nguy cơ trầm cảm', fontsize=12)
 
-    for p in plt.gca().patches:
-        plt.text(
+    chart = Chart('marital', ax)
+    _track_bars(chart, ax, [[(x, hue) for x in order] for hue in hue_order])
+    for key, p in chart.bars.items():
+        chart.labels[key] = ax.text(
             p.get_x() + p.get_width() / 2,  
             p.get_height(),                 
             f'{int(p.get_height())}',       
@@ -81,86 +184,183 @@ def plot_marital_vs_depression(data, save_path=None):
             fontsize=10, color='black'     
         )
 
-    plt.tight_layout()
-    save_or_show_plot(save_path)
+    _finish(figure, save_path)
+    return chart
 
-def plot_age_distribution(data, save_path=None, colors=None):
+def plot_age_distribution(data, save_path=None, colors=None, ax=None):
     """
     Vẽ biểu đồ mật độ phân phối tuổi theo nhóm nguy cơ.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :param ax: Axes để vẽ vào (không lưu/hiển thị); mặc định tạo Figure mới
+    :return: Chart
     """
-    plt.figure(figsize=(10, 6))
+    age_vs_depression = _cube(data).table('Age')
+    figure, ax = _figure(ax, figsize=(10, 6))
     if colors is None:
         colors = {'High': 'blue', 'Very High': 'red'}
     
+    chart = Chart('age', ax)
     for risk_level, color in colors.items():
-        subset = data[data['Depression Risk'] == risk_level]
-        density = subset.groupby('Age').size() / len(subset)
-        plt.plot(
+        density = _age_density(age_vs_depression, risk_level)
+        chart.lines[risk_level], = ax.plot(
             density.index, density.values,
             label=risk_level, color=color, linewidth=1.5
         )
-    plt.title('Density of Age Groups by Depression Risk', fontsize=14, fontweight='bold')
-    plt.xlabel('Age')
-    plt.ylabel('Density')
-    plt.legend(loc='upper left')
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.tight_layout()
-    save_or_show_plot(save_path)
+    ax.set_title('Density of Age Groups by Depression Risk', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Age')
+    ax.set_ylabel('Density')
+    ax.legend(loc='upper left')
+    ax.grid(True, linestyle='--', alpha=0.5)
+    _finish(figure, save_path)
+    return chart
 
-def plot_education_vs_depression(data, save_path=None):
+def plot_education_vs_depression(data, save_path=None, ax=None):
     """
     Vẽ biểu đồ phân phối nguy cơ trầm cảm theo trình độ học vấn.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :param ax: Axes để vẽ vào (không lưu/hiển thị); mặc định tạo Figure mới
+    :return: Chart
     """
-    education_vs_depression = data.value_counts(['Education Level', 'Depression Risk']).reset_index(name='Count')
-    education_vs_depression = education_vs_depression.sort_values('Count', ascending=False)
+    table = _observed(_cube(data).table('Education Level'))
+    education_vs_depression = _long_counts(table)
+    risk_levels = list(table.columns)
 
-    palette = sns.color_palette("hls", len(data['Depression Risk'].unique()))
+    palette = sns.color_palette("hls", len(risk_levels))
 
-    plt.figure(figsize=(12, 6))
+    figure, ax = _figure(ax, figsize=(12, 6))
 
-    for risk, color in zip(data['Depression Risk'].unique(), palette):
+    chart = Chart('education', ax)
+    for risk, color in zip(risk_levels, palette):
         subset = education_vs_depression[education_vs_depression['Depression Risk'] == risk]
-        bars = plt.bar(
-            subset['Education Level'], subset['Count'], label=risk, alpha=0.7, color=color
+        bars = ax.bar(
+            subset['Education Level'].astype(str), subset['Count'], label=risk, alpha=0.7, color=color
         )
 
-        for bar in bars:
+        for level, bar in zip(subset['Education Level'], bars):
             height = bar.get_height()
-            plt.text(
+            chart.bars[(level, risk)] = bar
+            chart.labels[(level, risk)] = ax.text(
                 bar.get_x() + bar.get_width() / 2, height,
                 f'{int(height)}', ha='center', va='bottom', fontsize=10
             )
 
-    plt.title('Distribution of Depression Risk by Education Level', fontsize=14, fontweight='bold')
-    plt.xlabel('Education Level', fontsize=12)
-    plt.ylabel('Count', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.legend(title='Depression Risk', loc='upper right')
-    plt.tight_layout()
-    save_or_show_plot(save_path)
+    ax.set_title('Distribution of Depression Risk by Education Level', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Education Level', fontsize=12)
+    ax.set_ylabel('Count', fontsize=12)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.legend(title='Depression Risk', loc='upper right')
+    _finish(figure, save_path)
+    return chart
 
-def plot_employment_vs_depression(data, save_path=None):
+def plot_employment_vs_depression(data, save_path=None, ax=None):
     """
     Vẽ biểu đồ trạng thái việc làm theo nguy cơ trầm cảm.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :param ax: Axes để vẽ vào (không lưu/hiển thị); mặc định tạo Figure mới
+    :return: Chart
     """
-    depression_order = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
-    data['Depression Risk'] = pd.Categorical(data['Depression Risk'], categories=depression_order, ordered=True)
+    # Hàng: mức độ nguy cơ theo thứ tự tăng dần, cột: trạng thái việc làm
+    pivot_table = _employment_table(_cube(data))
 
-    grouped_data = data.value_counts(['Depression Risk', 'Employment Status']).reset_index(name='Count')
-    grouped_data = grouped_data.sort_values('Depression Risk')
-    total_counts = grouped_data.groupby('Depression Risk')['Count'].transform('sum')
-    grouped_data['Percentage'] = grouped_data['Count'] / total_counts * 100
+    figure, ax = _figure(ax, figsize=(12, 6))
+    pivot_table.plot(kind='bar', ax=ax, width=0.7, color=sns.color_palette("Set2", len(pivot_table.columns)))
+
+    ax.set_title('Distribution of Employment Status by Depression Risk', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Depression Risk', fontsize=12)
+    ax.set_ylabel('Percentage (%)', fontsize=12)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.legend(title='Employment Status', fontsize=10)
+    ax.grid(axis='y', linestyle='--', alpha=0.5)
+
+    # pandas vẽ mỗi cột của bảng thành một container, các cột trong container theo thứ tự hàng
+    chart = Chart('employment', ax)
+    _track_bars(chart, ax, [[(level, status) for level in pivot_table.index] for status in pivot_table.columns])
+    _finish(figure, save_path)
+    return chart
+
+def update_chart(chart, data) -> bool:
+    """
+    Cập nhật biểu đồ đã vẽ theo dữ liệu mới chỉ bằng cách đổi dữ liệu của các artist
+    (chiều cao cột, nhãn giá trị, dữ liệu đường), không tạo lại Axes.
+    :param data: DataFrame hoặc khối đếm (cube.ContingencyCube)
+    :return: False nếu bố cục thay đổi (giá trị mới xuất hiện hoặc mất đi), khi đó cần vẽ lại biểu đồ
+    """
+    cube = _cube(data)
+    if chart.name == 'age':
+        table = cube.table('Age')
+        for risk_level, line in chart.lines.items():
+            density = _age_density(table, risk_level)
+            line.set_data(density.index, density.values)
+    else:
+        if chart.name == 'employment':
+            values = _table_values(_employment_table(cube))
+        else:
+            column = {'sleep': 'Sleep Patterns', 'marital': 'Marital Status', 'education': 'Education Level'}[chart.name]
+            values = _table_values(_observed(cube.table(column)))
+        if set(values) != set(chart.bars):
+            return False
+        if not chart.label_zero and any((values[key] > 0) != (key in chart.labels) for key in values):
+            return False
+        for key, height in values.items():
+            chart.bars[key].set_height(height)
+            label = chart.labels.get(key)
+            if label is not None:
+                label.set_text(f'{int(height)}')
+                if hasattr(label, 'xy'):
+                    label.xy = (label.xy[0], height)
+                else:
+                    label.set_y(height)
+    chart.ax.relim()
+    chart.ax.autoscale_view()
+    return True
+
+class ChartPanel:
+    """
+    Một Figure dùng lâu dài cho mọi biểu đồ (ví dụ nhúng vào Tk bằng FigureCanvasTkAgg).
+    - Mỗi biểu đồ có Axes riêng, chỉ được vẽ ở lần hiển thị đầu tiên; chuyển biểu đồ chỉ đổi Axes được hiển thị.
+    - Khi dữ liệu thay đổi, biểu đồ được cập nhật tại chỗ bằng update_chart (chỉ vẽ lại khi bố cục thay đổi).
+    - Ảnh đã dựng của mỗi biểu đồ được lưu theo phiên bản dữ liệu và kích thước canvas, nên quay lại một biểu đồ
+      không đổi chỉ cần chép lại ảnh (restore_region, blit).
+    """
 
-    pivot_table = grouped_data.pivot(index='Depression Risk', columns='Employment Status', values='Percentage').fillna(0)
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.charts = {}   # tên -> (Chart, phiên bản dữ liệu)
+        self.images = {}   # tên -> (phiên bản dữ liệu, kích thước canvas, ảnh đã dựng)
 
-    pivot_table.plot(kind='bar', figsize=(12, 6), width=0.7, color=sns.color_palette("Set2", len(pivot_table.columns)))
+    def show(self, name, plot, data, version):
+        """
+        Hiển thị biểu đồ name.
+        :param plot: Hàm vẽ (ví dụ plot_sleep_vs_depression), được gọi với ax= của biểu đồ
+        :param data: DataFrame hoặc khối đếm
+        :param version: Phiên bản dữ liệu (indexes.dataset_version); biểu đồ được cập nhật khi phiên bản đổi
+        """
+        entry = self.charts.get(name)
+        if entry is None:
+            chart = plot(data, ax=self.figure.add_subplot())
+        else:
+            chart, chart_version = entry
+            if chart_version != version and not update_chart(chart, data):
+                chart.ax.clear()
+                chart = plot(data, ax=chart.ax)
+        self.charts[name] = (chart, version)
+        for other, _ in self.charts.values():
+            other.ax.set_visible(other is chart)
+            other.ax.set_in_layout(other is chart)
 
-    plt.title('Distribution of Employment Status by Depression Risk', fontsize=16, fontweight='bold')
-    plt.xlabel('Depression Risk', fontsize=12)
-    plt.ylabel('Percentage (%)', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.legend(title='Employment Status', fontsize=10)
-    plt.grid(axis='y', linestyle='--', alpha=0.5)
-    plt.tight_layout()
-    save_or_show_plot(save_path)
+        size = (self.figure.bbox.width, self.figure.bbox.height)
+        image = self.images.get(name)
+        if image is not None and image[:2] == (version, size):
+            self.canvas.restore_region(image[2])
+            self.canvas.blit(self.figure.bbox)
+            return
+        self.figure.tight_layout()
+        self.canvas.draw()
+        self.images[name] = (version, size, self.canvas.copy_from_bbox(self.figure.bbox))
 
+    def close(self):
+        """Giải phóng các biểu đồ và ảnh đã dựng (gọi khi đóng cửa sổ biểu đồ)."""
+        self.charts.clear()
+        self.images.clear()
+        self.figure.clear()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các module nằm trực tiếp trong source-code/ (import theo tên module, như main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source-code'))
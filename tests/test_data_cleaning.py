@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pandas as pd
+from schema import VALID_VALUES
+from data_cleaning import run_incremental, clean_data_chunked
+
+def _write_input(path, rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'Name': [f'Person {i}' for i in range(rows)],
+        'Age': rng.integers(18, 80, rows),
+        'Number of Children': rng.integers(0, 4, rows),
+        'Income': rng.integers(1000, 200000, rows),
+    })
+    for col, values in VALID_VALUES.items():
+        if col != 'Depression Risk':
+            data[col] = rng.choice(values, rows)
+    data.to_csv(path, index=False)
+
+def test_same_size_edit_is_not_skipped(tmp_path):
+    input_path, output_path = str(tmp_path / 'input.csv'), str(tmp_path / 'output.csv')
+    _write_input(input_path)
+    assert run_incremental(input_path, output_path, chunksize=1000)[0] == 'full'
+
+    # Sửa giữa file, giữ nguyên kích thước (ngoài vùng 64KB đầu file của dấu vân tay)
+    content = open(input_path, 'rb').read()
+    edited = content.replace(b'Person 1500,', b'Person 9510,', 1)
+    assert len(edited) == len(content) and edited != content
+    with open(input_path, 'wb') as f:
+        f.write(edited)
+    stat = os.stat(input_path)
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert run_incremental(input_path, output_path, chunksize=1000)[0] == 'full'
+    clean_data_chunked(input_path, str(tmp_path / 'fresh.csv'), chunksize=1000)
+    assert open(output_path).read() == open(tmp_path / 'fresh.csv').read()
+
+def test_touch_without_changes_is_skipped(tmp_path):
+    input_path, output_path = str(tmp_path / 'input.csv'), str(tmp_path / 'output.csv')
+    _write_input(input_path)
+    run_incremental(input_path, output_path, chunksize=1000)
+    stat = os.stat(input_path)
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert run_incremental(input_path, output_path, chunksize=1000) == ('skipped', 0)
+
+def test_chunked_statistics_match_in_memory_for_high_cardinality_columns(tmp_path):
+    from data_cleaning import collect_fill_statistics, compute_fill_statistics, remove_outliers
+    input_path = str(tmp_path / 'input.csv')
+    _write_input(input_path, rows=5000, seed=1)
+    data = pd.read_csv(input_path)
+    rng = np.random.default_rng(2)
+    # Income lệch phải, gần như không trùng nhau (có phần thập phân); Name gần như không trùng, vài tên lặp lại
+    data['Income'] = np.round(rng.lognormal(10, 1.2, len(data)), 2)
+    data.loc[::7, 'Income'] = np.nan
+    data.loc[::97, 'Name'] = 'Zed'
+    data.loc[::89, 'Name'] = 'Anh'
+    data.to_csv(input_path, index=False)
+
+    expected = compute_fill_statistics(remove_outliers(pd.read_csv(input_path)))
+    for chunksize in (250, 10_000):
+        stats = collect_fill_statistics(input_path, chunksize)
+        assert stats['num_fill'] == expected['num_fill']
+        assert stats['str_fill'] == expected['str_fill']
@@ -0,0 +1,44 @@
+import pandas as pd
+import crud
+import journal
+import storage
+from history import edit_history
+
+def _check(data, expected, csv_path):
+    pd.testing.assert_frame_equal(data, expected)
+    # Nhật ký được đọc lại từ đầu phải cho cùng dữ liệu (kể cả thứ tự dòng)
+    pd.testing.assert_frame_equal(journal.load(csv_path), expected)
+
+def test_undo_redo_replays_frame_and_journal(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'Name': ['An', 'Binh', 'Chi', 'Dung'],
+        'Age': [30, 41, 52, 63],
+        'Marital Status': ['Single', 'Married', 'Divorced', 'Widowed'],
+        'Income': [199999.99, 1234567.89, 131072.01, 45000.5],
+    }).to_csv(csv_path, index=False)
+    crud.set_backend(storage.CsvJournalBackend(csv_path))
+    try:
+        data = crud.read_csv_data()
+        history = edit_history(data)
+        states = [data.copy()]
+
+        data = crud.create_data(data, {'Name': 'Em', 'Age': 25, 'Marital Status': 'Single', 'Income': 250000.75})
+        states.append(data.copy())
+        crud.update_record(data, 1, {'Age': 42, 'Marital Status': 'Single'})
+        states.append(data.copy())
+        data = crud.delete_records(data, [2])
+        states.append(data.copy())
+        _check(data, states[3], csv_path)
+
+        for expected in reversed(states[:3]):
+            data = history.undo(data)
+            _check(data, expected, csv_path)
+        assert not history.can_undo()
+
+        for expected in states[1:]:
+            data = history.redo(data)
+            _check(data, expected, csv_path)
+        assert not history.can_redo()
+    finally:
+        crud.set_backend(None)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from indexes import get_index, notify_insert, notify_update, dataset_version
+from sort_index import sort_key, sorted_index, SortedIndex
+
+def _frame():
+    return pd.DataFrame({'Age': [30, 20, 40, 20], 'Name': ['An', 'Binh', 'Chi', 'Dung']})
+
+def test_index_built_during_update_is_not_cached():
+    data = _frame()
+    builds = []
+
+    def builder(frame):
+        builds.append(dataset_version(frame))
+        if len(builds) == 1:
+            # Một thao tác ghi (luồng Tk) xảy ra trong lúc chỉ mục đang được xây dựng ở luồng nền
+            data.at[0, 'Age'] = 50
+            notify_update(data, 0, {'Age': 30}, {'Age': 50})
+        return object()
+
+    first = get_index(data, 'test', builder)
+    second = get_index(data, 'test', builder)
+    assert first is not second
+    assert get_index(data, 'test', builder) is second
+    assert len(builds) == 2
+
+def test_sort_key_drops_permutation_computed_before_reset():
+    data = _frame()
+    key = sort_key(data, 'Age')
+    compute = key._compute
+
+    def racing_compute(frame):
+        result = compute(frame)
+        data.at[1, 'Age'] = 99
+        notify_update(data, 1, {'Age': 20}, {'Age': 99})
+        return result
+
+    key._compute = racing_compute
+    stale = key.permutation(data)
+    key._compute = compute
+
+    assert stale.tolist() == [1, 3, 0, 2]
+    assert key.permutation(data).tolist() == [3, 0, 2, 1]
+    assert key.get_ranks(data)[1] == 4
+
+def test_sort_key_descending():
+    data = pd.DataFrame({'Age': [30, np.nan, 20, 30]})
+    assert sort_key(data, 'Age').permutation(data, ascending=False).tolist() == [0, 3, 2, 1]
+
+def test_sorted_index_bulk_insert_matches_rebuild():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'Income': rng.integers(0, 50, size=200).astype('float32')})
+    index = sorted_index(data, 'Income')
+    income = rng.integers(0, 60, size=500).astype('float32')
+    income[::7] = np.nan
+    rows = pd.DataFrame({'Income': income}, index=rng.permutation(np.arange(1000, 1500)))
+    updated = pd.concat([data, rows])
+
+    notify_insert(data, updated, list(rows.index))
+
+    rebuilt = SortedIndex(updated, 'Income')
+    assert sorted_index(updated, 'Income') is index
+    assert np.array_equal(index.values, rebuilt.values)
+    assert np.array_equal(index.row_ids, rebuilt.row_ids)
+    assert index.between(10, 20).tolist() == rebuilt.between(10, 20).tolist()
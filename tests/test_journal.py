@@ -0,0 +1,94 @@
+import pandas as pd
+import journal
+
+INCOMES = [199999.99, 1234567.89, 131072.01, 45000.5]
+
+def _write_base(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'Name': ['An', 'Binh', 'Chi', 'Dung'],
+        'Age': [30, 41, 52, 63],
+        'Income': INCOMES,
+    }).to_csv(csv_path, index=False)
+    return csv_path
+
+def _incomes_on_disk(csv_path):
+    return pd.read_csv(csv_path, dtype={'Income': 'float64'})['Income'].tolist()
+
+def test_compact_keeps_income_precision(tmp_path):
+    csv_path = _write_base(tmp_path)
+    journal.load(csv_path)
+    journal.log_update(csv_path, 1, {'Age': 42})
+
+    journal.compact(csv_path)
+
+    assert _incomes_on_disk(csv_path) == INCOMES
+    assert pd.read_csv(csv_path)['Age'].tolist() == [30, 42, 52, 63]
+    assert journal.load(csv_path)['Income'].dtype == 'float32'
+    assert not journal.needs_compaction(csv_path)
+
+def test_compact_keeps_logged_income(tmp_path):
+    csv_path = _write_base(tmp_path)
+    journal.load(csv_path)
+    journal.log_update(csv_path, 2, {'Income': 987654.32})
+    journal.log_insert(csv_path, 4, {'Name': 'Em', 'Age': 25, 'Income': 250000.75})
+
+    journal.compact(csv_path)
+
+    assert _incomes_on_disk(csv_path) == [199999.99, 1234567.89, 987654.32, 45000.5, 250000.75]
+
+def test_compact_keeps_unknown_categories(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'Name': ['An', 'Binh'],
+        'Smoking Status': ['Heavy', 'Former'],
+        'Depression Risk': ['Unknown', 'Low'],
+    }).to_csv(csv_path, index=False)
+    assert journal.load(csv_path)['Smoking Status'].isna().tolist() == [True, False]
+    journal.log_update(csv_path, 1, {'Name': 'Binh Minh'})
+
+    journal.compact(csv_path)
+
+    on_disk = pd.read_csv(csv_path)
+    assert on_disk['Smoking Status'].tolist() == ['Heavy', 'Former']
+    assert on_disk['Depression Risk'].tolist() == ['Unknown', 'Low']
+    assert on_disk['Name'].tolist() == ['An', 'Binh Minh']
+
+def test_ops_logged_during_compaction_are_kept(tmp_path, monkeypatch):
+    csv_path = _write_base(tmp_path)
+    journal.load(csv_path)
+    journal.log_update(csv_path, 0, {'Age': 31})
+    replay = journal.replay
+
+    def replay_then_edit(data, ops, raw=False):
+        result = replay(data, ops, raw=raw)
+        # Mô phỏng luồng Tk ghi nối nhật ký trong lúc compact đang chạy ở nền
+        journal.log_update(csv_path, 3, {'Age': 64})
+        return result
+
+    monkeypatch.setattr(journal, 'replay', replay_then_edit)
+    journal.compact(csv_path)
+    monkeypatch.setattr(journal, 'replay', replay)
+
+    assert pd.read_csv(csv_path)['Age'].tolist() == [31, 41, 52, 63]
+    assert journal.load(csv_path)['Age'].tolist() == [31, 41, 52, 64]
+
+def test_undo_delete_keeps_row_order_after_reload(tmp_path):
+    import crud, storage
+    from history import edit_history
+    csv_path = _write_base(tmp_path)
+    crud.set_backend(storage.CsvJournalBackend(csv_path))
+    try:
+        data = crud.read_csv_data()
+        history = edit_history(data)
+        data = crud.delete_records(data, [2, 0])
+        data = history.undo(data)
+
+        reloaded = crud.read_csv_data()
+        assert reloaded.index.tolist() == data.index.tolist() == [0, 1, 2, 3]
+        assert reloaded['Name'].tolist() == ['An', 'Binh', 'Chi', 'Dung']
+
+        journal.compact(csv_path)
+        assert _incomes_on_disk(csv_path) == INCOMES
+    finally:
+        crud.set_backend(None)
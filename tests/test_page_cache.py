@@ -0,0 +1,61 @@
+import threading
+import pandas as pd
+import crud
+import storage
+from page_cache import PageCache, PAGE_CACHE_SIZE, page_cache
+
+def _wait_for_prefetch(cache):
+    # Luồng nạp trước chỉ có một worker: tác vụ rỗng xong nghĩa là các lần nạp trước đó đã xong
+    cache.executor.submit(lambda: None).result()
+
+def test_prefetched_page_is_not_served_after_in_place_update(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({'Name': [f'Person {i}' for i in range(30)], 'Age': range(20, 50)}).to_csv(csv_path, index=False)
+    crud.set_backend(storage.CsvJournalBackend(csv_path))
+    try:
+        data = crud.read_csv_data()
+        crud.paginate_data(data, 10, 1)
+        _wait_for_prefetch(page_cache)
+        hits = page_cache.stats()['hits']
+
+        crud.update_record(data, 12, {'Name': 'Updated'})
+        page, total_pages = crud.paginate_data(data, 10, 2)
+
+        assert total_pages == 3
+        assert page.at[12, 'Name'] == 'Updated'
+        assert page_cache.stats()['hits'] == hits
+    finally:
+        crud.set_backend(None)
+
+def test_prefetch_finishing_after_update_is_dropped():
+    cache = PageCache()
+    started, release = threading.Event(), threading.Event()
+    version = {'value': 0}
+
+    def loader():
+        started.set()
+        release.wait(5)
+        return 'stale page'
+
+    cache.prefetch(('page', 0, 2), loader, still_valid=lambda: version['value'] == 0)
+    started.wait(5)
+    version['value'] += 1  # Dữ liệu thay đổi trong lúc trang đang được nạp
+    release.set()
+    _wait_for_prefetch(cache)
+
+    assert cache.stats()['size'] == 0
+    assert cache.get(('page', 0, 2), lambda: 'fresh page') == 'fresh page'
+
+def test_lru_eviction_respects_capacity():
+    cache = PageCache()
+    for page in range(PAGE_CACHE_SIZE):
+        cache.get(page, lambda page=page: f'page {page}')
+    assert cache.stats()['size'] == PAGE_CACHE_SIZE == 64
+
+    cache.get(0, lambda: 'reloaded')  # Trúng: trang 0 trở thành trang dùng gần nhất
+    cache.get(PAGE_CACHE_SIZE, lambda: 'new page')
+
+    assert cache.stats()['size'] == PAGE_CACHE_SIZE
+    assert cache.get(0, lambda: 'reloaded') == 'page 0'
+    assert 1 not in cache.pages
+    assert cache.get(1, lambda: 'reloaded') == 'reloaded'
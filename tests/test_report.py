@@ -0,0 +1,33 @@
+import os
+import numpy as np
+import pandas as pd
+from schema import VALID_VALUES
+from report import render_report
+
+def _write_cohort(path, seed):
+    rng = np.random.default_rng(seed)
+    rows = 200
+    data = pd.DataFrame({
+        'Name': [f'Person {i}' for i in range(rows)],
+        'Age': rng.integers(18, 80, rows),
+        'Number of Children': rng.integers(0, 4, rows),
+        'Income': rng.integers(1000, 200000, rows),
+    })
+    for col, values in VALID_VALUES.items():
+        data[col] = rng.choice(values, rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data.to_csv(path, index=False)
+
+def test_same_named_cohorts_do_not_overwrite_and_leave_no_cache(tmp_path):
+    first, second = str(tmp_path / 'a' / 'data.csv'), str(tmp_path / 'b' / 'data.csv')
+    _write_cohort(first, 0)
+    _write_cohort(second, 1)
+    output_dir = str(tmp_path / 'reports')
+
+    written, errors = render_report([first, second], output_dir, charts=['sleep'], workers=1)
+
+    assert errors == {}
+    assert sorted(os.listdir(output_dir)) == ['data', 'data_2']
+    assert written[first] != written[second]
+    assert all(os.path.exists(path) for paths in written.values() for path in paths)
+    assert sorted(os.listdir(tmp_path / 'a')) == ['data.csv']
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import crud
+import risk_scoring
+from risk_scoring import score_batch
+from schema import VALID_VALUES, apply_schema
+
+def _baseline_predict(data):
+    # Cách tính theo từng điều kiện trước khi có bảng luật (data_cleaning.predict_depression_risk ban đầu)
+    risk_scores = np.zeros(len(data))
+    risk_scores += (data['Income'] < 20000).astype(int)
+    risk_scores += (data['Physical Activity Level'] == 'Sedentary').astype(int)
+    risk_scores += (data['Smoking Status'] == 'Current').astype(int)
+    risk_scores += (data['History of Mental Illness'] == 'Yes').astype(int)
+    risk_scores += (data['Chronic Medical Conditions'] == 'Yes').astype(int)
+    risk_scores += (data['Sleep Patterns'] == 'Poor').astype(int)
+    risk_scores += (data['Employment Status'] == 'Unemployed').astype(int)
+    risk_scores += (data['Alcohol Consumption'] == 'High').astype(int)
+    risk_scores += (data['Dietary Habits'] == 'Unhealthy').astype(int)
+    risk_scores += (data['History of Substance Abuse'] == 'Yes').astype(int)
+    risk_scores += (data['Family History of Depression'] == 'Yes').astype(int)
+    return pd.Series(np.select(
+        [risk_scores >= 8, risk_scores >= 6, risk_scores >= 4, risk_scores >= 2],
+        ['Very High', 'High', 'Medium', 'Low'],
+        default='Very Low'
+    ))
+
+def _raw_frame(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'Name': [f'Person {i}' for i in range(rows)]})
+    for col, values in VALID_VALUES.items():
+        if col == 'Depression Risk':
+            continue
+        column = rng.choice(values + ['Unknown'], size=rows).astype(object)
+        column[rng.random(rows) < 0.05] = np.nan
+        data[col] = column
+    income = rng.uniform(0, 60000, size=rows)
+    income[rng.random(rows) < 0.05] = np.nan
+    data['Income'] = income
+    return data
+
+def test_score_batch_matches_baseline_on_raw_frame():
+    data = _raw_frame()
+    _, risk = score_batch(data)
+    assert risk.astype(str).tolist() == _baseline_predict(data).tolist()
+
+def test_score_batch_matches_baseline_on_schema_frame():
+    raw = _raw_frame(seed=1)
+    data = apply_schema(raw.copy())
+    assert data['Smoking Status'].isna().sum() > raw['Smoking Status'].isna().sum()  # 'Unknown' -> NaN
+    _, risk = score_batch(data)
+    assert risk.astype(str).tolist() == _baseline_predict(data).tolist() == _baseline_predict(raw).tolist()
+
+def test_apply_update_rescores_only_when_rule_column_changes(monkeypatch):
+    data = apply_schema(_raw_frame(rows=20, seed=2))
+    data['Depression Risk'] = score_batch(data)[1]
+    calls = []
+    original = risk_scoring.default_scorer.score_batch
+    monkeypatch.setattr(risk_scoring.default_scorer, 'score_batch', lambda frame: calls.append(len(frame)) or original(frame))
+
+    changes = crud._apply_update(data, 3, {'Name': 'Renamed', 'Marital Status': 'Married'})
+    assert calls == [] and 'Depression Risk' not in changes
+
+    changes = crud._apply_update(data, 3, {'Smoking Status': 'Current', 'Sleep Patterns': 'Poor'})
+    assert calls == [1]
+    expected = _baseline_predict(data.loc[[3]]).iloc[0]
+    assert changes['Depression Risk'] == data.at[3, 'Depression Risk'] == expected
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+import crud
+import storage
+from search_index import search_index, search_positions
+
+QUERIES = ['an', 'e', '4', 'binh', 'BIN', 'single', 'ngl', 'married', '41', 'chi 1', 'zzz']
+
+@pytest.fixture
+def data(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    rng = np.random.default_rng(0)
+    rows = 300
+    pd.DataFrame({
+        'Name': [f"{rng.choice(['An', 'Binh', 'Chi', 'Dung'])} {i % 40}" for i in range(rows)],
+        'Age': rng.integers(18, 80, size=rows),
+        'Marital Status': rng.choice(['Single', 'Married', 'Divorced', 'Widowed'], size=rows),
+        'Income': rng.integers(1000, 90000, size=rows) + 0.5,
+    }).to_csv(csv_path, index=False)
+    crud.set_backend(storage.CsvJournalBackend(csv_path))
+    try:
+        yield crud.read_csv_data()
+    finally:
+        crud.set_backend(None)
+
+def _brute_force(data, query):
+    mask = np.zeros(len(data), dtype=bool)
+    for col in data.columns:
+        mask |= data[col].astype(str).str.contains(query, case=False, regex=False).to_numpy()
+    return np.flatnonzero(mask)
+
+def _check(data):
+    for query in QUERIES:
+        assert search_positions(data, query).tolist() == _brute_force(data, query).tolist(), query
+
+def test_search_matches_brute_force_after_interleaved_edits(data):
+    _check(data)
+    index = search_index(data)
+
+    data = crud.create_data(data, {'Name': 'Binh Moi', 'Age': 41, 'Marital Status': 'Single', 'Income': 12345.5})
+    _check(data)
+    crud.update_record(data, 5, {'Name': 'Zed', 'Marital Status': 'Married'})
+    _check(data)
+    deleted = data.loc[[7, 8, 9]]
+    data = crud.delete_records(data, [7, 8, 9])
+    _check(data)
+    crud.update_record(data, 10, {'Age': 41})
+    _check(data)
+    # Thêm lại các dòng đã xóa (hoàn tác xóa): mã dòng được dùng lại
+    data = crud.insert_records(data, deleted, positions=[7, 8, 9])
+    _check(data)
+    data = crud.delete_records(data, [data.index[-1]])
+    _check(data)
+    assert search_index(data) is index
+
+def test_narrowed_query_sees_rows_changed_since_previous_search(data):
+    assert len(search_positions(data, 'bin'))
+    # 'Chi 1' đã có trong chỉ mục: tìm 'chi 1' sau 'chi' chỉ kiểm tra lại các giá trị đã khớp
+    search_positions(data, 'chi')
+    row_id = data.index[data['Name'] != 'Chi 1'][0]
+    crud.update_record(data, row_id, {'Name': 'Chi 1'})
+    positions = search_positions(data, 'chi 1')
+    assert data.index.get_loc(row_id) in positions
+    assert positions.tolist() == _brute_force(data, 'chi 1').tolist()
+
+    crud.update_record(data, row_id, {'Name': 'Khac'})
+    assert data.index.get_loc(row_id) not in search_positions(data, 'chi 1')
+    assert search_positions(data, 'chi 1').tolist() == _brute_force(data, 'chi 1').tolist()
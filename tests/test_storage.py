@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from storage import StorageBackend, SQLiteBackend
+
+def test_sqlite_filters_accept_numpy_scalars(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({
+        'Name': ['An', 'Binh', 'Chi'],
+        'Age': [30, 30, 41],
+        'Marital Status': ['Single', 'Married', 'Single'],
+    }).to_csv(csv_path, index=False)
+    backend = SQLiteBackend.from_csv(csv_path, str(tmp_path / 'data.db'))
+
+    assert backend.count({'Age': np.int8(30)}) == backend.count({'Age': 30}) == 2
+    assert backend.count({'Age': np.array([30, 41], dtype=np.int8)}) == 3
+    assert backend.page(10, 1, {'Age': np.int64(41)})['Name'].tolist() == ['Chi']
+
+def test_incomplete_backend_fails_at_construction():
+    class ReadOnlyBackend(StorageBackend):
+        def load(self, report=False):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+def test_use_sqlite_routes_crud_through_database(tmp_path):
+    import crud
+    csv_path = str(tmp_path / 'data.csv')
+    db_path = str(tmp_path / 'data.db')
+    pd.DataFrame({'Name': ['An', 'Binh'], 'Age': [30, 41]}).to_csv(csv_path, index=False)
+    try:
+        crud.use_sqlite(db_path, csv_path)
+        data = crud.read_csv_data()
+        data = crud.delete_records(data, [0])
+        crud.update_record(data, 1, {'Age': 42})
+
+        backend = crud.use_sqlite(db_path, csv_path)
+        assert backend.load()['Age'].tolist() == [42]
+        crud.use_sqlite(db_path, csv_path, rebuild=True)
+        assert crud.read_csv_data()['Name'].tolist() == ['An', 'Binh']
+    finally:
+        crud.set_backend(None)
@@ -0,0 +1,34 @@
+from tasks import TaskRunner
+
+class FakeRoot:
+    """Thay cho Tk: root.after chỉ xếp hàng callback, test tự chạy."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def run(self, runner):
+        for task in list(runner.tasks):
+            task.future.result(timeout=5)
+        while self.pending:
+            self.pending.pop(0)()
+
+def _raise(value):
+    raise ValueError("lỗi trong callback")
+
+def test_poll_survives_failing_callback():
+    root = FakeRoot()
+    runner = TaskRunner(root)
+    results = []
+
+    runner.submit('first', lambda: 1, on_done=_raise)
+    root.run(runner)
+    runner.submit('second', lambda: 2, on_done=results.append)
+    root.run(runner)
+
+    assert results == [2]
+    assert not runner.polling
+    assert runner.tasks == []
+    runner.shutdown()